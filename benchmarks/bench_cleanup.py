@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+import multiprocessing
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.treegen import SCALES, build_tree, tree_totals  # noqa: E402
+from core.metrics import peak_rss_bytes  # noqa: E402
+
+# (árbol, modo) de cada caso; los modos "secure_delete" y "backup_and_delete" miden las funciones por separado
+CASES = [
+    ("tiny_files", "plain"),
+    ("tiny_files", "parallel"),
+    ("tiny_files", "auto"),
+    ("tiny_files", "secure"),
+    ("tiny_files", "backup"),
+    ("deep_nesting", "plain"),
+    ("huge_files", "plain"),
+    ("huge_files", "secure"),
+    ("huge_files", "backup"),
+    ("huge_files", "secure_delete"),
+    ("tiny_files", "backup_and_delete"),
+    ("heavy_exclusions", "plain"),
+    ("browser_profiles", "browser_cache"),
+]
+
+
+def _run_mode(mode, tree_root, work_dir, extra, workers):
+    from core.cleanup import delete_files_in_directory, secure_delete, backup_and_delete
+    exclusions = extra.get("exclusions")
+    backup_directory = str(work_dir / "backup")
+    if mode == "plain":
+        delete_files_in_directory(tree_root, exclusions)
+    elif mode == "parallel":
+        delete_files_in_directory(tree_root, exclusions, workers=workers)
+    elif mode == "auto":
+        delete_files_in_directory(tree_root, exclusions, workers="auto")
+    elif mode == "secure":
+        delete_files_in_directory(tree_root, exclusions, secure=True)
+    elif mode == "backup":
+        delete_files_in_directory(tree_root, exclusions, backup_directory=backup_directory)
+    elif mode == "secure_delete":
+        for path in sorted(Path(tree_root).rglob("*")):
+            if path.is_file():
+                secure_delete(path)
+    elif mode == "backup_and_delete":
+        from core.backup_store import BackupStore
+        with BackupStore(backup_directory).begin_run() as run:
+            for path in sorted(Path(tree_root).rglob("*")):
+                if path.is_file():
+                    backup_and_delete(path, run)
+    elif mode == "browser_cache":
+        os.environ.update(extra["env"])
+        from core.browser_utils import get_browser_cache_paths
+        for _, cache_path in get_browser_cache_paths():
+            delete_files_in_directory(cache_path)
+    else:
+        raise ValueError(f"Modo desconocido: {mode}")
+
+
+def run_case(tree, mode, scale, seed, workers, queue):
+    """Ejecuta un caso en un proceso propio para que el pico de memoria sea solo suyo."""
+    from core.cleanup import configure_logging, stop_logging
+    work_dir = Path(tempfile.mkdtemp(prefix=f"bench-{tree}-{mode}-"))
+    try:
+        tree_root = work_dir / "tree"
+        extra = build_tree(tree, tree_root, scale, seed)
+        files, size = tree_totals(tree_root)
+        configure_logging(str(work_dir / "bench_log.txt"), console=False)
+        baseline_rss = peak_rss_bytes()
+        started = time.perf_counter()
+        _run_mode(mode, str(tree_root), work_dir, extra, workers)
+        elapsed = time.perf_counter() - started
+        stop_logging()
+        queue.put({"case": tree, "mode": mode, "files": files, "bytes": size, "seconds": round(elapsed, 4),
+                   "files_per_sec": round(files / elapsed, 1) if elapsed else None,
+                   "mb_per_sec": round(size / elapsed / (1024 * 1024), 2) if elapsed else None,
+                   "peak_rss_bytes": peak_rss_bytes(), "baseline_rss_bytes": baseline_rss})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    """Imprime la variación de archivos/s y MB/s de cada caso respecto a un JSON anterior."""
+    with open(baseline_path, "r") as f:
+        baseline = {(r["case"], r["mode"]): r for r in json.load(f)["results"]}
+    for result in results:
+        previous = baseline.get((result["case"], result["mode"]))
+        if not previous or not previous.get("files_per_sec") or not result.get("files_per_sec"):
+            continue
+        files_change = (result["files_per_sec"] / previous["files_per_sec"] - 1) * 100
+        line = (f"{result['case']:<18} {result['mode']:<18} {previous['files_per_sec']:>10.1f} -> "
+                f"{result['files_per_sec']:>10.1f} archivos/s ({files_change:+.1f}%)")
+        if previous.get("mb_per_sec") and result.get("mb_per_sec"):
+            mb_change = (result["mb_per_sec"] / previous["mb_per_sec"] - 1) * 100
+            line += f"  {previous['mb_per_sec']:>8.2f} -> {result['mb_per_sec']:>8.2f} MB/s ({mb_change:+.1f}%)"
+        print(line, file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de rendimiento de core.cleanup")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=8, help="Hilos del modo paralelo")
+    parser.add_argument("--case", action="append", help="Limita la ejecución a estos árboles")
+    parser.add_argument("--output", help="Archivo JSON de resultados (por defecto, salida estándar)")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior con el que comparar")
+    args = parser.parse_args(argv)
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for tree, mode in CASES:
+        if args.case and tree not in args.case:
+            continue
+        queue = context.Queue()
+        process = context.Process(target=run_case, args=(tree, mode, args.scale, args.seed, args.workers, queue))
+        process.start()
+        process.join()
+        if process.exitcode != 0 or queue.empty():
+            results.append({"case": tree, "mode": mode, "error": f"exit code {process.exitcode}"})
+            continue
+        results.append(queue.get())
+        print(f"{tree:<18} {mode:<18} {results[-1]['seconds']:>8.3f} s", file=sys.stderr)
+
+    report = {"commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+              "cpu_count": os.cpu_count(), "scale": args.scale, "seed": args.seed, "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
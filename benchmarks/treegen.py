@@ -0,0 +1,124 @@
+import os
+import random
+from pathlib import Path
+
+# Parámetros por escala: "small" para comprobaciones rápidas, "full" para medir de verdad y
+# "huge" para árboles de millones de archivos, donde se notan los costes por entrada
+SCALES = {
+    "small": {"tiny_files": 2000, "fanout": 50, "depth": 40, "huge_files": 2, "huge_size": 8 * 1024 * 1024,
+              "exclusions": 200, "profiles": 3, "profile_files": 200},
+    "full": {"tiny_files": 200000, "fanout": 500, "depth": 200, "huge_files": 3, "huge_size": 256 * 1024 * 1024,
+             "exclusions": 5000, "profiles": 8, "profile_files": 5000},
+    "huge": {"tiny_files": 2000000, "fanout": 2000, "depth": 200, "huge_files": 3, "huge_size": 1024 * 1024 * 1024,
+             "exclusions": 50000, "profiles": 8, "profile_files": 50000},
+}
+
+
+def _write(path, size, rng):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(rng.randbytes(size) if size else b"")
+
+
+def make_tiny_files(root, params, seed=0):
+    """Muchos archivos pequeños (0-4 KB) repartidos en ``fanout`` directorios."""
+    rng = random.Random(seed)
+    root = Path(root)
+    for i in range(params["tiny_files"]):
+        _write(root / f"d{i % params['fanout']:04d}" / f"f{i:07d}.tmp", rng.randint(0, 4096), rng)
+    return {}
+
+
+def make_deep_nesting(root, params, seed=0):
+    """Una cadena de ``depth`` directorios anidados con unos pocos archivos en cada nivel."""
+    rng = random.Random(seed)
+    current = Path(root)
+    for level in range(params["depth"]):
+        current = current / f"n{level:03d}"
+        for i in range(3):
+            _write(current / f"f{i}.dat", rng.randint(0, 1024), rng)
+    return {}
+
+
+def make_huge_files(root, params, seed=0):
+    """Unos pocos archivos grandes, escritos por bloques para no cargarlos en memoria."""
+    rng = random.Random(seed)
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    block = rng.randbytes(1024 * 1024)
+    for i in range(params["huge_files"]):
+        with open(root / f"huge{i}.bin", "wb") as f:
+            remaining = params["huge_size"]
+            while remaining > 0:
+                f.write(block[:min(len(block), remaining)])
+                remaining -= len(block)
+    return {}
+
+
+def make_heavy_exclusions(root, params, seed=0):
+    """Árbol de archivos pequeños con muchas exclusiones por ruta absoluta y por patrón."""
+    make_tiny_files(root, params, seed)
+    rng = random.Random(seed)
+    root = Path(root)
+    # Se eligen índices y no rutas para no construir la lista completa de archivos en memoria
+    chosen = rng.sample(range(params["tiny_files"]), min(params["exclusions"], params["tiny_files"]))
+    exclusions = [str(root / f"d{i % params['fanout']:04d}" / f"f{i:07d}.tmp") for i in chosen]
+    exclusions += ["desktop.ini", "thumbs.db", "*.keep", os.path.join("*", "d0001", "*.lock")]
+    return {"exclusions": exclusions}
+
+
+def make_browser_profiles(root, params, seed=0):
+    """Perfiles de Firefox, Chrome y Edge con la estructura de ``APPDATA`` / ``LOCALAPPDATA``."""
+    rng = random.Random(seed)
+    root = Path(root)
+    appdata = root / "AppData" / "Roaming"
+    localappdata = root / "AppData" / "Local"
+
+    firefox = appdata / "Mozilla" / "Firefox"
+    lines = []
+    for i in range(params["profiles"]):
+        lines += [f"[Profile{i}]", f"Name=p{i}", "IsRelative=1", f"Path=Profiles/p{i}.default", ""]
+        for j in range(params["profile_files"]):
+            _write(firefox / "Profiles" / f"p{i}.default" / "cache2" / "entries" / f"e{j:06d}",
+                   rng.randint(0, 8192), rng)
+        # La caché de arranque vive en la copia local del perfil
+        _write(localappdata / "Mozilla" / "Firefox" / "Profiles" / f"p{i}.default" / "startupCache" /
+               "startupCache.8.little", rng.randint(0, 65536), rng)
+    firefox.mkdir(parents=True, exist_ok=True)
+    (firefox / "profiles.ini").write_text("\n".join(lines))
+
+    for user_data in (localappdata / "Google" / "Chrome" / "User Data",
+                      localappdata / "Microsoft" / "Edge" / "User Data"):
+        names = ["Default"] + [f"Profile {i}" for i in range(1, params["profiles"])]
+        for name in names:
+            for j in range(params["profile_files"]):
+                _write(user_data / name / "Cache" / "Cache_Data" / f"f_{j:06d}", rng.randint(0, 8192), rng)
+                if j % 4 == 0:
+                    _write(user_data / name / "Code Cache" / "js" / f"c_{j:06d}", rng.randint(0, 16384), rng)
+            for cache in ("GPUCache", os.path.join("Service Worker", "CacheStorage", "ab12")):
+                _write(user_data / name / cache / "data_0", rng.randint(0, 8192), rng)
+    return {"env": {"APPDATA": str(appdata), "LOCALAPPDATA": str(localappdata)}}
+
+
+TREES = {
+    "tiny_files": make_tiny_files,
+    "deep_nesting": make_deep_nesting,
+    "huge_files": make_huge_files,
+    "heavy_exclusions": make_heavy_exclusions,
+    "browser_profiles": make_browser_profiles,
+}
+
+
+def build_tree(name, root, scale="small", seed=0):
+    """Genera el árbol ``name`` en ``root`` y devuelve sus datos extra (exclusiones, variables de entorno)."""
+    return TREES[name](root, SCALES[scale], seed)
+
+
+def tree_totals(root):
+    """Número de archivos y bytes del árbol, para calcular el rendimiento de cada caso."""
+    files = total = 0
+    for current, _, names in os.walk(root):
+        for name in names:
+            files += 1
+            total += os.path.getsize(os.path.join(current, name))
+    return files, total
@@ -0,0 +1,247 @@
+import os
+import gzip
+import uuid
+import shutil
+import sqlite3
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from core.config import app_directory
+
+# Tamaño de lectura para calcular el hash y comprimir sin cargar el archivo en memoria
+READ_SIZE = 1024 * 1024
+COMPRESS_LEVEL = 6
+# Filas del manifiesto que se acumulan antes de escribirlas en una transacción
+MANIFEST_BATCH = 1000
+
+MANIFEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT NOT NULL, blob TEXT NOT NULL, size INTEGER, mtime REAL);
+CREATE INDEX IF NOT EXISTS files_path ON files (path);
+CREATE TABLE IF NOT EXISTS totals (files INTEGER NOT NULL, bytes INTEGER NOT NULL);
+"""
+
+
+def default_backup_directory():
+    """Ruta del almacén de respaldos en la misma carpeta que el script de la aplicación."""
+    return os.path.join(app_directory(), "backup")
+
+
+def _read_chunks(f, throttle=None):
+    """Lee ``f`` por bloques de ``READ_SIZE``; ``throttle(bytes)`` se cobra con los bytes leídos.
+
+    La lectura vacía del final no se cobra, así que un archivo pequeño solo gasta lo que ocupa.
+    """
+    while True:
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            return
+        if throttle is not None:
+            throttle(len(chunk))
+        yield chunk
+
+
+def hash_file(file_path, throttle=None):
+    """Calcula el SHA-256 del contenido del archivo leyéndolo por bloques."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in _read_chunks(f, throttle):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BackupRun:
+    """Una ejecución de respaldo: guarda blobs en el almacén y anota ruta → blob en su manifiesto.
+
+    El manifiesto es una base SQLite por ejecución con un índice por ruta; las filas se
+    insertan por lotes. Al cerrar la ejecución se guardan sus totales en la tabla ``totals``.
+    """
+
+    def __init__(self, store, run_id):
+        self.store = store
+        self.run_id = run_id
+        self.manifest_path = store.manifest_path(run_id)
+        self._lock = threading.Lock()
+        self._manifest = sqlite3.connect(self.manifest_path, check_same_thread=False)
+        self._manifest.executescript(MANIFEST_SCHEMA)
+        self._pending = []
+        self.closed = False
+        self.files = 0
+        self.bytes = 0
+        self.new_blobs = 0
+
+    def add(self, file_path, throttle=None):
+        """Respalda el archivo y devuelve el hash de su contenido.
+
+        Si el contenido ya está en el almacén no se vuelve a escribir. ``throttle(bytes)`` limita
+        el ritmo de las lecturas y escrituras.
+        """
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        blob = hash_file(file_path, throttle)
+        created = self.store.put_blob(blob, file_path, throttle)
+        with self._lock:
+            self._pending.append((str(file_path), blob, stat.st_size, stat.st_mtime))
+            if len(self._pending) >= MANIFEST_BATCH:
+                self._flush()
+            self.files += 1
+            self.bytes += stat.st_size
+            self.new_blobs += created
+        return blob
+
+    def _flush(self):
+        if self._pending:
+            with self._manifest:
+                self._manifest.executemany("INSERT INTO files VALUES (?, ?, ?, ?)", self._pending)
+            self._pending = []
+
+    def close(self):
+        with self._lock:
+            if not self.closed:
+                self._flush()
+                with self._manifest:
+                    self._manifest.execute("DELETE FROM totals")
+                    self._manifest.execute("INSERT INTO totals VALUES (?, ?)", (self.files, self.bytes))
+                self._manifest.close()
+                self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BackupStore:
+    """Almacén de respaldos direccionado por contenido.
+
+    Cada contenido distinto se guarda una sola vez, comprimido con gzip, en
+    ``blobs/<2 primeros caracteres del hash>/<hash>.gz``; cada ejecución tiene su manifiesto
+    ``runs/<run_id>.sqlite`` con la ruta original, el hash, el tamaño y la fecha de modificación.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.blobs_dir = self.root / "blobs"
+        self.runs_dir = self.root / "runs"
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.runs_dir.mkdir(parents=True, exist_ok=True)
+
+    def manifest_path(self, run_id):
+        return self.runs_dir / f"{run_id}.sqlite"
+
+    def begin_run(self):
+        run_id = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{uuid.uuid4().hex[:4]}"
+        return BackupRun(self, run_id)
+
+    def blob_path(self, blob):
+        return self.blobs_dir / blob[:2] / f"{blob}.gz"
+
+    def put_blob(self, blob, file_path, throttle=None):
+        """Comprime el archivo en el blob ``blob`` si aún no existe. Devuelve ``True`` si lo creó."""
+        target = self.blob_path(blob)
+        if target.exists():
+            return False
+        target.parent.mkdir(exist_ok=True)
+        temp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(file_path, "rb") as src, gzip.open(temp_path, "wb", compresslevel=COMPRESS_LEVEL) as dst:
+                if throttle is None:
+                    shutil.copyfileobj(src, dst, READ_SIZE)
+                else:
+                    for chunk in _read_chunks(src, throttle):
+                        dst.write(chunk)
+            os.replace(temp_path, target)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        return True
+
+    def open_blob(self, blob):
+        """Abre el contenido descomprimido de un blob para lectura."""
+        return gzip.open(self.blob_path(blob), "rb")
+
+    def list_runs(self):
+        """Devuelve los identificadores de ejecución, del más antiguo al más reciente."""
+        return sorted(path.stem for path in self.runs_dir.glob("*.sqlite"))
+
+    def open_manifest(self, run_id):
+        """Abre el manifiesto de una ejecución en modo solo lectura."""
+        path = self.manifest_path(run_id)
+        if not path.exists():
+            raise FileNotFoundError(f"No existe la ejecución de respaldo {run_id}")
+        connection = sqlite3.connect(f"{path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def run_totals(self, run_id):
+        """Devuelve ``(archivos, bytes)`` de una ejecución sin recorrer su manifiesto.
+
+        Una ejecución que no llegó a cerrarse (proceso interrumpido) no tiene totales guardados
+        y se cuentan sus filas.
+        """
+        connection = self.open_manifest(run_id)
+        try:
+            row = connection.execute("SELECT files, bytes FROM totals").fetchone()
+            if row is None:
+                row = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM files").fetchone()
+            return row[0], row[1]
+        finally:
+            connection.close()
+
+    def iter_manifest(self, run_id, query="SELECT path, blob, size, mtime FROM files", params=()):
+        connection = self.open_manifest(run_id)
+        try:
+            yield from connection.execute(query, params)
+        finally:
+            connection.close()
+
+    def _blob_sizes(self):
+        sizes = {}
+        for shard in os.scandir(self.blobs_dir):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".gz"):
+                    sizes[entry.name[:-3]] = entry.stat().st_size
+        return sizes
+
+    def apply_retention(self, keep_runs=None, max_bytes=None):
+        """Elimina las ejecuciones más antiguas y los blobs que dejan de estar referenciados.
+
+        Se conservan como mucho ``keep_runs`` ejecuciones y se siguen eliminando ejecuciones
+        antiguas mientras los blobs ocupen más de ``max_bytes``; la más reciente nunca se borra.
+        Devuelve ``(ejecuciones_eliminadas, bytes_liberados)``.
+        """
+        runs = self.list_runs()
+        references = {run_id: {row["blob"] for row in self.iter_manifest(run_id, "SELECT DISTINCT blob FROM files")}
+                      for run_id in runs}
+        refcounts = {}
+        for blobs in references.values():
+            for blob in blobs:
+                refcounts[blob] = refcounts.get(blob, 0) + 1
+
+        sizes = self._blob_sizes()
+        total = sum(sizes.values())
+        removed_runs = []
+        while len(runs) > 1 and ((keep_runs is not None and len(runs) > keep_runs) or
+                                 (max_bytes is not None and total > max_bytes)):
+            run_id = runs.pop(0)
+            removed_runs.append(run_id)
+            for blob in references.pop(run_id):
+                refcounts[blob] -= 1
+                if refcounts[blob] == 0:
+                    total -= sizes.get(blob, 0)
+
+        for run_id in removed_runs:
+            self.manifest_path(run_id).unlink()
+
+        freed = 0
+        for blob, size in sizes.items():
+            if refcounts.get(blob, 0) == 0:
+                try:
+                    self.blob_path(blob).unlink()
+                    freed += size
+                except FileNotFoundError:
+                    pass
+        return removed_runs, freed
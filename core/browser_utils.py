@@ -1,106 +1,116 @@
-import os
 import subprocess
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 from core.cleanup import delete_files_in_directory, log_message
+from core.processes import ProcessSnapshot, terminate_processes, TERMINATE_TIMEOUT
+from core.profiles import registry
+
+
+# Nombres de los procesos de cada navegador en Windows, Linux y macOS
+BROWSER_PROCESSES = {
+    "Edge": ("msedge.exe", "msedge", "Microsoft Edge"),
+    "Chrome": ("chrome.exe", "chrome", "Google Chrome"),
+    "Firefox": ("firefox.exe", "firefox", "firefox-bin"),
+    "Safari": ("safari.exe", "Safari"),
+}
+
+# Número máximo de cachés que se limpian a la vez
+BROWSER_WORKERS = 4
 
 
 def get_firefox_profiles():
     """Obtiene los perfiles de Firefox desde el archivo profiles.ini."""
-    profiles_ini_path = Path(os.getenv('APPDATA')) / 'Mozilla' / 'Firefox' / 'profiles.ini'
-    profiles = []
-    if profiles_ini_path.exists():
-        with open(profiles_ini_path, 'r') as file:
-            lines = file.readlines()
-            for line in lines:
-                if line.startswith('Path='):
-                    profile_path = Path(os.getenv('APPDATA')) / 'Mozilla' / 'Firefox' / line.strip().split('=', 1)[1]
-                    profiles.append(profile_path)
-    return profiles
+    return [profile.path for profile in registry.profiles("Firefox")]
 
 
 def get_chrome_profiles():
     """Obtiene los perfiles de Chrome desde la ruta de usuario."""
-    user_data_path = Path(os.getenv('LOCALAPPDATA')) / 'Google' / 'Chrome' / 'User Data'
-    if user_data_path.exists():
-        profiles = [user_data_path / d for d in os.listdir(user_data_path) if
-                    Path(user_data_path / d).is_dir() and d.startswith('Profile ')]
-        profiles.append(user_data_path / 'Default')  # Default profile
-    else:
-        profiles = []
-    return profiles
+    return [profile.path for profile in registry.profiles("Chrome")]
 
 
 def get_edge_profiles():
     """Obtiene los perfiles de Edge desde la ruta de usuario."""
-    user_data_path = Path(os.getenv('LOCALAPPDATA')) / 'Microsoft' / 'Edge' / 'User Data'
-    if user_data_path.exists():
-        profiles = [user_data_path / d for d in os.listdir(user_data_path) if
-                    Path(user_data_path / d).is_dir() and d.startswith('Profile ')]
-        profiles.append(user_data_path / 'Default')  # Default profile
-    else:
-        profiles = []
-    return profiles
+    return [profile.path for profile in registry.profiles("Edge")]
 
 
-def close_browser_processes(browser_name):
+def get_browser_cache_paths(browsers=("Firefox", "Chrome", "Edge")):
+    """Devuelve ``(navegador, ruta)`` para cada caché existente de los navegadores indicados.
+
+    Los perfiles salen de ``core.profiles.registry``, que solo vuelve a leerlos si cambiaron.
     """
-    Cierra los procesos del navegador especificado.
+    return [(browser, cache_path) for browser in browsers
+            for profile in registry.profiles(browser) for cache_path in profile.cache_paths]
+
 
-    :param browser_name: Nombre del navegador cuyo proceso se debe cerrar.
+def close_browser_processes(browsers, snapshot=None, timeout=TERMINATE_TIMEOUT, gui_output=None):
+    """Cierra los procesos de los navegadores indicados (un nombre o una lista).
+
+    Se toma una sola instantánea de procesos (o se usa ``snapshot``) para todas las consultas y
+    los procesos encontrados se cierran en un único lote: primero de forma ordenada y, si
+    siguen abiertos tras ``timeout`` segundos, de forma forzada. Devuelve los navegadores que
+    estaban en ejecución.
     """
-    # Define los nombres de los procesos para diferentes navegadores
-    processes = {
-        "Edge": "msedge.exe",
-        "Chrome": "chrome.exe",
-        "Firefox": "firefox.exe",
-        "Safari": "safari.exe"
-    }
-
-    process_name = processes.get(browser_name)
-    if process_name:
-        try:
-            # Verificar si el proceso está en ejecución antes de intentar cerrarlo
-            result = subprocess.run(["tasklist", "/FI", f"IMAGENAME eq {process_name}"], capture_output=True, text=True)
-            if process_name in result.stdout:
-                subprocess.run(["taskkill", "/F", "/IM", process_name], check=True)
-                print(f"Proceso {process_name} cerrado exitosamente.")
-            else:
-                print(f"Proceso {process_name} no estaba en ejecución.")
-        except subprocess.CalledProcessError as e:
-            print(f"No se pudo cerrar el proceso {process_name}: {e}")
-    else:
-        print(f"Navegador {browser_name} no reconocido.")
-
-
-def clean_browser_cache(gui_output=None):
-    """Limpia la caché de los navegadores compatibles."""
-    # Cerrar procesos de navegadores antes de limpiar el caché
-    for browser in ["Firefox", "Chrome", "Edge"]:
-        close_browser_processes(browser)
-
-    firefox_profiles = get_firefox_profiles()
-    for profile in firefox_profiles:
-        cache_path = profile / 'cache2'
-        if cache_path.exists():
-            delete_files_in_directory(cache_path, [], False, None, gui_output)
-            log_message(f"Limpieza de caché de Firefox en {cache_path} completada.", gui_output)
-        else:
-            log_message(f"La caché de Firefox en {cache_path} no existe.", gui_output)
-
-    chrome_profiles = get_chrome_profiles()
-    for profile in chrome_profiles:
-        cache_path = profile / 'Cache'
-        if cache_path.exists():
-            delete_files_in_directory(cache_path, [], False, None, gui_output)
-            log_message(f"Limpieza de caché de Chrome en {cache_path} completada.", gui_output)
-        else:
-            log_message(f"La caché de Chrome en {cache_path} no existe.", gui_output)
-
-    edge_profiles = get_edge_profiles()
-    for profile in edge_profiles:
-        cache_path = profile / 'Cache'
-        if cache_path.exists():
-            delete_files_in_directory(cache_path, [], False, None, gui_output)
-            log_message(f"Limpieza de caché de Edge en {cache_path} completada.", gui_output)
+    if isinstance(browsers, str):
+        browsers = [browsers]
+    try:
+        snapshot = snapshot or ProcessSnapshot()
+    except (OSError, subprocess.SubprocessError) as e:
+        log_message(f"No se pudo obtener la lista de procesos: {e}", "WARNING", gui_output)
+        return []
+
+    running, processes = [], []
+    for browser in browsers:
+        names = BROWSER_PROCESSES.get(browser)
+        if names is None:
+            log_message(f"Navegador {browser} no reconocido.", "WARNING", gui_output)
+            continue
+        found = snapshot.find(names)
+        if found:
+            running.append(browser)
+            processes += found
         else:
-            log_message(f"La caché de Edge en {cache_path} no existe.", gui_output)
+            log_message(f"El navegador {browser} no estaba en ejecución.", "INFO", gui_output)
+    if not processes:
+        return running
+
+    closed, forced, failed = terminate_processes(processes, timeout)
+    log_message(f"Navegadores cerrados ({', '.join(running)}): {len(closed)} procesos cerrados, "
+                f"{len(forced)} forzados.", "INFO", gui_output)
+    if failed:
+        log_message(f"No se pudieron cerrar {len(failed)} procesos de navegador: "
+                    f"{', '.join(str(pid) for pid in sorted(failed))}", "ERROR", gui_output)
+    return running
+
+
+def _clean_cache(browser, cache_path, gui_output, progress, control, limiter):
+    stats = delete_files_in_directory(cache_path, [], False, None, gui_output, progress=progress, control=control,
+                                      limiter=limiter)
+    log_message(f"Limpieza de caché de {browser} en {cache_path} completada.", "INFO", gui_output)
+    return stats
+
+
+def clean_browser_cache(gui_output=None, progress=None, browsers=("Firefox", "Chrome", "Edge"),
+                        workers=BROWSER_WORKERS, close=True, control=None,
+                        limiter=None):
+    """Limpia la caché de los navegadores compatibles.
+
+    Las cachés de todos los perfiles (``CACHE_SUBPATHS``) se limpian a la vez en un pool de
+    como mucho ``workers`` hilos. Devuelve una lista ``(navegador, ruta, DeletionStats)`` con
+    cada caché limpiada, en el orden en que se encontraron. Con ``close`` se cierran antes los
+    navegadores con una sola consulta de procesos; ``control`` permite pausar o cancelar el borrado
+    y ``limiter`` limita su ritmo de E/S.
+    """
+    if close:
+        # Cerrar procesos de navegadores antes de limpiar el caché
+        close_browser_processes(browsers, gui_output=gui_output)
+
+    profiles = [profile for browser in browsers for profile in registry.profiles(browser)]
+    cache_paths = [(profile.browser, cache_path) for profile in profiles for cache_path in profile.cache_paths]
+    if not cache_paths:
+        log_message("No se encontraron cachés de navegadores para limpiar.", "INFO", gui_output)
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(cache_paths)))) as pool:
+        futures = [pool.submit(_clean_cache, browser, cache_path, gui_output, progress, control, limiter)
+                   for browser, cache_path in cache_paths]
+    for profile in profiles:
+        profile.invalidate()  # El tamaño de sus cachés cambió
+    return [(browser, cache_path, future.result()) for (browser, cache_path), future in zip(cache_paths, futures)]
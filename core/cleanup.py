@@ -1,9 +1,21 @@
 import os
 import sys
-import shutil
+import time
+import errno
 import logging
+import atexit
+import threading
+from queue import SimpleQueue
 from pathlib import Path
-from gui.utils import setup_backup_directory
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from core.exclusions import compile_exclusions
+from core.secure_overwrite import shred_file
+from core.backup_store import BackupStore, BackupRun
+from core.snapshot import open_snapshot, exclusions_fingerprint
+from core.policies import RetentionPolicy
+from core.storage import deletion_strategy
+from core.control import CleanupCancelled
 
 
 def resource_path(relative_path):
@@ -18,21 +30,55 @@ def resource_path(relative_path):
 
 
 # Configuración del log
-def configure_logging(log_file="cleaning_log.txt", level=logging.DEBUG):
-    logging.basicConfig(
-        filename=log_file,
-        level=level,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        filemode="a"
-    )
-    console_handler = logging.StreamHandler()
-    console_handler.setLevel(level)
-    formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-    console_handler.setFormatter(formatter)
-    logging.getLogger().addHandler(console_handler)
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+_log_listener = None
 
 
-configure_logging()
+def configure_logging(log_file="cleaning_log.txt", level=logging.DEBUG, console=True, queued=True):
+    """Configura el log en archivo y, opcionalmente, en consola.
+
+    Con ``queued`` los registros se encolan con un ``QueueHandler`` y un ``QueueListener``
+    escribe en los handlers reales desde su propio hilo, de modo que quien llama a
+    ``log_message`` nunca espera a la E/S del log.
+    """
+    global _log_listener
+    stop_logging()
+
+    formatter = logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(log_file, mode="a", encoding="utf-8")]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setLevel(level)
+        handler.setFormatter(formatter)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    if queued:
+        log_queue = SimpleQueue()
+        root_logger.addHandler(QueueHandler(log_queue))
+        _log_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _log_listener.start()
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
+
+
+def stop_logging():
+    """Vacía la cola del log y detiene el hilo que escribe los registros."""
+    global _log_listener
+    if _log_listener is None:
+        return
+    _log_listener.stop()
+    for handler in _log_listener.handlers:
+        handler.close()
+    for handler in logging.getLogger().handlers[:]:
+        if isinstance(handler, QueueHandler):
+            logging.getLogger().removeHandler(handler)
+    _log_listener = None
+
+
+atexit.register(stop_logging)
 
 
 def log_message(message, level="INFO", gui_output=None):
@@ -55,87 +101,672 @@ def log_message(message, level="INFO", gui_output=None):
         gui_output.see("end")
 
 
+class DeletionLogSummary:
+    """Agrupa los eventos por archivo en resúmenes periódicos por directorio.
+
+    En lugar de una línea de log por archivo eliminado se emite, cada ``interval`` segundos
+    y al terminar cada directorio, una línea con N archivos / M bytes por directorio.
+    """
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._last_flush = time.monotonic()
+
+    def add(self, file_path, size, gui_output=None):
+        directory = os.path.dirname(str(file_path))
+        with self._lock:
+            counts = self._pending.setdefault(directory, [0, 0])
+            counts[0] += 1
+            counts[1] += size
+            due = time.monotonic() - self._last_flush >= self.interval
+        if due:
+            self.flush(gui_output)
+
+    def flush(self, gui_output=None):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+        for directory, (files, size) in pending.items():
+            log_message(f"Eliminados {files} archivos ({size / (1024 * 1024):.2f} MB) en {directory}",
+                        "INFO", gui_output)
+
+
+_log_summary = None
+
+
+def set_log_summary(enabled, interval=5.0):
+    """Activa o desactiva el resumen periódico de archivos eliminados en lugar del log por archivo."""
+    global _log_summary
+    if _log_summary is not None:
+        _log_summary.flush()
+    _log_summary = DeletionLogSummary(interval) if enabled else None
+
+
+def log_deleted(message, file_path, size=0, gui_output=None):
+    """Registra la eliminación de un archivo, de forma individual o dentro del resumen activo."""
+    if _log_summary is not None:
+        _log_summary.add(file_path, size, gui_output)
+    else:
+        log_message(message, "INFO", gui_output)
+
+
+def flush_log_summary(gui_output=None):
+    if _log_summary is not None:
+        _log_summary.flush(gui_output)
+
+
 def expand_environment_variables(path):
     """Expande variables de entorno en la ruta especificada."""
     return os.path.expandvars(path)
 
 
-def secure_delete(file_path, passes=3, gui_output=None):
-    """Realiza una eliminación segura del archivo sobrescribiéndolo varias veces."""
+def secure_delete(file_path, passes=3, gui_output=None, pattern="random", throttle=None):
+    """Realiza una eliminación segura del archivo sobrescribiéndolo varias veces.
+
+    La sobrescritura se hace por bloques con un búfer fijo (``core.secure_overwrite``), con
+    ``fsync`` entre pasadas; ``pattern`` puede ser ``zeros``, ``ones``, ``random`` o ``dod``.
+    ``throttle(bytes)`` se llama antes de cada escritura (``core.ratelimit``).
+    """
     try:
         if not os.path.exists(file_path):
             log_message(f"El archivo {file_path} no existe para eliminación segura.", "WARNING", gui_output)
-            return
-
-        with open(file_path, "ba+") as f:
-            length = f.tell()
+            return False
 
-        with open(file_path, "br+") as f:
-            for _ in range(passes):
-                f.seek(0)
-                f.write(os.urandom(length))
-
-        os.remove(file_path)
-        log_message(f"Eliminación segura: {file_path}", "INFO", gui_output)
+        length, written, elapsed = shred_file(file_path, pattern, passes, throttle=throttle)
+        speed = written / elapsed / (1024 * 1024) if elapsed else 0.0
+        log_deleted(f"Eliminación segura: {file_path} ({speed:.2f} MB/s)", file_path, length, gui_output)
+        return True
     except PermissionError:
         log_message(f"Acceso denegado al archivo {file_path}. Intenta ejecutar como administrador.", "ERROR", gui_output)
     except Exception as e:
         log_message(f"Error en la eliminación segura de {file_path}: {e}", "ERROR", gui_output)
+    return False
+
+
+def open_backup_run(backup_directory):
+    """Devuelve un ``BackupRun`` para ``backup_directory`` (ruta del almacén o ejecución ya abierta)."""
+    if backup_directory is None or isinstance(backup_directory, BackupRun):
+        return backup_directory
+    return BackupStore(backup_directory).begin_run()
 
 
-def backup_and_delete(file_path, backup_directory, gui_output=None):
-    """Copia el archivo al directorio de respaldo y luego lo elimina."""
+def backup_and_delete(file_path, backup_directory, gui_output=None, size=None, throttle=None):
+    """Guarda el archivo en el almacén de respaldos y luego lo elimina.
+
+    El contenido se guarda una sola vez y comprimido (``core.backup_store``); ``backup_directory``
+    puede ser la ruta del almacén o un ``BackupRun`` abierto. ``throttle(bytes)`` limita el
+    ritmo de la copia y del borrado (``core.ratelimit``).
+    """
+    backup_run = None
     try:
-        backup_path = Path(backup_directory) / file_path.relative_to(file_path.anchor)
-        backup_path.parent.mkdir(parents=True, exist_ok=True)  # Crear directorios necesarios
-        shutil.copy2(file_path, backup_path)  # Copia el archivo al directorio de respaldo
-        log_message(f"Respaldo creado: {backup_path}", "INFO", gui_output)
+        file_path = Path(file_path)
+        if size is None:
+            size = file_path.stat().st_size
+        backup_run = open_backup_run(backup_directory)
+        blob = backup_run.add(file_path, throttle)  # Respalda el contenido en el almacén
 
+        if throttle is not None:
+            throttle(0)
         file_path.unlink()  # Luego de copiar, eliminar el archivo original
-        log_message(f"Eliminado: {file_path}", "INFO", gui_output)
+        log_deleted(f"Eliminado: {file_path} (respaldo {blob[:12]})", file_path, size, gui_output)
+        return True
     except Exception as e:
         log_message(f"No se pudo respaldar o eliminar {file_path}: {e}", "ERROR", gui_output)
+    finally:
+        if backup_run is not None and backup_run is not backup_directory:
+            backup_run.close()
+    return False
 
 
-def delete_files_in_directory(directory, exclusions=None, secure=False, backup_directory=None, gui_output=None):
-    """Elimina archivos y directorios en la ruta especificada, con opciones para exclusión, copia de seguridad y eliminación segura."""
-    directory = expand_environment_variables(directory)
-    exclusions = exclusions or []
+class DeletionStats:
+    """Contadores agregados de una ejecución de borrado, seguros entre hilos."""
 
-    if not os.path.exists(directory):
-        log_message(f"El directorio {directory} no existe.", "WARNING", gui_output)
-        return
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.files = 0
+        self.bytes = 0
+        self.directories = 0
+        self.errors = 0
+        self.skipped = 0
+        self.excluded = 0
+        self.cancelled = False
+        self.error_types = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
 
-    exclusions = [os.path.normpath(expand_environment_variables(excl)) for excl in exclusions]
+    def add_file(self, size):
+        with self._lock:
+            self.files += 1
+            self.bytes += size
 
-    for root, subdirs, files in os.walk(directory):
-        files = [f for f in files if Path(root) / f not in exclusions]
-        subdirs[:] = [d for d in subdirs if Path(root) / d not in exclusions]
+    def add_directory(self):
+        with self._lock:
+            self.directories += 1
 
-        for file in files:
-            file_path = Path(root) / file
-            try:
-                if backup_directory:
-                    backup_and_delete(file_path, backup_directory, gui_output)
-                elif secure:
-                    secure_delete(file_path, gui_output=gui_output)
-                else:
-                    file_path.unlink()  # Eliminar sin respaldo
-                    log_message(f"Eliminado: {file_path}", "INFO", gui_output)
-            except FileNotFoundError:
-                log_message(f"El archivo {file_path} no se encontró.", "WARNING", gui_output)
-            except Exception as e:
-                log_message(f"No se pudo eliminar {file_path}: {e}", "ERROR", gui_output)
-
-        for subdir in subdirs:
-            subdir_path = Path(root) / subdir
+    def add_error(self, error=None):
+        """Cuenta un error; ``error`` es la excepción o el nombre del tipo de error."""
+        kind = error if isinstance(error, str) else type(error).__name__ if error is not None else "Error"
+        with self._lock:
+            self.errors += 1
+            self.error_types[kind] = self.error_types.get(kind, 0) + 1
+
+    def add_skipped(self):
+        with self._lock:
+            self.skipped += 1
+
+    def add_excluded(self):
+        with self._lock:
+            self.excluded += 1
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    @property
+    def files_per_sec(self):
+        return self.files / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def bytes_per_sec(self):
+        return self.bytes / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self):
+        return {"files": self.files, "bytes": self.bytes, "directories": self.directories, "errors": self.errors,
+                "skipped": self.skipped, "excluded": self.excluded, "error_types": dict(self.error_types),
+                "elapsed": round(self.elapsed, 3),
+                "files_per_sec": round(self.files_per_sec, 1), "bytes_per_sec": round(self.bytes_per_sec, 1)}
+
+    def summary(self):
+        return (f"{self.files} archivos y {self.directories} directorios eliminados "
+                f"({self.bytes / (1024 * 1024):.2f} MB) en {self.elapsed:.2f} s: "
+                f"{self.files_per_sec:.0f} archivos/s, {self.bytes_per_sec / (1024 * 1024):.2f} MB/s, "
+                f"{self.skipped} conservados por política, {self.excluded} excluidos, {self.errors} errores")
+
+
+# Número de archivos que cada tarea del pool procesa de una vez
+FILE_BATCH_SIZE = 256
+
+
+class DeletionJob:
+    """Opciones y estado compartidos por los recorridos de una llamada a ``delete_files_in_directory``."""
+
+    def __init__(self, matcher, secure, backup_run, gui_output, stats, snapshot=None, policy=None, progress=None,
+                 locality=False, control=None, journal=None, limiter=None, root=None):
+        self.matcher = matcher
+        self.policy = policy
+        self.secure = secure
+        self.backup_run = backup_run
+        self.gui_output = gui_output
+        self.stats = stats
+        self.snapshot = snapshot
+        self.progress = progress
+        # Borrar en orden de inodo para seguir la ubicación en disco (discos giratorios)
+        self.locality = locality
+        self.control = control
+        self.journal = journal
+        self.limiter = limiter
+        # Presupuesto de E/S del objetivo, resuelto una sola vez; sin objetivo, el del último directorio
+        self.budget = limiter.device(root) if limiter is not None and root is not None else None
+        self._last_budget = (None, None)
+        self._lock = threading.Lock()
+        # Directorios con algún error: no se marcan como limpios en la instantánea
+        self.dirty = set()
+
+    def mark_dirty(self, directory):
+        with self._lock:
+            self.dirty.add(os.path.normpath(str(directory)))
+
+    def checkpoint(self):
+        """Espera mientras la ejecución está en pausa y lanza ``CleanupCancelled`` si se canceló."""
+        if self.control is not None:
+            self.control.checkpoint()
+
+    def throttle(self, file_path):
+        """Función que consume del presupuesto de E/S del dispositivo de ``file_path``, o ``None`` sin límites."""
+        limiter = self.limiter
+        if limiter is None or not limiter.active:
+            return None
+        if self.budget is not None:
+            return self.budget.acquire
+        directory = os.path.dirname(str(file_path))
+        last_directory, budget = self._last_budget
+        if directory != last_directory:
+            budget = limiter.device(directory)
+            self._last_budget = (directory, budget)
+        return budget.acquire
+
+    def record_directory(self, directory, subdirs):
+        """Anota en el diario un directorio procesado sin errores y los subdirectorios (nombres) por recorrer."""
+        if self.journal is not None and os.path.normpath(str(directory)) not in self.dirty:
+            self.journal.record_directory(directory, subdirs)
+
+
+def _delete_file(job, file_path, size, dir_fd=None, link=None):
+    """Elimina un archivo según el modo configurado y actualiza las estadísticas. Devuelve si lo eliminó.
+
+    Con ``dir_fd`` (descriptor del directorio que lo contiene) el borrado simple se hace
+    relativo al directorio, sin resolver de nuevo la ruta completa. Los enlaces simbólicos
+    siempre se eliminan sin más: respaldarlos o sobrescribirlos afectaría a su destino.
+    ``link`` indica si lo es, cuando ya se sabe por el listado del directorio.
+    """
+    gui_output = job.gui_output
+    throttle = job.throttle(file_path)
+    try:
+        if link is None:
+            link = bool(job.backup_run or job.secure) and os.path.islink(file_path)
+        if job.backup_run and not link:
+            deleted = backup_and_delete(file_path, job.backup_run, gui_output, size, throttle)
+        elif job.secure and not link:
+            pattern = job.secure if isinstance(job.secure, str) else "random"
+            deleted = secure_delete(file_path, gui_output=gui_output, pattern=pattern, throttle=throttle)
+        else:
+            if throttle is not None:
+                throttle(0)
+            if dir_fd is not None:
+                os.unlink(os.path.basename(file_path), dir_fd=dir_fd)  # Eliminar sin respaldo
+            else:
+                os.unlink(file_path)
+            log_deleted(f"Eliminado: {file_path}", file_path, size, gui_output)
+            deleted = True
+        if deleted:
+            job.stats.add_file(size)
+            if job.progress is not None:
+                job.progress.advance(size)
+            return True
+        job.stats.add_error("BackupError" if job.backup_run else "SecureDeleteError")
+    except FileNotFoundError:
+        log_message(f"El archivo {file_path} no se encontró.", "WARNING", gui_output)
+        return True
+    except Exception as e:
+        job.stats.add_error(e)
+        log_message(f"No se pudo eliminar {file_path}: {e}", "ERROR", gui_output)
+    job.mark_dirty(os.path.dirname(file_path))
+    return False
+
+
+def _list_directory(job, directory, node, fd=None):
+    """Devuelve los archivos ``(nombre, tamaño, es_enlace)`` y subdirectorios ``(nombre, nodo)`` no excluidos.
+
+    Con ``fd`` el directorio se lista a través de su descriptor. Si ya se procesó en una
+    ejecución interrumpida que se está retomando, o en modo incremental si no cambió desde la
+    última limpieza, no se lista: no tiene archivos nuevos y sus subdirectorios son los
+    guardados en el diario o en la instantánea.
+    """
+    matcher = job.matcher
+    job.checkpoint()
+    if job.journal is not None:
+        pending = job.journal.completed_subdirs(directory)
+        if pending is not None:
+            return [], [(name, matcher.child(node, name)) for name in pending]
+    if job.snapshot is not None:
+        unchanged = job.snapshot.unchanged_subdirs(directory)
+        if unchanged is not None:
+            return [], [(name, matcher.child(node, name)) for name in unchanged]
+
+    files, subdirs, inodes = [], [], {}
+    with os.scandir(directory if fd is None else fd) as entries:
+        for entry in entries:
+            name = entry.name
+            if matcher.matches(node, name, os.path.join(directory, name)):
+                job.stats.add_excluded()
+                if entry.is_dir(follow_symlinks=False):
+                    log_message(f"Directorio {os.path.join(directory, name)} excluido de la eliminación.", "INFO",
+                                job.gui_output)
+                continue
             try:
-                if subdir_path not in exclusions:
-                    shutil.rmtree(subdir_path)
-                    log_message(f"Eliminado: {subdir_path}", "INFO", gui_output)
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append((name, matcher.child(node, name)))
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+            except OSError:
+                files.append((name, 0, None))
+                continue
+            if job.policy is not None and not job.policy.allows(name, stat.st_size, stat.st_mtime):
+                # Se conserva por ahora; puede cumplir la política más adelante
+                job.stats.add_skipped()
+                job.mark_dirty(directory)
+                continue
+            files.append((name, stat.st_size, entry.is_symlink()))
+            if job.locality:
+                inodes[name] = entry.inode()
+    if job.locality:
+        files.sort(key=lambda item: inodes.get(item[0], 0))
+    return files, subdirs
+
+
+def _record_snapshot(job, directory, kept):
+    """Guarda en la instantánea los directorios que quedaron limpios tras la ejecución."""
+    if job.snapshot is None:
+        return
+    children = {os.path.normpath(directory): []}
+    for subdir_path in kept:
+        children.setdefault(os.path.normpath(subdir_path), [])
+    for subdir_path in kept:
+        parent = children.get(os.path.dirname(os.path.normpath(subdir_path)))
+        if parent is not None:
+            parent.append(os.path.basename(subdir_path))
+    for path, subdirs in children.items():
+        if path not in job.dirty:
+            job.snapshot.record(path, subdirs)
+    job.snapshot.save()
+
+
+# Borrado relativo a descriptores de directorio donde el sistema lo permite (no en Windows)
+_USE_DIR_FD = ({os.open, os.unlink, os.rmdir} <= os.supports_dir_fd and os.scandir in os.supports_fd)
+_OPEN_DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_NOFOLLOW", 0)
+
+
+class _DirectoryFrame:
+    """Directorio abierto durante el recorrido en postorden.
+
+    Guarda su descriptor, los subdirectorios pendientes y los que se conservan. En el
+    recorrido en paralelo guarda también su padre y cuántas tareas de su subárbol faltan.
+    """
+
+    __slots__ = ("path", "name", "fd", "subdirs", "descended", "parent", "pending")
+
+    def __init__(self, path, name, fd, parent=None):
+        self.path = path
+        self.name = name
+        self.fd = fd
+        self.subdirs = []
+        self.descended = []
+        self.parent = parent
+        self.pending = 1  # Su propio listado
+
+
+def _open_directory(path, name, parent_fd):
+    """Descriptor del directorio ``path`` (por ``name`` relativo a ``parent_fd`` si lo hay), o ``None`` sin descriptores."""
+    if not _USE_DIR_FD:
+        return None
+    try:
+        return os.open(path if parent_fd is None else name, _OPEN_DIR_FLAGS, dir_fd=parent_fd)
+    except OSError as e:
+        if e.errno in (errno.EMFILE, errno.ENFILE):
+            return None  # Sin descriptores libres (árboles muy profundos): este subárbol sigue con rutas
+        raise
+
+
+def _enter_directory(job, path, name, node, parent_fd):
+    """Abre y lista un directorio y elimina sus archivos; devuelve su ``_DirectoryFrame`` o ``None`` si falla."""
+    fd = None
+    try:
+        fd = _open_directory(path, name, parent_fd)
+        files, subdirs = _list_directory(job, path, node, fd)
+    except OSError as e:
+        if fd is not None:
+            os.close(fd)
+        job.stats.add_error(e)
+        job.mark_dirty(os.path.dirname(path) if name else path)
+        log_message(f"No se pudo recorrer {path}: {e}", "ERROR", job.gui_output)
+        return None
+    frame = _DirectoryFrame(path, name, fd)
+    try:
+        for file_name, size, link in files:
+            job.checkpoint()
+            _delete_file(job, os.path.join(path, file_name), size, fd, link)
+    except BaseException:
+        if fd is not None:
+            os.close(fd)
+        raise
+    # Se invierte para recorrer los subdirectorios en el orden del listado
+    frame.subdirs = subdirs[::-1]
+    return frame
+
+
+def _leave_directory(job, frame, parent, kept):
+    """Cierra el directorio ya recorrido y lo elimina si quedó vacío; si no, lo anota en ``kept``."""
+    if frame.fd is not None:
+        os.close(frame.fd)
+        frame.fd = None
+    job.record_directory(frame.path, frame.descended)
+    if parent is None:
+        return  # La raíz del objetivo se conserva
+    try:
+        if parent.fd is not None:
+            os.rmdir(frame.name, dir_fd=parent.fd)
+        else:
+            os.rmdir(frame.path)
+        job.stats.add_directory()
+        log_message(f"Eliminado: {frame.path}", "INFO", job.gui_output)
+    except FileNotFoundError:
+        log_message(f"El directorio {frame.path} no se encontró.", "WARNING", job.gui_output)
+    except OSError as e:
+        kept.append(frame.path)
+        parent.descended.append(frame.name)
+        if e.errno not in (errno.ENOTEMPTY, errno.EEXIST):
+            # Un directorio que no está vacío se conserva a propósito (exclusiones o política)
+            job.stats.add_error(e)
+            job.mark_dirty(parent.path)
+            log_message(f"No se pudo eliminar {frame.path}: {e}", "ERROR", job.gui_output)
+
+
+def _list_frame(job, frame, node, opened):
+    """Tarea del pool: abre el directorio de ``frame`` relativo al de su padre y lo lista.
+
+    El directorio se anota en ``opened`` hasta que se cierra, para cerrarlo aunque la
+    ejecución se cancele.
+    """
+    parent_fd = frame.parent.fd if frame.parent is not None else None
+    frame.fd = _open_directory(frame.path, frame.name, parent_fd)
+    if frame.fd is not None:
+        opened.add(frame)
+    return _list_directory(job, frame.path, node, frame.fd)
+
+
+def _delete_batch(job, frame, batch):
+    """Tarea del pool: elimina un lote de archivos del directorio de ``frame``."""
+    for name, size, link in batch:
+        job.checkpoint()
+        _delete_file(job, os.path.join(frame.path, name), size, frame.fd, link)
+
+
+def _delete_tree_parallel(job, directory, workers):
+    """Recorre el árbol en un pool de hilos que listan directorios y eliminan lotes de archivos.
+
+    Es el mismo recorrido en postorden que el secuencial, repartido entre hilos: cada
+    directorio se abre relativo al descriptor de su padre y se lista una sola vez, sus
+    archivos se eliminan por lotes relativos a su descriptor y, en cuanto terminan sus lotes
+    y todo su subárbol, se anota en el diario y se elimina con ``rmdir`` (si quedó vacío)
+    relativo al padre. Los directorios se listan en profundidad y como mucho ``workers`` a la
+    vez, así que los abiertos a medio procesar no crecen con el ancho del árbol.
+    """
+    kept = []
+    opened = set()  # Directorios abiertos: se cierran aquí si el recorrido no termina
+    unlisted = [(_DirectoryFrame(directory, "", None), job.matcher.node(directory))]
+    tasks = {}
+    listing = 0
+
+    def release(frame):
+        # Termina una tarea del directorio; con la última se cierra y se libera la del padre
+        while frame is not None:
+            frame.pending -= 1
+            if frame.pending:
+                return
+            _leave_directory(job, frame, frame.parent, kept)
+            opened.discard(frame)
+            frame = frame.parent
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while unlisted or tasks:
+                while unlisted and listing < workers:
+                    frame, node = unlisted.pop()
+                    tasks[pool.submit(_list_frame, job, frame, node, opened)] = (frame, True)
+                    listing += 1
+                done, _ = wait(tasks, return_when=FIRST_COMPLETED)
+                for future in done:
+                    frame, is_listing = tasks.pop(future)
+                    listing -= is_listing
+                    try:
+                        result = future.result()
+                    except CleanupCancelled:
+                        for pending in tasks:
+                            pending.cancel()
+                        raise
+                    except Exception as e:
+                        job.stats.add_error(e)
+                        if not is_listing:
+                            job.mark_dirty(frame.path)
+                            log_message(f"No se pudo eliminar un lote de {frame.path}: {e}", "ERROR", job.gui_output)
+                            release(frame)
+                            continue
+                        if frame.fd is not None:
+                            os.close(frame.fd)
+                            frame.fd = None
+                            opened.discard(frame)
+                        parent = frame.parent
+                        job.mark_dirty(frame.path if parent is None else parent.path)
+                        log_message(f"No se pudo recorrer {frame.path}: {e}", "ERROR", job.gui_output)
+                        if parent is not None:
+                            parent.descended.append(frame.name)
+                            release(parent)
+                        continue
+                    if is_listing:
+                        files, subdirs = result
+                        for start in range(0, len(files), FILE_BATCH_SIZE):
+                            tasks[pool.submit(_delete_batch, job, frame,
+                                              files[start:start + FILE_BATCH_SIZE])] = (frame, False)
+                            frame.pending += 1
+                        for name, node in reversed(subdirs):
+                            unlisted.append((_DirectoryFrame(os.path.join(frame.path, name), name, None, frame), node))
+                            frame.pending += 1
+                    release(frame)
+    finally:
+        # Con una cancelación o un error quedan directorios abiertos
+        for frame in opened:
+            if frame.fd is not None:
+                os.close(frame.fd)
+                frame.fd = None
+
+    _record_snapshot(job, directory, kept)
+
+
+def _delete_tree_sequential(job, directory):
+    """Recorre el árbol una sola vez en postorden y elimina cada entrada al pasar por ella.
+
+    Cada directorio se lista una vez con ``os.scandir``; sus archivos se eliminan en ese
+    momento (con el modo configurado: respaldo, sobrescritura segura o borrado simple) y el
+    directorio se elimina con ``rmdir`` en cuanto se termina su subárbol, si quedó vacío. Las
+    exclusiones y la política se aplican a todos los niveles. Donde el sistema lo permite,
+    ``unlink``, ``rmdir`` y la apertura de subdirectorios son relativos al descriptor del
+    directorio padre, sin resolver la ruta completa ni seguir enlaces simbólicos.
+    """
+    kept = []  # Subdirectorios que se conservan: contienen entradas excluidas o conservadas
+    root = _enter_directory(job, directory, "", job.matcher.node(directory), None)
+    stack = [(root, None)] if root is not None else []
+    try:
+        while stack:
+            frame, parent = stack[-1]
+            if frame.subdirs:
+                name, node = frame.subdirs.pop()
+                job.checkpoint()
+                child = _enter_directory(job, os.path.join(frame.path, name), name, node, frame.fd)
+                if child is None:
+                    frame.descended.append(name)
                 else:
-                    log_message(f"Directorio {subdir_path} excluido de la eliminación.", "INFO", gui_output)
-            except FileNotFoundError:
-                log_message(f"El directorio {subdir_path} no se encontró.", "WARNING", gui_output)
-            except Exception as e:
-                log_message(f"No se pudo eliminar {subdir_path}: {e}", "ERROR", gui_output)
\ No newline at end of file
+                    stack.append((child, frame))
+                continue
+            stack.pop()
+            _leave_directory(job, frame, parent, kept)
+    finally:
+        # Con una cancelación quedan directorios abiertos
+        for frame, _ in stack:
+            if frame.fd is not None:
+                os.close(frame.fd)
+
+    _record_snapshot(job, directory, kept)
+
+
+def delete_files_in_directory(directory, exclusions=None, secure=False, backup_directory=None, gui_output=None,
+                              workers=1, incremental=False, policy=None, progress=None, control=None, journal=None,
+                              limiter=None):
+    """Elimina archivos y directorios en la ruta especificada, con opciones para exclusión, copia de seguridad y eliminación segura.
+
+    ``secure`` puede ser ``True`` (sobrescritura aleatoria) o el nombre de un patrón de
+    ``core.secure_overwrite.PASS_PATTERNS``. ``backup_directory`` puede ser la ruta de un
+    almacén de respaldos o un ``BackupRun`` ya abierto para compartirlo entre varias llamadas.
+    Con ``workers`` mayor que 1 el recorrido y el borrado se reparten en un pool de hilos; con
+    ``"auto"`` se elige según el medio (``core.storage``): muchos hilos en SSD/NVMe y recorrido
+    secuencial en orden de inodo en discos giratorios.
+    Con ``incremental`` (``True`` o el directorio de instantáneas) se guarda el estado de los
+    directorios que quedan y en la siguiente ejecución no se vuelven a listar los que no cambiaron.
+    ``policy`` (``RetentionPolicy`` o su configuración) limita qué archivos se eliminan por
+    antigüedad, tamaño o extensión.
+    ``progress`` (``core.progress.ProgressTracker``) recibe el avance ponderado por bytes.
+    ``control`` (``core.control.RunControl``) permite pausar o cancelar el borrado entre archivos
+    y ``journal`` (``core.journal.RunJournal``) anota los directorios procesados para poder
+    retomar una ejecución interrumpida; en ese caso el objetivo se marca como completado al final.
+    ``limiter`` (``core.ratelimit.RateLimiter``) limita los bytes y operaciones por segundo de
+    cada dispositivo.
+    Devuelve un ``DeletionStats`` con los totales de la ejecución (``cancelled`` indica si se canceló).
+    """
+    directory = expand_environment_variables(str(directory))
+    stats = DeletionStats()
+
+    if not os.path.exists(directory):
+        log_message(f"El directorio {directory} no existe.", "WARNING", gui_output)
+        return stats.finish()
+    target_progress = progress.begin_target(directory) if progress is not None else None
+
+    # Las exclusiones se compilan una vez; cada comprobación cuesta una consulta por componente
+    matcher = compile_exclusions(exclusions)
+    policy = RetentionPolicy.from_config(policy)
+    snapshot = open_snapshot(directory, incremental,
+                             exclusions_fingerprint(matcher.source, policy.fingerprint() if policy else None))
+    backup_run = open_backup_run(backup_directory)
+    workers, locality, media = deletion_strategy(directory, workers)
+    if media is not None:
+        log_message(f"Disco de {directory}: {media}; borrado con {workers} hilo(s)"
+                    f"{' en orden de inodo' if locality else ''}.", "INFO", gui_output)
+    job = DeletionJob(matcher, secure, backup_run, gui_output, stats, snapshot, policy, target_progress, locality,
+                      control, journal, limiter, directory)
+    try:
+        if workers > 1:
+            _delete_tree_parallel(job, directory, workers)
+        else:
+            _delete_tree_sequential(job, directory)
+        if journal is not None:
+            journal.complete_target(directory)
+    except CleanupCancelled:
+        stats.cancelled = True
+        log_message(f"Limpieza de {directory} cancelada.", "WARNING", gui_output)
+    finally:
+        if backup_run is not None and backup_run is not backup_directory:
+            backup_run.close()
+        if target_progress is not None:
+            target_progress.end()
+
+    stats.finish()
+    flush_log_summary(gui_output)
+    log_message(f"Limpieza de {directory}: {stats.summary()}", "INFO", gui_output)
+    return stats
+
+
+def delete_file_list(files, secure=False, backup_directory=None, gui_output=None, progress=None, control=None,
+                     limiter=None):
+    """Elimina una lista concreta de archivos ``(ruta, tamaño)`` con los mismos modos que ``delete_files_in_directory``.
+
+    ``progress`` es el ``TargetProgress`` del objetivo al que pertenecen los archivos y
+    ``control`` permite pausar o cancelar el borrado; ``limiter`` limita su ritmo de E/S.
+    Devuelve un ``DeletionStats``.
+    """
+    stats = DeletionStats()
+    backup_run = open_backup_run(backup_directory)
+    job = DeletionJob(compile_exclusions(None), secure, backup_run, gui_output, stats, progress=progress,
+                      control=control, limiter=limiter)
+    try:
+        for file_path, size in files:
+            job.checkpoint()
+            _delete_file(job, Path(file_path), size)
+    except CleanupCancelled:
+        stats.cancelled = True
+        log_message("Borrado de la lista de archivos cancelado.", "WARNING", gui_output)
+    finally:
+        if backup_run is not None and backup_run is not backup_directory:
+            backup_run.close()
+    stats.finish()
+    flush_log_summary(gui_output)
+    return stats
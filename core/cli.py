@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import signal
+import argparse
+import contextlib
+
+# Códigos de salida
+EXIT_OK = 0
+EXIT_ERRORS = 1
+EXIT_CONFIG = 2
+
+
+def resolve_config_path(name):
+    """Acepta la ruta de un archivo de configuración o el nombre de uno de ``configs/<nombre>.json``."""
+    if os.path.exists(name) or name.endswith(".json") or os.sep in name:
+        return name
+    from core.config import app_directory
+    return os.path.join(app_directory(), "configs", f"{name}.json")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cleanup",
+        description="Ejecuta una limpieza sin interfaz gráfica y escribe un resumen JSON en la salida estándar.")
+    parser.add_argument("--config", help="Ruta o nombre de la configuración (por defecto, la del usuario)")
+    parser.add_argument("--dry-run", action="store_true", help="Solo estima el espacio recuperable, sin eliminar nada")
+    parser.add_argument("--no-browsers", action="store_true", help="No limpia la caché de los navegadores")
+    parser.add_argument("--optimize-disk", action="store_true", help="Optimiza el disco al terminar (defrag en Windows, fstrim en Linux)")
+    parser.add_argument("--log-file", default="cleaning_log.txt", help="Archivo de log")
+    parser.add_argument("--quiet", action="store_true", help="No escribe el log en la consola")
+    parser.add_argument("--metrics-jsonl", help="Añade las métricas de la ejecución a este archivo JSON lines")
+    parser.add_argument("--metrics-prom", help="Escribe las métricas en este archivo de texto de Prometheus")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Empieza de cero aunque haya una ejecución interrumpida que retomar")
+    parser.add_argument("--max-mb-per-sec", type=float,
+                        help="Límite de MB/s de E/S por dispositivo (sustituye al de la configuración)")
+    parser.add_argument("--max-ops-per-sec", type=float,
+                        help="Límite de operaciones de E/S por segundo y dispositivo")
+    parser.add_argument("--background", action="store_true",
+                        help="Espera poca carga y limpia con prioridad baja de CPU y E/S, cediendo el disco si sube "
+                             "la carga (para cron o temporizadores)")
+    parser.add_argument("--list-backups", action="store_true",
+                        help="Lista las ejecuciones del almacén de respaldos, sin limpiar nada")
+    parser.add_argument("--restore", metavar="RUN_ID",
+                        help="Restaura una ejecución del almacén de respaldos ('latest' para la última), sin limpiar nada")
+    parser.add_argument("--restore-prefix", help="Restaura solo esta ruta y lo que hay bajo ella")
+    parser.add_argument("--restore-pattern", help="Restaura solo las rutas que cumplen este glob")
+    parser.add_argument("--restore-to", help="Restaura bajo este directorio en lugar de en la ruta original")
+    parser.add_argument("--on-conflict", choices=("skip", "overwrite", "rename"), default="skip",
+                        help="Qué hacer si el destino ya existe: conservarlo, reemplazarlo o restaurar con otro nombre")
+    return parser
+
+
+def load_config(name):
+    from core.config import load_config_file, load_user_config
+    if name is None:
+        # Los avisos de carga van a stderr para no mezclarse con el resumen JSON
+        with contextlib.redirect_stdout(sys.stderr):
+            return load_user_config()
+    return load_config_file(resolve_config_path(name))
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.list_backups or args.restore:
+        try:
+            summary = restore(args)
+        except Exception as e:
+            summary = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        json.dump(summary, sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+        return EXIT_OK if summary["status"] == "ok" else EXIT_ERRORS
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        json.dump({"status": "config_error", "error": str(e)}, sys.stdout)
+        sys.stdout.write("\n")
+        return EXIT_CONFIG
+    if args.no_browsers:
+        config["browsers"] = {}
+    if args.max_mb_per_sec or args.max_ops_per_sec:
+        config["rate_limit"] = dict(config.get("rate_limit") or {})
+        if args.max_mb_per_sec:
+            config["rate_limit"]["mb_per_sec"] = args.max_mb_per_sec
+        if args.max_ops_per_sec:
+            config["rate_limit"]["ops_per_sec"] = args.max_ops_per_sec
+    if args.metrics_jsonl or args.metrics_prom:
+        config["metrics"] = dict(config.get("metrics") or {})
+        if args.metrics_jsonl:
+            config["metrics"]["jsonl"] = args.metrics_jsonl
+        if args.metrics_prom:
+            config["metrics"]["prometheus"] = args.metrics_prom
+
+    from core.cleanup import configure_logging
+    configure_logging(args.log_file, console=not args.quiet)
+
+    try:
+        # Cualquier print de los módulos va a stderr; stdout queda solo para el resumen
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = run(args, config)
+    except Exception as e:
+        summary = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    json.dump(summary, sys.stdout, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return EXIT_OK if summary["status"] == "ok" else EXIT_ERRORS
+
+
+def run(args, config):
+    from core.plan import compile_plan
+    plan = compile_plan(config)
+    if args.dry_run:
+        from core.scan import estimate_cleanup
+        estimates = estimate_cleanup(plan)
+        return {"status": "ok", "dry_run": True,
+                "targets": [{"target": e.target, "path": e.path, "files": e.files, "bytes": e.bytes}
+                            for e in estimates],
+                "files": sum(e.files for e in estimates), "bytes": sum(e.bytes for e in estimates)}
+    from core.runner import run_cleanup
+    from core.ratelimit import RateLimiter
+    # Siempre se crea: con SIGHUP se pueden activar límites que al empezar no había
+    limiter = RateLimiter.from_settings(config.get("rate_limit"), optional=False)
+    watch_rate_limit(args, limiter)
+
+    def cleanup(control=None):
+        limiter.cancel = control.cancel_event if control is not None else None
+        return run_cleanup(plan, optimize=args.optimize_disk, estimate=False, control=control,
+                           resume=not args.no_resume, limiter=limiter)
+
+    if args.background:
+        from core.scheduler import run_in_background, schedule_settings
+        return run_in_background(cleanup, schedule_settings(config))
+    return cleanup()
+
+
+def restore(args):
+    """Lista las ejecuciones del almacén de respaldos o restaura una (``--list-backups`` / ``--restore``)."""
+    from core.backup_store import BackupStore, default_backup_directory
+    from core.restore import list_runs, restore_run
+    directory = default_backup_directory()
+    if args.list_backups:
+        return {"status": "ok", "runs": [{"run_id": run_id, "files": files, "bytes": size}
+                                         for run_id, files, size in list_runs(directory)]}
+    run_id = args.restore
+    if run_id == "latest":
+        runs = BackupStore(directory).list_runs()
+        if not runs:
+            return {"status": "error", "error": "El almacén de respaldos no tiene ejecuciones"}
+        run_id = runs[-1]
+    stats = restore_run(directory, run_id, args.restore_prefix, args.restore_pattern, args.restore_to,
+                        args.on_conflict)
+    return {"status": "errors" if stats.errors else "ok", "run_id": run_id, "restored": stats.restored,
+            "skipped": stats.skipped, "errors": len(stats.errors), "error_details": stats.errors[:20]}
+
+
+def watch_rate_limit(args, limiter):
+    """Con SIGHUP se vuelven a leer los límites de E/S de la configuración sin detener la limpieza."""
+    if not hasattr(signal, "SIGHUP"):
+        return
+
+    def reload(signum, frame):
+        try:
+            settings = dict(load_config(args.config).get("rate_limit") or {})
+        except (OSError, ValueError) as e:
+            print(f"No se pudo recargar la configuración: {e}", file=sys.stderr)
+            return
+        if args.max_mb_per_sec:
+            settings["mb_per_sec"] = args.max_mb_per_sec
+        if args.max_ops_per_sec:
+            settings["ops_per_sec"] = args.max_ops_per_sec
+        limiter.configure(settings.get("mb_per_sec"), settings.get("ops_per_sec"), settings.get("devices"))
+
+    signal.signal(signal.SIGHUP, reload)
@@ -0,0 +1,124 @@
+import os
+import re
+import time
+import codecs
+import locale
+import asyncio
+import subprocess
+
+# Tiempo que se da a un comando para terminar tras pedírselo antes de matarlo
+TERMINATE_GRACE = 5.0
+READ_SIZE = 4096
+
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+# ``\r`` sin ``\n`` es como las herramientas de consola reescriben la línea de progreso
+_LINE_BREAK = re.compile(r"\r\n|\r|\n")
+
+
+class CommandResult:
+    """Resultado de un comando de mantenimiento: código de salida, salida completa y cómo terminó."""
+
+    def __init__(self, args, returncode, lines, elapsed, timed_out=False, cancelled=False):
+        self.args = args
+        self.returncode = returncode
+        self.lines = lines
+        self.elapsed = elapsed
+        self.timed_out = timed_out
+        self.cancelled = cancelled
+
+    @property
+    def output(self):
+        return "\n".join(self.lines)
+
+    @property
+    def ok(self):
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+    def __repr__(self):
+        return (f"CommandResult({self.args[0]!r}, returncode={self.returncode}, lines={len(self.lines)}, "
+                f"timed_out={self.timed_out}, cancelled={self.cancelled})")
+
+
+def output_encoding():
+    """Codificación de la salida de las herramientas de consola (página OEM en Windows)."""
+    return "oem" if os.name == 'nt' else locale.getpreferredencoding(False)
+
+
+async def _wait_cancel(cancel):
+    while not cancel.is_set():
+        await asyncio.sleep(0.1)
+
+
+async def _stop(process):
+    """Pide al proceso que termine y, si no lo hace a tiempo, lo mata."""
+    if process.returncode is not None:
+        return
+    try:
+        process.terminate()
+        await asyncio.wait_for(process.wait(), TERMINATE_GRACE)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+    except ProcessLookupError:
+        pass
+
+
+async def run_command_async(args, timeout=None, on_line=None, cancel=None, encoding=None):
+    """Ejecuta ``args`` y entrega cada línea de su salida a ``on_line`` en cuanto aparece.
+
+    La salida se guarda en memoria. El comando se detiene si supera ``timeout`` segundos o si
+    se activa ``cancel`` (un ``threading.Event``). Devuelve un ``CommandResult``.
+    """
+    encoding = encoding or output_encoding()
+    started = time.perf_counter()
+    lines = []
+    process = await asyncio.create_subprocess_exec(*args, stdout=asyncio.subprocess.PIPE,
+                                                   stderr=asyncio.subprocess.STDOUT,
+                                                   stdin=asyncio.subprocess.DEVNULL, creationflags=_NO_WINDOW)
+
+    def emit(line):
+        line = line.rstrip()
+        if line:
+            lines.append(line)
+            if on_line is not None:
+                on_line(line)
+
+    async def read_output():
+        # Un carácter multibyte puede quedar partido entre dos lecturas: el decodificador guarda los bytes sueltos
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        pending = ""
+        while True:
+            chunk = await process.stdout.read(READ_SIZE)
+            if not chunk:
+                break
+            parts = _LINE_BREAK.split(pending + decoder.decode(chunk))
+            pending = parts.pop()
+            for line in parts:
+                emit(line)
+        emit(pending + decoder.decode(b"", final=True))
+        return await process.wait()
+
+    reader = asyncio.ensure_future(read_output())
+    waiters = {reader}
+    canceller = asyncio.ensure_future(_wait_cancel(cancel)) if cancel is not None else None
+    if canceller is not None:
+        waiters.add(canceller)
+    done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    if canceller is not None:
+        canceller.cancel()
+
+    timed_out = cancelled = False
+    if reader not in done:
+        cancelled = canceller is not None and canceller in done
+        timed_out = not cancelled
+        await _stop(process)
+        try:
+            await asyncio.wait_for(reader, TERMINATE_GRACE)
+        except asyncio.TimeoutError:
+            pass  # Un proceso hijo heredó la salida y la mantiene abierta
+    return CommandResult(list(args), process.returncode, lines, time.perf_counter() - started, timed_out, cancelled)
+
+
+def run_command(args, timeout=None, on_line=None, cancel=None, encoding=None):
+    """Versión síncrona de ``run_command_async`` para llamarla desde el hilo de limpieza."""
+    return asyncio.run(run_command_async(args, timeout, on_line, cancel, encoding))
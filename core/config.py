@@ -0,0 +1,104 @@
+import copy
+import json
+import os
+import sys
+import threading
+
+# Claves reconocidas de la configuración y sus valores por defecto
+CONFIG_DEFAULTS = {
+    "directories": [],
+    "browsers": {},
+    "exclusions": [],
+    "secure_delete": False,
+    "backup": False,
+    "workers": "auto",
+    "log_summary": False,
+    "backup_keep_runs": 10,
+    "backup_max_gb": 5,
+    "incremental": False,
+    "reclaim": {},
+    "metrics": {},
+    "schedule": {},
+    "rate_limit": {},
+    "history_keep_runs": 200,
+}
+
+# Configuraciones ya leídas: ruta -> ((mtime_ns, tamaño), configuración normalizada)
+_file_cache = {}
+_file_cache_lock = threading.Lock()
+
+
+def app_directory():
+    """Directorio de la aplicación: el del ejecutable empaquetado o la raíz del proyecto.
+
+    No depende de ``sys.argv[0]``, que apunta a ``core/__main__.py`` al ejecutar ``python -m core``.
+    """
+    if getattr(sys, 'frozen', False):
+        return os.path.dirname(sys.executable)
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def resource_path(relative_path):
+    """Obtiene la ruta del recurso en un entorno empaquetado."""
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+
+def normalize_config(config):
+    """Devuelve solo las claves reconocidas, con sus valores por defecto cuando faltan."""
+    return {key: config.get(key, default) for key, default in CONFIG_DEFAULTS.items()}
+
+
+def default_config():
+    return normalize_config({})
+
+
+def load_config_file(path):
+    """Carga y normaliza un archivo de configuración. Lanza ``OSError`` o ``ValueError`` si no es válido.
+
+    El resultado se guarda mientras no cambien el ``mtime`` ni el tamaño del archivo; cada
+    llamada devuelve una copia que se puede modificar libremente.
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    version = (stat.st_mtime_ns, stat.st_size)
+    with _file_cache_lock:
+        cached = _file_cache.get(path)
+    if cached is None or cached[0] != version:
+        with open(path, "r") as file:
+            cached = (version, normalize_config(json.load(file)))
+        with _file_cache_lock:
+            _file_cache[path] = cached
+    return copy.deepcopy(cached[1])
+
+
+def load_default_config():
+    """Carga la configuración predeterminada desde el archivo."""
+    try:
+        return load_config_file(resource_path("gui/config/config.json"))
+    except (json.JSONDecodeError, FileNotFoundError) as e:
+        print(f"Error al cargar la configuración predeterminada: {e}")
+        return default_config()
+
+
+def load_user_config():
+    """Carga la configuración del usuario desde el archivo."""
+    try:
+        if not os.path.exists(resource_path("user_config.json")):
+            return load_default_config()
+        return load_config_file(resource_path("user_config.json"))
+    except (json.JSONDecodeError, FileNotFoundError) as e:
+        print(f"Error al cargar la configuración del usuario: {e}")
+        return load_default_config()
+
+
+def save_user_config(config):
+    """Guarda la configuración del usuario en el archivo."""
+    try:
+        with open(resource_path("user_config.json"), "w") as file:
+            json.dump(config, file, indent=4)
+    except IOError as e:
+        print(f"Error al guardar la configuración del usuario: {e}")
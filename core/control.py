@@ -0,0 +1,43 @@
+import threading
+
+
+class CleanupCancelled(Exception):
+    """La limpieza se canceló a petición del usuario."""
+
+
+class RunControl:
+    """Pausa y cancelación cooperativas de una limpieza.
+
+    El hilo de limpieza llama a ``checkpoint`` entre archivo y archivo: se bloquea mientras la
+    ejecución está en pausa y lanza ``CleanupCancelled`` si se pidió cancelarla. ``pause``,
+    ``resume`` y ``cancel`` se pueden llamar desde cualquier hilo (por ejemplo, la GUI).
+    """
+
+    def __init__(self):
+        self._running = threading.Event()
+        self._running.set()
+        self.cancel_event = threading.Event()
+
+    @property
+    def paused(self):
+        return not self._running.is_set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def pause(self):
+        self._running.clear()
+
+    def resume(self):
+        self._running.set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self._running.set()  # Despierta al hilo si estaba en pausa
+
+    def checkpoint(self):
+        while not self._running.wait(0.2):
+            pass
+        if self.cancel_event.is_set():
+            raise CleanupCancelled()
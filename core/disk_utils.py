@@ -1,57 +1,72 @@
-import subprocess
 import os
-import tempfile
+import shutil
 from core.cleanup import log_message
+from core.commands import run_command
+from core.storage import media_type, SSD
 
+# Tiempo máximo de una optimización de disco
+OPTIMIZE_TIMEOUT = 2 * 3600
 
-def get_defragmentation_report(drive):
+
+def get_defragmentation_report(drive, gui_output=None, timeout=OPTIMIZE_TIMEOUT, cancel=None):
+    """Optimiza la unidad con ``defrag`` y devuelve su informe detallado.
+
+    Una sola ejecución con ``/U`` (progreso) y ``/V`` (informe) sustituye a las dos de antes; la
+    salida se muestra en la GUI según llega y el informe se guarda en memoria.
+    """
+    return _run_maintenance(["defrag", drive, "/O", "/U", "/V"], f"del disco {drive}", gui_output, timeout, cancel)
+
+
+def _run_maintenance(args, subject, gui_output, timeout, cancel):
+    """Ejecuta el comando, registra cómo terminó la optimización ``subject`` y devuelve el informe."""
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".txt") as temp_file:
-            report_path = temp_file.name
-            # Ejecuta el comando defrag y guarda la salida en un archivo
-            subprocess.run(
-                ["defrag", drive, "/O", "/V"],
-                stdout=temp_file,
-                stderr=subprocess.STDOUT,
-                creationflags=subprocess.CREATE_NO_WINDOW,
-                check=True
-            )
-        # Lee el informe del archivo
-        with open(report_path, "r") as f:
-            report = f.read()
-        os.remove(report_path)  # Eliminar archivo temporal después de su uso
-        return report
-    except subprocess.CalledProcessError as e:
-        return f"Error al obtener el informe de fragmentación: {e}\nSalida: {e.output.decode()}"
-    except Exception as e:
-        return f"Error inesperado al obtener el informe de fragmentación: {e}"
+        result = run_command(args, timeout, lambda line: log_message(line, "INFO", gui_output), cancel)
+    except OSError as e:
+        log_message(f"No se pudo ejecutar {args[0]}: {e}", "ERROR", gui_output)
+        return f"Error al ejecutar {args[0]}: {e}"
+    if result.timed_out:
+        log_message(f"Optimización {subject} detenida: superó el tiempo máximo ({timeout} s).", "WARNING",
+                    gui_output)
+        return f"{args[0]} se detuvo tras superar el tiempo máximo ({timeout} s).\n{result.output}"
+    if result.cancelled:
+        log_message(f"Optimización {subject} cancelada.", "WARNING", gui_output)
+        return f"{args[0]} se canceló.\n{result.output}"
+    if result.returncode != 0:
+        log_message(f"Optimización {subject} fallida: {args[0]} terminó con código {result.returncode}.", "ERROR",
+                    gui_output)
+        return f"Error al ejecutar {args[0]} (código {result.returncode}).\nSalida: {result.output}"
+    log_message(f"Optimización {subject} completada.", "INFO", gui_output)
+    return result.output
 
 
 def is_ssd(drive):
-    try:
-        result = subprocess.run(
-            ["powershell", "-Command", f"Get-PhysicalDisk | Where-Object {{$_.DeviceID -eq (Get-Partition -DriveLetter {drive.strip(':')} | Get-Disk).DeviceID}} | Select MediaType"],
-            capture_output=True,
-            text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        return 'SSD' in result.stdout
-    except Exception as e:
-        return False  # Asumimos que no es un SSD si no podemos determinarlo
+    """Indica si la unidad es un SSD; el tipo de medio se consulta una vez y se guarda (``core.storage``)."""
+    return media_type(drive if drive.endswith(("\\", "/")) else drive + "\\") == SSD
+
 
+def optimize_disk(gui_output=None, timeout=OPTIMIZE_TIMEOUT, cancel=None):
+    """Optimiza el disco del sistema y devuelve el informe, o ``None`` si no hay nada que hacer.
 
-def optimize_disk(gui_output=None):
+    En Windows se desfragmenta la unidad del sistema salvo que sea un SSD; en Linux se ejecuta
+    ``fstrim`` sobre ``/`` si está en un SSD. La salida se muestra línea a línea y el comando
+    se detiene al superar ``timeout`` segundos o al activarse ``cancel``.
+    """
     try:
         if os.name == 'nt':
             drive = os.getenv('SystemDrive')
             if is_ssd(drive):
-                log_message(f"El disco {drive} es un SSD; no se requiere desfragmentación.", gui_output)
+                log_message(f"El disco {drive} es un SSD; no se requiere desfragmentación.", "INFO", gui_output)
                 return None
+            return get_defragmentation_report(drive, gui_output, timeout, cancel)
 
-            subprocess.run(["defrag", drive, "/O"], check=True, creationflags=subprocess.CREATE_NO_WINDOW)
-            post_report = get_defragmentation_report(drive)
-            log_message(f"Optimización del disco {drive} completada.", gui_output)
-            return post_report
+        if media_type("/") != SSD:
+            log_message("El disco del sistema no es un SSD; no se requiere TRIM.", "INFO", gui_output)
+            return None
+        fstrim = shutil.which("fstrim")
+        if fstrim is None:
+            log_message("fstrim no está disponible; se omite la optimización del disco.", "WARNING", gui_output)
+            return None
+        return _run_maintenance([fstrim, "-v", "/"], "del disco /", gui_output, timeout, cancel)
     except Exception as e:
-        log_message(f"Error al optimizar el disco: {e}", gui_output)
+        log_message(f"Error al optimizar el disco: {e}", "ERROR", gui_output)
         return None
@@ -0,0 +1,99 @@
+import os
+import re
+import fnmatch
+
+GLOB_CHARS = "*?["
+
+# Marca de fin de ruta excluida dentro del trie
+_EXCLUDED = object()
+
+
+def _split(path):
+    """Divide una ruta normalizada (y en minúsculas en Windows) en sus componentes."""
+    return [part for part in os.path.normcase(os.path.normpath(path)).split(os.sep) if part]
+
+
+def _compile_patterns(patterns):
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(os.path.normcase(p))})" for p in patterns))
+
+
+class ExclusionMatcher:
+    """Conjunto de exclusiones compilado una sola vez.
+
+    - Las rutas absolutas se guardan en un trie por componentes, así que comprobar una ruta
+      cuesta una consulta por componente y excluir un directorio excluye todo su subárbol.
+    - Los nombres sin separador (``desktop.ini``, ``*.log``) se comparan con el nombre de
+      cada entrada mediante una única expresión regular precompilada.
+    - El resto de patrones glob se comparan con la ruta completa.
+
+    Durante un recorrido se avanza por el trie con ``child`` en lugar de volver a dividir la
+    ruta completa de cada entrada.
+    """
+
+    def __init__(self, exclusions=None):
+        self.source = [str(exclusion) for exclusion in exclusions or []]
+        self.trie = {}
+        name_patterns, path_patterns = [], []
+        for exclusion in exclusions or []:
+            exclusion = os.path.expandvars(str(exclusion)).strip()
+            if not exclusion:
+                continue
+            has_glob = any(c in exclusion for c in GLOB_CHARS)
+            has_sep = os.sep in exclusion or (os.altsep and os.altsep in exclusion)
+            if not has_sep:
+                name_patterns.append(exclusion)
+            elif has_glob or not os.path.isabs(exclusion):
+                pattern = os.path.normpath(exclusion)
+                path_patterns.append(pattern if os.path.isabs(pattern) else os.path.join("*", pattern))
+            else:
+                node = self.trie
+                for part in _split(exclusion):
+                    node = node.setdefault(part, {})
+                node[_EXCLUDED] = True
+        self.name_regex = _compile_patterns(name_patterns)
+        self.path_regex = _compile_patterns(path_patterns)
+
+    def __bool__(self):
+        return bool(self.trie or self.name_regex or self.path_regex)
+
+    def node(self, directory):
+        """Devuelve la posición del trie correspondiente a ``directory`` (o ``None``)."""
+        node = self.trie
+        for part in _split(directory):
+            node = node.get(part)
+            if node is None:
+                return None
+            if _EXCLUDED in node:
+                return node
+        return node
+
+    def child(self, node, name):
+        """Avanza un componente en el trie desde ``node``."""
+        if node is None:
+            return None
+        return node.get(os.path.normcase(name))
+
+    def matches(self, node, name, path):
+        """Indica si la entrada ``name`` (ruta ``path``) del directorio en ``node`` está excluida.
+
+        ``node`` es el valor devuelto por ``node`` o ``child`` para el directorio que la contiene.
+        """
+        if node is not None and _EXCLUDED in node:
+            return True
+        child = self.child(node, name)
+        if child is not None and _EXCLUDED in child:
+            return True
+        if self.name_regex is not None and self.name_regex.match(os.path.normcase(name)):
+            return True
+        if self.path_regex is not None and self.path_regex.match(os.path.normcase(os.path.normpath(path))):
+            return True
+        return False
+
+
+def compile_exclusions(exclusions):
+    """Devuelve un ``ExclusionMatcher``; acepta una lista de exclusiones o un matcher ya compilado."""
+    if isinstance(exclusions, ExclusionMatcher):
+        return exclusions
+    return ExclusionMatcher(exclusions)
@@ -0,0 +1,104 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from collections import namedtuple
+from core.config import app_directory
+
+# Ejecuciones que se conservan por defecto; las más antiguas se eliminan al guardar una nueva
+HISTORY_KEEP_RUNS = 200
+
+HISTORY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, started REAL NOT NULL, status TEXT, elapsed REAL,
+                                 files INTEGER, bytes INTEGER, errors INTEGER, targets INTEGER);
+CREATE TABLE IF NOT EXISTS run_details (run_id INTEGER PRIMARY KEY REFERENCES runs (id) ON DELETE CASCADE,
+                                        summary TEXT, log TEXT, disk_report TEXT);
+"""
+
+# Resumen de una ejecución: solo las columnas de ``runs``, sin el detalle
+RunSummary = namedtuple("RunSummary", ["id", "started", "status", "elapsed", "files", "bytes", "errors", "targets"])
+# Detalle de una ejecución: resumen JSON completo, líneas del informe e informe de disco
+RunDetails = namedtuple("RunDetails", ["summary", "log", "disk_report"])
+
+
+def default_history_path():
+    return os.path.join(app_directory(), "data", "history.sqlite")
+
+
+class RunHistory:
+    """Historial de ejecuciones en SQLite con un límite de ejecuciones conservadas.
+
+    Los totales de cada ejecución están en ``runs`` y el detalle (resumen completo, líneas del
+    informe e informe de disco) en ``run_details``, así que listar o paginar el historial no
+    lee el detalle de ninguna ejecución. Al guardar una ejecución se eliminan las que superan
+    ``keep_runs`` y se devuelve su espacio al sistema de archivos.
+    """
+
+    def __init__(self, path=None, keep_runs=HISTORY_KEEP_RUNS):
+        self.path = path or default_history_path()
+        self.keep_runs = keep_runs
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        # auto_vacuum solo tiene efecto si se fija antes de crear las tablas
+        self._connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(HISTORY_SCHEMA)
+
+    def record(self, summary, log=(), disk_report=None):
+        """Guarda una ejecución (el resumen de ``run_cleanup``) y devuelve su identificador."""
+        row = (summary.get("started", time.time()), summary.get("status"), summary.get("elapsed"),
+               summary.get("files", 0), summary.get("bytes", 0), summary.get("errors", 0),
+               len(summary.get("directories", [])) + len(summary.get("browsers", [])))
+        details = {key: value for key, value in summary.items() if key not in ("disk_report", "metrics")}
+        with self._lock, self._connection:
+            run_id = self._connection.execute(
+                "INSERT INTO runs (started, status, elapsed, files, bytes, errors, targets) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", row).lastrowid
+            self._connection.execute("INSERT INTO run_details VALUES (?, ?, ?, ?)",
+                                     (run_id, json.dumps(details, ensure_ascii=False, default=str),
+                                      "\n".join(log), disk_report))
+            self._apply_retention()
+        return run_id
+
+    def _apply_retention(self):
+        if not self.keep_runs:
+            return
+        removed = self._connection.execute(
+            "DELETE FROM runs WHERE id <= (SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?)",
+            (self.keep_runs,)).rowcount
+        if removed:
+            self._connection.execute("PRAGMA incremental_vacuum")
+
+    def count(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def page(self, offset=0, limit=20):
+        """Resúmenes de ``limit`` ejecuciones a partir de ``offset``, de la más reciente a la más antigua."""
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT id, started, status, elapsed, files, bytes, errors, targets FROM runs "
+                "ORDER BY id DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [RunSummary(*row) for row in rows]
+
+    def details(self, run_id):
+        """Detalle de una ejecución, o ``None`` si ya no está en el historial."""
+        with self._lock:
+            row = self._connection.execute("SELECT summary, log, disk_report FROM run_details WHERE run_id = ?",
+                                           (run_id,)).fetchone()
+        if row is None:
+            return None
+        summary, log, disk_report = row
+        return RunDetails(json.loads(summary) if summary else {}, log.splitlines() if log else [], disk_report)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
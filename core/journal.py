@@ -0,0 +1,140 @@
+import os
+import json
+import time
+import threading
+from core.config import app_directory
+
+JOURNAL_VERSION = 2
+# Un diario más antiguo no se retoma: la siguiente ejecución empieza de cero
+RESUME_MAX_AGE = 12 * 3600
+# Los registros se escriben por lotes: cada tantos registros o cada tantos segundos
+FLUSH_RECORDS = 500
+FLUSH_INTERVAL = 2.0
+
+
+def default_journal_path():
+    return os.path.join(app_directory(), "data", "journal.jsonl")
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class RunJournal:
+    """Diario de una ejecución: objetivos terminados y directorios ya procesados.
+
+    El diario es un archivo JSON lines al que solo se añaden líneas, en lotes. Si la ejecución
+    se interrumpe (cierre del proceso o cancelación), la siguiente con la misma configuración
+    (``fingerprint``) lo retoma: salta los objetivos completados y, dentro de los demás, los
+    directorios ya procesados se recorren a partir de los subdirectorios guardados, sin
+    volver a listarlos. Al terminar la ejecución el diario se elimina.
+
+    Un diario empezado hace más de ``max_age`` segundos no se retoma, y un directorio
+    procesado cuyo ``st_mtime_ns`` cambió desde entonces se vuelve a listar, para no dejar
+    los archivos creados después de la interrupción.
+    """
+
+    def __init__(self, fingerprint, path=None, resume=True, max_age=RESUME_MAX_AGE):
+        self.path = path or default_journal_path()
+        self.fingerprint = fingerprint
+        self.max_age = max_age
+        self.targets = set()
+        self.directories = {}
+        self.resumed = resume and self._load()
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        if self.resumed:
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._append({"type": "start", "version": JOURNAL_VERSION, "fingerprint": fingerprint,
+                          "time": time.time()}, flush=True)
+
+    def _load(self):
+        """Lee el diario anterior; devuelve si corresponde a una ejecución interrumpida de esta configuración."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return False
+        records = []
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue  # Última línea a medias si el proceso murió escribiendo
+        if not records or records[0].get("type") != "start" or records[0].get("version") != JOURNAL_VERSION \
+                or records[0].get("fingerprint") != self.fingerprint:
+            return False
+        age = time.time() - records[0].get("time", 0)
+        if not 0 <= age <= self.max_age:
+            return False
+        for record in records[1:]:
+            if record.get("type") == "dir":
+                self.directories[record["path"]] = (record["subdirs"], record.get("mtime"))
+            elif record.get("type") == "target":
+                self.targets.add(record["target"])
+        return True
+
+    def _append(self, record, flush=False):
+        with self._lock:
+            self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            due = flush or len(self._buffer) >= FLUSH_RECORDS or time.monotonic() - self._last_flush >= FLUSH_INTERVAL
+            if due:
+                self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer and not self._file.closed:
+            self._file.write("".join(self._buffer))
+            self._file.flush()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+            if not self._file.closed:
+                os.fsync(self._file.fileno())
+
+    def completed_subdirs(self, directory):
+        """Subdirectorios pendientes de ``directory`` si ya se procesó en la ejecución interrumpida, o ``None``.
+
+        También devuelve ``None`` si el directorio cambió desde que se anotó.
+        """
+        entry = self.directories.get(os.path.normpath(str(directory)))
+        if entry is None:
+            return None
+        subdirs, mtime = entry
+        if mtime is None or _mtime_ns(directory) != mtime:
+            return None
+        return subdirs
+
+    def record_directory(self, directory, subdirs):
+        """Marca ``directory`` como procesado; ``subdirs`` son los subdirectorios a los que aún hay que bajar."""
+        self._append({"type": "dir", "path": os.path.normpath(str(directory)), "subdirs": list(subdirs),
+                      "mtime": _mtime_ns(directory)})
+
+    def target_done(self, target):
+        return os.path.normpath(str(target)) in self.targets
+
+    def complete_target(self, target):
+        target = os.path.normpath(str(target))
+        self.targets.add(target)
+        self._append({"type": "target", "target": target}, flush=True)
+        self.flush()
+
+    def close(self, completed):
+        """Cierra el diario; si la ejecución terminó se elimina y si no se conserva para retomarla."""
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+        if completed:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
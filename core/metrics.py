@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+# Contadores que se acumulan por fase y por objetivo a partir de un ``DeletionStats``
+COUNTERS = ("files", "bytes", "directories", "skipped", "excluded", "errors")
+
+
+def peak_rss_bytes():
+    """Pico de memoria residente del proceso actual, en bytes (``None`` si no se puede obtener)."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux lo da en KB y macOS en bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                    ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    except (ImportError, AttributeError, OSError):
+        pass
+    return None
+
+
+def _empty_counters():
+    return dict({name: 0 for name in COUNTERS}, seconds=0.0, error_types={})
+
+
+def _merge(counters, values, error_types):
+    for name in COUNTERS:
+        counters[name] += values.get(name, 0)
+    for kind, count in error_types.items():
+        counters["error_types"][kind] = counters["error_types"].get(kind, 0) + count
+
+
+class RunMetrics:
+    """Métricas estructuradas de una ejecución: tiempos y contadores por fase y por objetivo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timestamp = time.time()
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.targets = []
+
+    def _phase(self, name):
+        return self.phases.setdefault(name, _empty_counters())
+
+    @contextmanager
+    def phase(self, name):
+        """Mide el tiempo de pared de la fase ``name``; las excepciones se cuentan como errores."""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.add_error(name, e)
+            raise
+        finally:
+            with self._lock:
+                self._phase(name)["seconds"] += time.perf_counter() - started
+
+    def add_target(self, phase, target, stats):
+        """Suma a la fase ``phase`` los contadores de un ``DeletionStats`` del objetivo ``target``."""
+        values = stats.as_dict()
+        record = {name: values[name] for name in COUNTERS}
+        record.update(phase=phase, target=str(target), seconds=round(stats.elapsed, 3),
+                      error_types=dict(stats.error_types))
+        with self._lock:
+            _merge(self._phase(phase), values, stats.error_types)
+            self.targets.append(record)
+
+    def add_error(self, phase, error):
+        """Cuenta un error producido fuera del borrado (cierre de navegadores, optimización...)."""
+        kind = error if isinstance(error, str) else type(error).__name__
+        with self._lock:
+            _merge(self._phase(phase), {"errors": 1}, {kind: 1})
+
+    def as_record(self, status=None):
+        """Devuelve un registro serializable con las métricas de la ejecución."""
+        with self._lock:
+            totals = _empty_counters()
+            phases = {}
+            for name, counters in self.phases.items():
+                _merge(totals, counters, counters["error_types"])
+                phases[name] = dict(counters, seconds=round(counters["seconds"], 3),
+                                    error_types=dict(counters["error_types"]))
+            totals.pop("seconds")
+            return {"timestamp": round(self.timestamp, 3), "status": status,
+                    "elapsed": round(time.perf_counter() - self.started, 3), "peak_rss_bytes": peak_rss_bytes(),
+                    "totals": totals, "phases": phases, "targets": list(self.targets)}
+
+
+def write_jsonl(record, path):
+    """Añade el registro como una línea JSON al final de ``path``."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_prometheus(record):
+    """Formatea el registro en el formato de texto de Prometheus (para el textfile collector)."""
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP cleanup_{name} {help_text}")
+        lines.append(f"# TYPE cleanup_{name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_label(val)}"' for key, val in labels.items())
+            lines.append(f"cleanup_{name}{{{label_text}}} {value}" if label_text else f"cleanup_{name} {value}")
+
+    phases = record["phases"]
+    metric("last_run_timestamp_seconds", "gauge", "Inicio de la última ejecución.", [({}, record["timestamp"])])
+    metric("last_run_success", "gauge", "1 si la última ejecución terminó sin errores.",
+           [({}, 1 if record["status"] == "ok" else 0)])
+    metric("run_seconds", "gauge", "Duración total de la ejecución.", [({}, record["elapsed"])])
+    if record["peak_rss_bytes"] is not None:
+        metric("peak_rss_bytes", "gauge", "Pico de memoria residente del proceso.",
+               [({}, record["peak_rss_bytes"])])
+    metric("phase_seconds", "gauge", "Duración de cada fase.",
+           [({"phase": name}, counters["seconds"]) for name, counters in phases.items()])
+    for name in COUNTERS:
+        metric(f"phase_{name}", "gauge", f"Contador '{name}' de cada fase.",
+               [({"phase": phase}, counters[name]) for phase, counters in phases.items()])
+    metric("phase_errors_by_type", "gauge", "Errores de cada fase por tipo de excepción.",
+           [({"phase": phase, "type": kind}, count)
+            for phase, counters in phases.items() for kind, count in counters["error_types"].items()])
+    metric("target_seconds", "gauge", "Duración de la limpieza de cada objetivo.",
+           [({"phase": t["phase"], "target": t["target"]}, t["seconds"]) for t in record["targets"]])
+    metric("target_bytes", "gauge", "Bytes eliminados en cada objetivo.",
+           [({"phase": t["phase"], "target": t["target"]}, t["bytes"]) for t in record["targets"]])
+    metric("target_files", "gauge", "Archivos eliminados en cada objetivo.",
+           [({"phase": t["phase"], "target": t["target"]}, t["files"]) for t in record["targets"]])
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(record, path):
+    """Escribe el registro en ``path`` de forma atómica para que el colector nunca lea un archivo a medias."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(format_prometheus(record))
+    os.replace(temp_path, path)
+
+
+def emit_metrics(record, settings):
+    """Escribe el registro en los destinos de ``settings`` (claves ``jsonl`` y ``prometheus``).
+
+    Devuelve la lista de errores al escribir; un fallo aquí no debe interrumpir la limpieza.
+    """
+    errors = []
+    for key, writer in (("jsonl", write_jsonl), ("prometheus", write_prometheus)):
+        path = (settings or {}).get(key)
+        if not path:
+            continue
+        try:
+            writer(record, os.path.expandvars(path))
+        except OSError as e:
+            errors.append(f"{path}: {e}")
+    return errors
@@ -0,0 +1,137 @@
+import os
+import json
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from core.config import normalize_config, load_config_file, load_user_config
+from core.exclusions import GLOB_CHARS, compile_exclusions
+from core.policies import RetentionPolicy
+
+# Planes compilados que se conservan, por contenido de la configuración
+PLAN_CACHE_SIZE = 8
+
+# Directorio a limpiar: nombre para los reportes, ruta canónica, bloque ``policy`` y exclusiones
+# compiladas (las generales más los directorios anidados que se limpian por separado)
+PlanTarget = namedtuple("PlanTarget", ["name", "path", "policy", "matcher"])
+
+_lock = threading.Lock()
+_cache = {}
+
+
+class CleanupPlan(namedtuple("CleanupPlan", ["targets", "browsers", "matcher", "merged", "settings"])):
+    """Configuración compilada e inmutable de una limpieza.
+
+    - ``targets``: tupla de ``PlanTarget`` en el orden de la configuración, sin solapes.
+    - ``browsers``: navegadores seleccionados.
+    - ``matcher``: exclusiones generales compiladas.
+    - ``merged``: ``(ruta, ruta_que_la_cubre)`` de los directorios absorbidos por otro.
+    - ``settings``: el resto de la configuración normalizada, de solo lectura.
+    """
+
+    __slots__ = ()
+
+    def get(self, key, default=None):
+        return self.settings.get(key, default)
+
+    def fingerprint(self):
+        """Huella de lo que decide qué se elimina (directorios, exclusiones, políticas y modos)."""
+        return [[(t.path, t.matcher.source, t.policy) for t in self.targets],
+                self.get("secure_delete"), self.get("backup"), self.get("incremental")]
+
+
+def canonical_path(path):
+    """Ruta absoluta con variables de entorno expandidas y sin enlaces simbólicos ni componentes redundantes."""
+    return os.path.normpath(os.path.realpath(os.path.expanduser(os.path.expandvars(str(path)))))
+
+
+def canonical_exclusion(exclusion):
+    """Canoniza como los directorios una exclusión que es una ruta absoluta sin comodines.
+
+    Así una exclusión escrita a través de un enlace simbólico, una unión o un nombre corto
+    de Windows sigue coincidiendo con las rutas canónicas que recorre la limpieza.
+    """
+    expanded = os.path.expandvars(str(exclusion)).strip()
+    if not expanded or any(c in expanded for c in GLOB_CHARS) or not os.path.isabs(expanded):
+        return exclusion
+    return canonical_path(expanded)
+
+
+def _policy_key(policy):
+    policy = RetentionPolicy.from_config(policy)
+    return policy.fingerprint() if policy else None
+
+
+def _covering_root(key, kept):
+    """Directorio ya elegido que contiene a ``key`` (el más cercano), o ``None``."""
+    parent = os.path.dirname(key)
+    while parent and parent != key:
+        if parent in kept:
+            return parent
+        key, parent = parent, os.path.dirname(parent)
+    return None
+
+
+def _compile(config):
+    exclusions = [canonical_exclusion(exclusion) for exclusion in config.get("exclusions", [])]
+    candidates = []
+    for directory in config.get("directories", []):
+        if directory.get("enabled", False) and directory.get("path"):
+            path = canonical_path(directory["path"])
+            candidates.append((directory.get("description") or path, path, directory.get("policy")))
+
+    # Se resuelven de menos a más profundos para que cada directorio encuentre ya elegido al que lo contiene
+    kept, skipped, merged = {}, {}, []
+    for index in sorted(range(len(candidates)), key=lambda i: candidates[i][1].count(os.sep)):
+        name, path, policy = candidates[index]
+        key = os.path.normcase(path)
+        if key in kept:
+            merged.append((path, candidates[kept[key]][1]))
+            continue
+        outer = _covering_root(key, kept)
+        if outer is not None:
+            outer_policy = _policy_key(candidates[kept[outer]][2])
+            if outer_policy is None or outer_policy == _policy_key(policy):
+                # El recorrido del directorio exterior ya elimina todo lo que eliminaría este
+                merged.append((path, candidates[kept[outer]][1]))
+                continue
+            # Con otra política se limpia por separado y el exterior lo salta
+            skipped.setdefault(outer, []).append(path)
+        kept[key] = index
+
+    matcher = compile_exclusions(exclusions)
+    targets = []
+    for key, index in sorted(kept.items(), key=lambda item: item[1]):
+        name, path, policy = candidates[index]
+        nested = skipped.get(key)
+        targets.append(PlanTarget(name, path, policy, compile_exclusions(exclusions + nested) if nested else matcher))
+
+    browsers = tuple(name for name, enabled in config.get("browsers", {}).items() if enabled)
+    return CleanupPlan(tuple(targets), browsers, matcher, tuple(merged), MappingProxyType(dict(config)))
+
+
+def compile_plan(config):
+    """Compila ``config`` en un ``CleanupPlan``; acepta también un plan ya compilado.
+
+    Las variables de entorno se expanden y las rutas se canonizan una sola vez; los duplicados
+    y los directorios contenidos en otro con la misma política (o sin política) se fusionan.
+    El resultado se guarda por contenido de la configuración, así que compilar de nuevo la
+    misma configuración no vuelve a tocar el disco.
+    """
+    if isinstance(config, CleanupPlan):
+        return config
+    config = normalize_config(config)
+    key = json.dumps(config, sort_keys=True, default=str)
+    with _lock:
+        plan = _cache.get(key)
+    if plan is None:
+        plan = _compile(config)
+        with _lock:
+            if len(_cache) >= PLAN_CACHE_SIZE:
+                _cache.pop(next(iter(_cache)))
+            _cache[key] = plan
+    return plan
+
+
+def load_plan(path=None):
+    """Plan de la configuración en ``path`` (por defecto, la del usuario); se relee solo si cambió su ``mtime``."""
+    return compile_plan(load_user_config() if path is None else load_config_file(path))
@@ -0,0 +1,87 @@
+import os
+import time
+import heapq
+
+DAY = 24 * 60 * 60
+RECLAIM_ORDERS = ("largest", "oldest")
+
+
+def _normalize_extensions(extensions):
+    if not extensions:
+        return None
+    return frozenset(os.path.normcase(ext if ext.startswith(".") else f".{ext}") for ext in extensions)
+
+
+class RetentionPolicy:
+    """Criterios por directorio que decide qué archivos se eliminan.
+
+    - ``min_age_days``: solo archivos sin modificar desde hace al menos esos días.
+    - ``min_size`` / ``max_size``: límites de tamaño en bytes.
+    - ``extensions``: solo esas extensiones; ``exclude_extensions``: nunca esas extensiones.
+    """
+
+    def __init__(self, min_age_days=None, min_size=None, max_size=None, extensions=None, exclude_extensions=None):
+        self.min_age_days = min_age_days
+        self.min_size = min_size
+        self.max_size = max_size
+        self.extensions = _normalize_extensions(extensions)
+        self.exclude_extensions = _normalize_extensions(exclude_extensions)
+        self.now = time.time()
+
+    @classmethod
+    def from_config(cls, config):
+        """Crea la política a partir del bloque ``policy`` de un directorio; ``None`` si no hay criterios."""
+        if not config:
+            return None
+        if isinstance(config, cls):
+            return config
+        policy = cls(config.get("min_age_days"), config.get("min_size"), config.get("max_size"),
+                     config.get("extensions"), config.get("exclude_extensions"))
+        return policy if policy else None
+
+    def __bool__(self):
+        return any(value is not None for value in (self.min_age_days, self.min_size, self.max_size,
+                                                   self.extensions, self.exclude_extensions))
+
+    def allows(self, name, size, mtime):
+        """Indica si el archivo ``name`` con ese tamaño y fecha de modificación puede eliminarse."""
+        if self.min_age_days is not None and self.now - mtime < self.min_age_days * DAY:
+            return False
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.extensions is not None or self.exclude_extensions is not None:
+            ext = os.path.splitext(os.path.normcase(name))[1]
+            if self.extensions is not None and ext not in self.extensions:
+                return False
+            if self.exclude_extensions is not None and ext in self.exclude_extensions:
+                return False
+        return True
+
+    def fingerprint(self):
+        return [self.min_age_days, self.min_size, self.max_size,
+                sorted(self.extensions or []), sorted(self.exclude_extensions or [])]
+
+
+def select_victims(entries, budget_bytes, order="largest"):
+    """Elige, en una sola pasada, los archivos a eliminar para liberar ``budget_bytes``.
+
+    ``entries`` es un iterable de ``ScanEntry``. Se mantiene un montículo con los mejores
+    candidatos (los más grandes o los más antiguos según ``order``) y se descarta el peor en
+    cuanto el resto ya cubre el presupuesto, así que la memoria depende del número de
+    archivos necesarios y no del tamaño del listado. Devuelve los elegidos y los bytes que suman.
+    """
+    if order not in RECLAIM_ORDERS:
+        raise ValueError(f"Orden de recuperación desconocido: {order}")
+    heap = []
+    total = 0
+    counter = 0  # Desempate estable para no comparar entradas
+    for entry in entries:
+        priority = entry.size if order == "largest" else -entry.mtime
+        heapq.heappush(heap, (priority, counter, entry))
+        counter += 1
+        total += entry.size
+        while heap and total - heap[0][2].size >= budget_bytes:
+            total -= heapq.heappop(heap)[2].size
+    return [item[2] for item in heap], total
@@ -0,0 +1,192 @@
+import os
+import csv
+import time
+import signal
+import subprocess
+from collections import namedtuple
+
+# Proceso en ejecución: identificador y nombre de la imagen (``chrome.exe``, ``firefox``...)
+ProcessInfo = namedtuple("ProcessInfo", ["pid", "name"])
+
+# Tiempo que se espera a que los procesos terminen por sí solos antes de forzar el cierre
+TERMINATE_TIMEOUT = 5.0
+POLL_INTERVAL = 0.1
+
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+
+def _windows_processes():
+    """Enumera los procesos con la API Toolhelp32, sin lanzar ningún subproceso."""
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessEntry32(ctypes.Structure):
+        _fields_ = [("dwSize", wintypes.DWORD), ("cntUsage", wintypes.DWORD),
+                    ("th32ProcessID", wintypes.DWORD), ("th32DefaultHeapID", ctypes.c_size_t),
+                    ("th32ModuleID", wintypes.DWORD), ("cntThreads", wintypes.DWORD),
+                    ("th32ParentProcessID", wintypes.DWORD), ("pcPriClassBase", wintypes.LONG),
+                    ("dwFlags", wintypes.DWORD), ("szExeFile", wintypes.WCHAR * 260)]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.CreateToolhelp32Snapshot.restype = wintypes.HANDLE
+    kernel32.CreateToolhelp32Snapshot.argtypes = [wintypes.DWORD, wintypes.DWORD]
+    kernel32.Process32FirstW.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessEntry32)]
+    kernel32.Process32NextW.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessEntry32)]
+    kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+
+    handle = kernel32.CreateToolhelp32Snapshot(0x00000002, 0)  # TH32CS_SNAPPROCESS
+    if handle == wintypes.HANDLE(-1).value:
+        raise ctypes.WinError(ctypes.get_last_error())
+    processes = []
+    try:
+        entry = ProcessEntry32()
+        entry.dwSize = ctypes.sizeof(entry)
+        found = kernel32.Process32FirstW(handle, ctypes.byref(entry))
+        while found:
+            processes.append(ProcessInfo(entry.th32ProcessID, entry.szExeFile))
+            found = kernel32.Process32NextW(handle, ctypes.byref(entry))
+    finally:
+        kernel32.CloseHandle(handle)
+    return processes
+
+
+def _tasklist_processes():
+    """Alternativa a Toolhelp32: una sola llamada a ``tasklist`` en formato CSV."""
+    result = subprocess.run(["tasklist", "/FO", "CSV", "/NH"], capture_output=True, text=True,
+                            creationflags=_NO_WINDOW, check=True)
+    return [ProcessInfo(int(row[1]), row[0]) for row in csv.reader(result.stdout.splitlines()) if len(row) > 1]
+
+
+def _proc_processes():
+    """Enumera los procesos leyendo ``/proc`` (Linux)."""
+    processes = []
+    for entry in os.scandir("/proc"):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(os.path.join(entry.path, "comm"), "r") as f:
+                name = f.read().strip()
+            if len(name) == 15:
+                # ``comm`` se trunca a 15 caracteres; el primer argumento tiene el nombre completo
+                with open(os.path.join(entry.path, "cmdline"), "rb") as f:
+                    argv0 = os.path.basename(f.read().split(b"\0", 1)[0].decode(errors="replace"))
+                if argv0.startswith(name):
+                    name = argv0
+        except OSError:
+            continue  # El proceso terminó mientras se leía
+        processes.append(ProcessInfo(int(entry.name), name))
+    return processes
+
+
+def _ps_processes():
+    result = subprocess.run(["ps", "-axo", "pid=,comm="], capture_output=True, text=True, check=True)
+    processes = []
+    for line in result.stdout.splitlines():
+        pid, _, command = line.strip().partition(" ")
+        if pid.isdigit():
+            processes.append(ProcessInfo(int(pid), os.path.basename(command.strip())))
+    return processes
+
+
+def list_processes():
+    """Devuelve los procesos en ejecución con el mecanismo más barato de la plataforma."""
+    if os.name == 'nt':
+        try:
+            return _windows_processes()
+        except (OSError, AttributeError, ImportError):
+            return _tasklist_processes()
+    if os.path.isdir("/proc/self"):
+        return _proc_processes()
+    return _ps_processes()
+
+
+class ProcessSnapshot:
+    """Instantánea de los procesos en ejecución para responder varias consultas sin volver a enumerarlos."""
+
+    def __init__(self, processes=None):
+        self.processes = list_processes() if processes is None else list(processes)
+        self._by_name = {}
+        for process in self.processes:
+            self._by_name.setdefault(process.name.lower(), []).append(process)
+
+    def find(self, names):
+        """Procesos cuyo nombre coincide (sin distinguir mayúsculas) con alguno de ``names``."""
+        found = []
+        for name in names:
+            found += self._by_name.get(name.lower(), [])
+        return found
+
+    def is_running(self, names):
+        return any(name.lower() in self._by_name for name in names)
+
+
+def _is_zombie(pid):
+    """Un proceso terminado que su padre aún no ha recogido ya no necesita cerrarse."""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            return f.read().rsplit(b")", 1)[1].split()[0] == b"Z"
+    except (OSError, IndexError):
+        return False
+
+
+def _alive(pids):
+    """Subconjunto de ``pids`` que sigue en ejecución."""
+    if os.name == 'nt':
+        running = {process.pid for process in list_processes()}
+        return {pid for pid in pids if pid in running}
+    alive = set()
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+            if not _is_zombie(pid):
+                alive.add(pid)
+        except ProcessLookupError:
+            pass
+        except PermissionError:
+            alive.add(pid)
+    return alive
+
+
+def _signal_all(pids, force):
+    """Envía a todos los ``pids`` a la vez la petición de cierre (o de terminación forzada)."""
+    if not pids:
+        return
+    if os.name == 'nt':
+        command = ["taskkill"] + (["/F"] if force else [])
+        for pid in sorted(pids):
+            command += ["/PID", str(pid)]
+        # taskkill devuelve error si algún proceso ya no existe; el resultado se comprueba después
+        subprocess.run(command, capture_output=True, creationflags=_NO_WINDOW)
+        return
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGKILL if force else signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+
+def _wait_gone(pids, timeout):
+    deadline = time.monotonic() + timeout
+    alive = _alive(pids)
+    while alive and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        alive = _alive(alive)
+    return alive
+
+
+def terminate_processes(processes, timeout=TERMINATE_TIMEOUT):
+    """Cierra los procesos en un solo lote: primero pide que terminen y, tras ``timeout`` segundos, los fuerza.
+
+    Devuelve ``(cerrados, forzados, fallidos)`` como conjuntos de identificadores.
+    """
+    pids = {process.pid for process in processes if process.pid != os.getpid()}
+    if not pids:
+        return set(), set(), set()
+    _signal_all(pids, force=False)
+    remaining = _wait_gone(pids, timeout)
+    failed = set()
+    if remaining:
+        _signal_all(remaining, force=True)
+        failed = _wait_gone(remaining, timeout)
+    return pids - remaining, remaining - failed, failed
+
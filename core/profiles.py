@@ -0,0 +1,207 @@
+import os
+import json
+import threading
+import configparser
+from pathlib import Path
+
+# Raíz de los datos de cada navegador: variable de entorno y ruta relativa a ella
+BROWSER_ROOTS = {
+    "Firefox": ("APPDATA", ("Mozilla", "Firefox")),
+    "Chrome": ("LOCALAPPDATA", ("Google", "Chrome", "User Data")),
+    "Edge": ("LOCALAPPDATA", ("Microsoft", "Edge", "User Data")),
+}
+
+# Subdirectorios de caché de cada perfil que se pueden vaciar sin perder datos del usuario
+CACHE_SUBPATHS = {
+    "Firefox": ("cache2", "startupCache"),
+    "Chrome": ("Cache", "Code Cache", "GPUCache", os.path.join("Service Worker", "CacheStorage")),
+    "Edge": ("Cache", "Code Cache", "GPUCache", os.path.join("Service Worker", "CacheStorage")),
+}
+
+
+def env_path(variable, *parts):
+    """Ruta ``parts`` bajo la variable de entorno ``variable``, o ``None`` si no está definida (p. ej. en Linux)."""
+    base = os.environ.get(variable)
+    return Path(base).joinpath(*parts) if base else None
+
+
+def browser_root(browser):
+    variable, parts = BROWSER_ROOTS[browser]
+    return env_path(variable, *parts)
+
+
+def _mtime_ns(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def directory_size(path):
+    """Suma el tamaño de los archivos bajo ``path`` con ``os.scandir`` y una pila explícita."""
+    total = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+class BrowserProfile:
+    """Perfil de un navegador; el tamaño de sus cachés se calcula la primera vez que se pide."""
+
+    def __init__(self, browser, name, path, cache_roots=None):
+        self.browser = browser
+        self.name = name
+        self.path = Path(path)
+        self.cache_roots = cache_roots or [self.path]
+        self._cache_size = None
+        self._lock = threading.Lock()
+
+    @property
+    def cache_paths(self):
+        """Directorios de ``CACHE_SUBPATHS`` que existen en el perfil (pueden aparecer con el uso)."""
+        return [root / subpath for root in self.cache_roots
+                for subpath in CACHE_SUBPATHS[self.browser] if (root / subpath).is_dir()]
+
+    @property
+    def cache_size(self):
+        """Bytes ocupados por las cachés del perfil."""
+        if self._cache_size is None:
+            size = sum(directory_size(path) for path in self.cache_paths)
+            with self._lock:
+                self._cache_size = size
+        return self._cache_size
+
+    def invalidate(self):
+        """Olvida el tamaño calculado (por ejemplo, después de limpiar las cachés)."""
+        with self._lock:
+            self._cache_size = None
+
+    def __repr__(self):
+        return f"BrowserProfile({self.browser!r}, {self.name!r}, {str(self.path)!r})"
+
+
+def _firefox_local_root(profile_path, roaming_root):
+    """Copia local del perfil (``LOCALAPPDATA``), donde Firefox guarda la caché."""
+    local_root = env_path("LOCALAPPDATA", "Mozilla", "Firefox")
+    if local_root is None:
+        return None
+    try:
+        return local_root / profile_path.relative_to(roaming_root)
+    except ValueError:
+        return None  # Perfil con ruta absoluta fuera de APPDATA
+
+
+def read_firefox_profiles(root):
+    """Lee los perfiles de ``profiles.ini``, respetando ``IsRelative`` de cada uno."""
+    parser = configparser.ConfigParser(interpolation=None, strict=False)
+    parser.optionxform = str  # Las claves del archivo distinguen mayúsculas
+    try:
+        parser.read(root / 'profiles.ini', encoding="utf-8")
+    except configparser.Error:
+        return []
+    profiles = []
+    for section in parser.sections():
+        if not section.startswith("Profile") or not parser.has_option(section, "Path"):
+            continue
+        path = parser.get(section, "Path")
+        if parser.get(section, "IsRelative", fallback="1").strip() == "1":
+            profile_path = root.joinpath(*path.replace("\\", "/").split("/"))
+        else:
+            profile_path = Path(path)
+        cache_roots = [profile_path]
+        local_path = _firefox_local_root(profile_path, root)
+        if local_path is not None:
+            cache_roots.append(local_path)
+        profiles.append(BrowserProfile("Firefox", parser.get(section, "Name", fallback=section), profile_path,
+                                       cache_roots))
+    return profiles
+
+
+def read_chromium_profiles(browser, root):
+    """Lee los perfiles de un navegador basado en Chromium desde ``Local State``.
+
+    Si el archivo no existe o no es válido se listan ``Default`` y los ``Profile N`` de ``User Data``.
+    """
+    names = {}
+    try:
+        with open(root / 'Local State', "r", encoding="utf-8") as f:
+            info_cache = json.load(f).get("profile", {}).get("info_cache", {})
+        names = {directory: (info or {}).get("name", directory) for directory, info in info_cache.items()}
+    except (OSError, ValueError, AttributeError):
+        pass
+    if not names:
+        names = {'Default': 'Default'}
+        try:
+            with os.scandir(root) as entries:
+                names.update((entry.name, entry.name) for entry in entries
+                             if entry.name.startswith('Profile ') and entry.is_dir())
+        except OSError:
+            return []
+    ordered = sorted(names, key=lambda directory: (directory != 'Default', directory))
+    return [BrowserProfile(browser, names[directory], root / directory) for directory in ordered
+            if (root / directory).is_dir()]
+
+
+class ProfileRegistry:
+    """Perfiles de cada navegador, guardados hasta que cambia el archivo del que se leyeron.
+
+    La clave de cada navegador incluye la raíz (según las variables de entorno) y el ``mtime``
+    de ``profiles.ini`` o de ``Local State`` y del directorio ``User Data``, así que escaneos,
+    vistas previas y ejecuciones programadas repetidas no vuelven a leer nada si no cambió.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _key(self, browser, root):
+        if browser == "Firefox":
+            return str(root), _mtime_ns(root / 'profiles.ini')
+        return str(root), _mtime_ns(root / 'Local State'), _mtime_ns(root)
+
+    def profiles(self, browser):
+        """Devuelve la lista de ``BrowserProfile`` del navegador (vacía si no está instalado)."""
+        if browser not in BROWSER_ROOTS:
+            return []
+        root = browser_root(browser)
+        if root is None:
+            return []
+        key = self._key(browser, root)
+        with self._lock:
+            cached = self._entries.get(browser)
+            if cached is not None and cached[0] == key:
+                return list(cached[1])
+        if browser == "Firefox":
+            profiles = read_firefox_profiles(root)
+        else:
+            profiles = read_chromium_profiles(browser, root)
+        with self._lock:
+            self._entries[browser] = (key, profiles)
+        return list(profiles)
+
+    def cache_sizes(self, browsers=("Firefox", "Chrome", "Edge")):
+        """Devuelve ``(perfil, bytes)`` con el tamaño de caché de cada perfil de ``browsers``."""
+        return [(profile, profile.cache_size) for browser in browsers for profile in self.profiles(browser)]
+
+    def invalidate(self, browser=None):
+        """Olvida los perfiles de ``browser`` (o de todos) para volver a leerlos en la próxima consulta."""
+        with self._lock:
+            if browser is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(browser, None)
+
+
+registry = ProfileRegistry()
@@ -0,0 +1,89 @@
+import os
+import time
+import threading
+
+# Frecuencia máxima de notificación del progreso a la interfaz
+DEFAULT_FPS = 10
+# Trabajo fijo que se atribuye a cada archivo además de sus bytes, para que los archivos vacíos también avancen
+FILE_COST = 4096
+
+
+def work_units(files, size):
+    return size + files * FILE_COST
+
+
+class TargetProgress:
+    """Avance de un objetivo dentro de un ``ProgressTracker``; varios pueden avanzar a la vez desde distintos hilos."""
+
+    def __init__(self, tracker, units):
+        self.tracker = tracker
+        self.units = units
+        self.done = 0
+
+    def advance(self, size, files=1):
+        self.tracker._advance(self, work_units(files, size))
+
+    def end(self):
+        self.tracker._end(self)
+
+
+class ProgressTracker:
+    """Progreso de una limpieza ponderado por bytes, a partir de un conteo previo de cada objetivo.
+
+    ``plan`` recibe las estimaciones de ``core.scan.estimate_cleanup``; durante el borrado,
+    ``begin_target`` devuelve un ``TargetProgress`` por objetivo, cuyo ``advance`` suma lo
+    eliminado y cuyo ``end`` lo cierra. El avance de un objetivo nunca supera su estimación y al
+    terminarlo se ajusta a ella. ``callback(fracción)`` se llama como mucho ``fps`` veces por
+    segundo, así que actualizar el progreso por cada archivo no frena el borrado aunque el árbol
+    tenga millones de entradas.
+    """
+
+    def __init__(self, callback, fps=DEFAULT_FPS):
+        self.callback = callback
+        self.interval = 1.0 / fps if fps else 0.0
+        self.total = 0
+        self.done = 0
+        self._planned = {}
+        self._last_update = 0.0
+        self._lock = threading.Lock()
+
+    def plan(self, estimates):
+        """Registra el trabajo previsto de cada objetivo (``TargetEstimate``)."""
+        with self._lock:
+            for estimate in estimates:
+                units = work_units(estimate.files, estimate.bytes)
+                key = os.path.normpath(str(estimate.path))
+                self._planned[key] = self._planned.get(key, 0) + units
+                self.total += units
+
+    def begin_target(self, path, files=0, size=0):
+        """Empieza un objetivo; si no estaba planificado se usan ``files`` y ``size`` como estimación."""
+        with self._lock:
+            units = self._planned.pop(os.path.normpath(str(path)), None)
+            if units is None:
+                units = work_units(files, size)
+                self.total += units
+        return TargetProgress(self, units)
+
+    def _advance(self, target, units):
+        with self._lock:
+            units = min(units, target.units - target.done)
+            target.done += units
+            self.done += units
+            now = time.perf_counter()
+            if now - self._last_update < self.interval:
+                return
+            self._last_update = now
+            fraction = self.fraction()
+        self.callback(fraction)
+
+    def _end(self, target):
+        with self._lock:
+            self.done += target.units - target.done
+            target.done = target.units
+            self._last_update = time.perf_counter()
+            fraction = self.fraction()
+        self.callback(fraction)
+
+    def fraction(self):
+        return min(self.done / self.total, 1.0) if self.total else 0.0
@@ -0,0 +1,136 @@
+import os
+import time
+import threading
+from core.storage import device_key
+
+# Espera máxima entre comprobaciones: un cambio de límite o una cancelación se notan enseguida
+MAX_SLEEP = 0.2
+MB = 1024 * 1024
+
+
+class TokenBucket:
+    """Cubo de fichas con ``rate`` fichas por segundo y capacidad ``burst`` (por defecto, un segundo).
+
+    Una petición mayor que la capacidad se concede con el cubo lleno y deja saldo negativo,
+    que las siguientes esperan a recuperar. ``rate=None`` no limita. El ritmo se puede
+    cambiar en cualquier momento, también con hilos esperando.
+    """
+
+    def __init__(self, rate=None, burst=None):
+        self._lock = threading.Lock()
+        self._tokens = None
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate, burst=None):
+        with self._lock:
+            self.rate = rate or None
+            self.burst = burst or self.rate or 0
+            self._stamp = time.monotonic()
+            self._tokens = self.burst if self._tokens is None else min(self._tokens, self.burst)
+
+    def _reserve(self, amount):
+        """Toma ``amount`` fichas si hay bastantes; si no, devuelve los segundos que faltan."""
+        with self._lock:
+            if self.rate is None:
+                return 0
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            needed = min(amount, self.burst)
+            if self._tokens >= needed:
+                self._tokens -= amount
+                return 0
+            return (needed - self._tokens) / self.rate
+
+    def consume(self, amount, cancel=None):
+        """Espera hasta poder tomar ``amount`` fichas; deja de esperar si se activa ``cancel``."""
+        while self.rate is not None:
+            wait = self._reserve(amount)
+            if not wait or (cancel is not None and cancel.is_set()):
+                return
+            time.sleep(min(wait, MAX_SLEEP))
+
+
+class DeviceBudget:
+    """Presupuesto de E/S de un dispositivo: un cubo de bytes por segundo y otro de operaciones."""
+
+    def __init__(self, key, bytes_per_sec=None, ops_per_sec=None, cancel=None):
+        self.key = key
+        self.bytes = TokenBucket(bytes_per_sec)
+        self.ops = TokenBucket(ops_per_sec)
+        self.cancel = cancel
+
+    def set_limits(self, bytes_per_sec=None, ops_per_sec=None):
+        self.bytes.set_rate(bytes_per_sec)
+        self.ops.set_rate(ops_per_sec)
+
+    def acquire(self, nbytes=0):
+        """Consume una operación de E/S de ``nbytes`` bytes (0 para borrar o renombrar)."""
+        self.ops.consume(1, self.cancel)
+        if nbytes:
+            self.bytes.consume(nbytes, self.cancel)
+
+
+class RateLimiter:
+    """Limitador de E/S compartido por todas las fases de una limpieza, con un presupuesto por dispositivo.
+
+    Cada dispositivo (``core.storage.device_key``) tiene sus propios límites: los de
+    ``devices`` (``{ruta: {"mb_per_sec", "ops_per_sec"}}``) para el volumen de esa ruta y los
+    generales para los demás. ``configure`` cambia los límites en plena ejecución. Tras
+    activarse ``cancel`` ya no se espera, para que la limpieza llegue pronto al punto de
+    cancelación. Mientras no hay ningún límite (``active`` es falso) el borrado no consulta
+    el limitador.
+    """
+
+    def __init__(self, mb_per_sec=None, ops_per_sec=None, devices=None, cancel=None):
+        self.cancel = cancel
+        self._lock = threading.Lock()
+        self._budgets = {}
+        self.configure(mb_per_sec, ops_per_sec, devices)
+
+    @classmethod
+    def from_settings(cls, settings, cancel=None, optional=True):
+        """Crea el limitador a partir de ``config["rate_limit"]``.
+
+        Con ``optional`` devuelve ``None`` si no hay ningún límite configurado; sin ``optional``
+        siempre lo crea, para poder activar límites más tarde con ``configure``.
+        """
+        settings = settings or {}
+        if optional and not (settings.get("mb_per_sec") or settings.get("ops_per_sec") or settings.get("devices")):
+            return None
+        return cls(settings.get("mb_per_sec"), settings.get("ops_per_sec"), settings.get("devices"), cancel)
+
+    def configure(self, mb_per_sec=None, ops_per_sec=None, devices=None):
+        """Fija los límites generales y por dispositivo; afecta también a las esperas en curso."""
+        overrides = {}
+        for path, limits in (devices or {}).items():
+            key = device_key(os.path.expandvars(path))
+            if key is not None:
+                overrides[key] = limits
+        with self._lock:
+            self.mb_per_sec = mb_per_sec
+            self.ops_per_sec = ops_per_sec
+            self._overrides = overrides
+            self.active = bool(mb_per_sec or ops_per_sec or any(
+                limits.get("mb_per_sec") or limits.get("ops_per_sec") for limits in overrides.values()))
+            for budget in self._budgets.values():
+                budget.set_limits(*self._limits(budget.key))
+
+    def _limits(self, key):
+        limits = self._overrides.get(key, {})
+        mb_per_sec = limits.get("mb_per_sec", self.mb_per_sec)
+        return (mb_per_sec * MB if mb_per_sec else None), limits.get("ops_per_sec", self.ops_per_sec)
+
+    def device(self, directory):
+        """Presupuesto del dispositivo que contiene ``directory``.
+
+        Cada llamada consulta el dispositivo con ``stat``: quien borra muchos archivos guarda el
+        presupuesto (una vez por objetivo) en lugar de pedirlo para cada directorio.
+        """
+        directory = str(directory)
+        key = device_key(directory) if os.path.exists(directory) else None
+        with self._lock:
+            budget = self._budgets.get(key)
+            if budget is None:
+                budget = self._budgets[key] = DeviceBudget(key, *self._limits(key), cancel=self.cancel)
+        return budget
@@ -0,0 +1,26 @@
+from core.cleanup import delete_file_list, log_message
+from core.policies import select_victims
+from core.scan import scan_cleanup, format_size
+
+
+def reclaim_space(config, budget_bytes, order="largest", secure=False, backup_directory=None, gui_output=None,
+                  progress=None, control=None, limiter=None):
+    """Libera al menos ``budget_bytes`` eliminando solo los archivos necesarios.
+
+    Recorre una vez los objetivos de ``config`` (un ``CleanupPlan`` o una configuración, con sus
+    exclusiones y políticas), elige con un montículo acotado los archivos más grandes o más
+    antiguos según ``order`` y los elimina en orden de ruta, informando a ``progress`` del
+    avance; ``control`` permite pausar o cancelar el borrado y ``limiter`` limita su ritmo de
+    E/S. Devuelve el ``DeletionStats`` del borrado.
+    """
+    victims, total = select_victims((entry for _, entry in scan_cleanup(config)), budget_bytes, order)
+    log_message(f"Recuperación por presupuesto: {len(victims)} archivos seleccionados ({format_size(total)}) "
+                f"para liberar {format_size(budget_bytes)}.", "INFO", gui_output)
+    victims.sort(key=lambda entry: entry.path)
+    target_progress = progress.begin_target("reclaim", len(victims), total) if progress is not None else None
+    stats = delete_file_list(((entry.path, entry.size) for entry in victims), secure, backup_directory, gui_output,
+                             target_progress, control, limiter)
+    if target_progress is not None:
+        target_progress.end()
+    log_message(f"Recuperación por presupuesto: {stats.summary()}", "INFO", gui_output)
+    return stats
@@ -0,0 +1,149 @@
+import os
+import uuid
+import shutil
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from core.backup_store import BackupStore, READ_SIZE
+
+CONFLICT_POLICIES = ("skip", "overwrite", "rename")
+
+
+def _prefix_clause(prefix):
+    """Condición para ``prefix`` y todo lo que hay bajo él, con rangos que usan el índice por ruta.
+
+    El prefijo acaba en un componente completo: ``/a/foo`` incluye ``/a/foo/x`` pero no ``/a/foobar``.
+    """
+    prefix = os.path.normpath(str(prefix))
+    directory = prefix if prefix.endswith(os.sep) else prefix + os.sep
+    return "(path = ? OR (path >= ? AND path < ?))", [prefix, directory, directory + "\U0010ffff"]
+
+
+def _build_query(prefix=None, pattern=None, limit=None):
+    query = "SELECT path, blob, size, mtime FROM files"
+    clauses, params = [], []
+    if prefix:
+        clause, clause_params = _prefix_clause(prefix)
+        clauses.append(clause)
+        params.extend(clause_params)
+    if pattern:
+        clauses.append("path GLOB ?")
+        params.append(pattern)
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += " ORDER BY path"
+    if limit:
+        query += " LIMIT ?"
+        params.append(int(limit))
+    return query, params
+
+
+def list_runs(backup_directory):
+    """Devuelve ``(run_id, archivos, bytes)`` de cada ejecución, de la más antigua a la más reciente.
+
+    Los totales se leen de la tabla ``totals`` de cada manifiesto, sin contar sus filas.
+    """
+    store = BackupStore(backup_directory)
+    return [(run_id, *store.run_totals(run_id)) for run_id in store.list_runs()]
+
+
+def find_files(backup_directory, run_id, prefix=None, pattern=None, limit=None):
+    """Genera las entradas del manifiesto de ``run_id`` que empiezan por ``prefix`` y/o cumplen el glob ``pattern``.
+
+    La búsqueda por prefijo usa el índice por ruta del manifiesto, por lo que no recorre la
+    ejecución completa.
+    """
+    query, params = _build_query(prefix, pattern, limit)
+    for row in BackupStore(backup_directory).iter_manifest(run_id, query, params):
+        yield dict(row)
+
+
+class RestoreStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.restored = 0
+        self.skipped = 0
+        self.errors = []
+
+    def add(self, outcome, detail=None):
+        with self._lock:
+            if outcome == "restored":
+                self.restored += 1
+            elif outcome == "skipped":
+                self.skipped += 1
+            else:
+                self.errors.append(detail)
+
+    def summary(self):
+        return f"{self.restored} archivos restaurados, {self.skipped} omitidos, {len(self.errors)} errores"
+
+
+def _restore_destination(original_path, target_root):
+    original_path = Path(original_path)
+    if target_root is None:
+        return original_path
+    return Path(target_root) / original_path.relative_to(original_path.anchor)
+
+
+def _free_name(path):
+    """Devuelve una ruta libre junto a ``path`` añadiendo ``.restaurado-N`` al nombre."""
+    counter = 1
+    while True:
+        candidate = path.with_name(f"{path.stem}.restaurado-{counter}{path.suffix}")
+        if not candidate.exists():
+            return candidate
+        counter += 1
+
+
+def _restore_one(store, record, target_root, conflict, stats):
+    destination = _restore_destination(record["path"], target_root)
+    try:
+        if destination.exists():
+            if conflict == "skip":
+                stats.add("skipped")
+                return
+            if conflict == "rename":
+                destination = _free_name(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with store.open_blob(record["blob"]) as src, open(temp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, READ_SIZE)
+            if record["mtime"] is not None:
+                os.utime(temp_path, (record["mtime"], record["mtime"]))
+            os.replace(temp_path, destination)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+        stats.add("restored")
+    except Exception as e:
+        stats.add("error", f"{record['path']}: {e}")
+
+
+def restore_run(backup_directory, run_id, prefix=None, pattern=None, target_root=None, conflict="skip", workers=8):
+    """Restaura una ejecución completa o el subárbol ``prefix`` / glob ``pattern``.
+
+    Los archivos se copian en paralelo a su ruta original o bajo ``target_root``. Si el destino
+    ya existe, ``conflict`` decide: ``skip`` lo conserva, ``overwrite`` lo reemplaza y
+    ``rename`` restaura junto a él con otro nombre. Devuelve un ``RestoreStats``.
+    """
+    if conflict not in CONFLICT_POLICIES:
+        raise ValueError(f"Política de conflicto desconocida: {conflict}")
+    store = BackupStore(backup_directory)
+    stats = RestoreStats()
+    query, params = _build_query(prefix, pattern)
+    workers = max(1, workers)
+    # Limita las tareas en cola para no cargar en memoria el manifiesto completo
+    slots = threading.BoundedSemaphore(workers * 4)
+
+    def task(record):
+        try:
+            _restore_one(store, record, target_root, conflict, stats)
+        finally:
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for row in store.iter_manifest(run_id, query, params):
+            slots.acquire()
+            pool.submit(task, dict(row))
+    return stats
@@ -0,0 +1,202 @@
+import time
+import sqlite3
+from core.cleanup import delete_files_in_directory, log_message, set_log_summary
+from core.backup_store import BackupStore, default_backup_directory
+from core.metrics import RunMetrics, emit_metrics
+from core.progress import ProgressTracker, DEFAULT_FPS
+from core.journal import RunJournal
+from core.snapshot import exclusions_fingerprint
+from core.ratelimit import RateLimiter
+from core.plan import compile_plan
+from core.history import RunHistory
+
+BROWSERS = ["Edge", "Chrome", "Firefox", "Safari"]
+
+
+def run_cleanup(config, gui_output=None, on_step=None, report=None, optimize=True, estimate=True,
+                on_progress=None, progress_fps=DEFAULT_FPS, control=None, resume=True,
+                limiter=None):
+    """Ejecuta una limpieza completa con ``config`` sin depender de la interfaz gráfica.
+
+    ``config`` es un ``core.plan.CleanupPlan`` o una configuración, que se compila en uno.
+
+    - ``on_step(paso, total)`` se llama al terminar cada fase.
+    - ``report(mensaje)`` recibe las líneas del informe de la ejecución (por defecto van al log).
+    - ``optimize`` activa la optimización de disco y ``estimate`` la estimación previa.
+    - ``on_progress(fracción)`` recibe el progreso real, ponderado por bytes a partir de un
+      conteo previo de cada objetivo, como mucho ``progress_fps`` veces por segundo.
+    - ``control`` (``core.control.RunControl``) permite pausar o cancelar la ejecución; si se
+      cancela no se pasa a las fases siguientes y el estado del resumen es ``cancelled``.
+    - Los directorios procesados se anotan en un diario (``core.journal``); con ``resume`` una
+      ejecución interrumpida con la misma configuración se retoma donde se quedó.
+    - ``limiter`` (``core.ratelimit.RateLimiter``) limita la E/S de todas las fases de borrado;
+      por defecto se crea con ``config["rate_limit"]``, solo si tiene algún límite. Sus límites
+      se pueden cambiar durante la ejecución con ``limiter.configure``.
+
+    Devuelve un diccionario serializable con el resumen de la ejecución; en ``metrics`` van los
+    tiempos y contadores por fase y objetivo, que también se escriben en los destinos de
+    ``config["metrics"]`` (``jsonl`` y/o ``prometheus``). El resumen y las líneas del informe
+    se guardan en el historial de ejecuciones (``core.history``).
+    """
+    sink = report or (lambda message: log_message(message, "INFO", gui_output))
+    report_lines = []
+
+    def report(message):
+        report_lines.append(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}")
+        sink(message)
+
+    on_step = on_step or (lambda step, total: None)
+    total_steps = 4
+    started = time.perf_counter()
+    metrics = RunMetrics()
+    summary = {"status": "ok", "started": time.time(), "directories": [], "browsers": [], "backup": None,
+               "disk_report": None, "files": 0, "bytes": 0, "errors": 0}
+
+    plan = compile_plan(config)
+    secure = plan.get("secure_delete", False)
+    workers = plan.get("workers", "auto")
+    incremental = plan.get("incremental", False)
+    set_log_summary(plan.get("log_summary", False))
+    if limiter is None:
+        limiter = RateLimiter.from_settings(plan.get("rate_limit"),
+                                            control.cancel_event if control is not None else None)
+    for path, covering in plan.merged:
+        if path == covering:
+            report(f"{path} aparece más de una vez en la configuración; se limpia una sola vez.")
+        else:
+            report(f"{path} ya se limpia como parte de {covering}; no se recorre por separado.")
+
+    reclaim = plan.get("reclaim") or {}
+    phase = "reclaim" if reclaim.get("budget_gb") else "directories"
+    # El borrado ocupa toda la barra salvo la parte reservada a la optimización de disco
+    deletion_share = 0.9 if optimize else 1.0
+    progress = None
+    if on_progress is not None:
+        progress = ProgressTracker(lambda fraction: on_progress(fraction * deletion_share), progress_fps)
+
+    if estimate or progress is not None:
+        # Un único recorrido previo sirve para la estimación y para repartir el progreso
+        from core.scan import estimate_cleanup, format_estimate
+        with metrics.phase("estimate"):
+            estimates = estimate_cleanup(plan)
+            if estimate:
+                for line in format_estimate(estimates):
+                    report(f"Estimación: {line}")
+            if progress is not None:
+                if phase == "reclaim":
+                    # Los archivos a eliminar de los directorios solo se conocen tras elegirlos
+                    directories = {target.path for target in plan.targets}
+                    estimates = [e for e in estimates if e.path not in directories]
+                progress.plan(estimates)
+
+    if plan.get("backup", False):
+        # Una sola ejecución del almacén de respaldos para toda la limpieza
+        backup_store = BackupStore(default_backup_directory())
+        backup_run = backup_store.begin_run()
+    else:
+        backup_store = backup_run = None
+
+    def add_stats(phase, target, stats):
+        metrics.add_target(phase, target, stats)
+        if phase != "browsers":
+            summary["directories"].append(dict(stats.as_dict(), target=str(target)))
+        summary["files"] += stats.files
+        summary["bytes"] += stats.bytes
+        summary["errors"] += stats.errors
+
+    journal = None
+    if phase == "directories":
+        journal = RunJournal(exclusions_fingerprint(*plan.fingerprint()), resume=resume)
+        if journal.resumed:
+            report(f"Retomando la ejecución interrumpida: {len(journal.targets)} objetivos ya completados.")
+
+    def cancelled():
+        return control is not None and control.cancelled
+
+    completed = False
+    try:
+        with metrics.phase(phase):
+            if reclaim.get("budget_gb"):
+                # Modo presupuesto: solo se elimina lo necesario para liberar el espacio indicado
+                from core.reclaim import reclaim_space
+                report(f"Recuperación de {reclaim['budget_gb']} GB iniciada.")
+                stats = reclaim_space(plan._replace(browsers=()), reclaim["budget_gb"] * 1024 ** 3,
+                                      reclaim.get("order", "largest"), secure, backup_run, gui_output,
+                                      progress, control, limiter)
+                add_stats(phase, "reclaim", stats)
+                report(f"Recuperación completada: {stats.summary()}")
+            else:
+                for target in plan.targets:
+                    path = target.path
+                    if cancelled():
+                        break
+                    if journal.target_done(path):
+                        report(f"Limpieza de {path} ya completada en la ejecución interrumpida.")
+                        continue
+                    report(f"Limpieza de {path} iniciada.")
+                    stats = delete_files_in_directory(path, target.matcher, secure, backup_run, gui_output, workers,
+                                                      incremental, target.policy, progress, control, journal,
+                                                      limiter)
+                    add_stats(phase, path, stats)
+                    if not stats.cancelled:
+                        report(f"Limpieza de {path} completada.")
+        completed = not cancelled()
+    finally:
+        if backup_run is not None:
+            backup_run.close()
+        if journal is not None:
+            # Si la ejecución no terminó el diario se conserva para retomarla
+            journal.close(completed)
+    on_step(1, total_steps)
+
+    if backup_store:
+        with metrics.phase("backup_retention"):
+            summary["backup"] = {"run_id": backup_run.run_id, "files": backup_run.files,
+                                 "new_blobs": backup_run.new_blobs}
+            report(f"Respaldo {backup_run.run_id}: {backup_run.files} archivos, "
+                   f"{backup_run.new_blobs} contenidos nuevos.")
+            max_gb = plan.get("backup_max_gb")
+            removed_runs, freed = backup_store.apply_retention(
+                plan.get("backup_keep_runs"), max_gb * 1024 ** 3 if max_gb else None)
+            if removed_runs:
+                report(f"Retención de respaldos: {len(removed_runs)} ejecuciones antiguas eliminadas, "
+                       f"{freed / (1024 * 1024):.2f} MB liberados.")
+    on_step(2, total_steps)
+
+    # Verificar si hay navegadores seleccionados antes de ejecutar cualquier acción de limpieza
+    browsers = [browser for browser in BROWSERS if browser in plan.browsers]
+    if browsers and not cancelled():
+        from core.browser_utils import clean_browser_cache
+        with metrics.phase("browsers"):
+            # clean_browser_cache cierra los navegadores seleccionados con una sola consulta de procesos
+            for browser, cache_path, stats in clean_browser_cache(gui_output, progress, browsers, control=control,
+                                                                  limiter=limiter):
+                add_stats("browsers", f"{browser}:{cache_path}", stats)
+        summary["browsers"] = browsers
+    on_step(3, total_steps)
+
+    if optimize and not cancelled():
+        from core.disk_utils import optimize_disk
+        with metrics.phase("disk"):
+            summary["disk_report"] = optimize_disk(gui_output,
+                                                   cancel=control.cancel_event if control is not None else None)
+    on_step(4, total_steps)
+    if on_progress is not None and not cancelled():
+        on_progress(1.0)
+
+    if cancelled():
+        summary["status"] = "cancelled"
+        report("Limpieza cancelada por el usuario.")
+    elif summary["errors"]:
+        summary["status"] = "errors"
+    summary["elapsed"] = round(time.perf_counter() - started, 3)
+    summary["metrics"] = metrics.as_record(summary["status"])
+    for error in emit_metrics(summary["metrics"], plan.get("metrics")):
+        log_message(f"No se pudieron escribir las métricas en {error}", "WARNING", gui_output)
+    report("Proceso de optimización finalizado.")
+    try:
+        with RunHistory(keep_runs=plan.get("history_keep_runs")) as history:
+            history.record(summary, report_lines, summary["disk_report"])
+    except (OSError, sqlite3.Error) as e:
+        log_message(f"No se pudo guardar la ejecución en el historial: {e}", "WARNING", gui_output)
+    return summary
@@ -0,0 +1,128 @@
+import os
+from collections import namedtuple
+from core.cleanup import expand_environment_variables
+from core.exclusions import compile_exclusions
+from core.snapshot import open_snapshot, exclusions_fingerprint
+from core.policies import RetentionPolicy
+from core.browser_utils import get_browser_cache_paths
+from core.plan import compile_plan
+
+# Entrada encontrada durante el escaneo: ruta, tamaño en bytes y fecha de modificación (epoch)
+ScanEntry = namedtuple("ScanEntry", ["path", "size", "mtime"])
+
+
+class TargetEstimate:
+    """Totales de archivos y bytes recuperables de un objetivo de limpieza."""
+
+    def __init__(self, target, path):
+        self.target = target
+        self.path = path
+        self.files = 0
+        self.bytes = 0
+
+    def add(self, entry):
+        self.files += 1
+        self.bytes += entry.size
+
+    def __repr__(self):
+        return f"TargetEstimate({self.target!r}, files={self.files}, bytes={self.bytes})"
+
+
+def format_size(num_bytes):
+    """Devuelve el tamaño en la unidad más legible (B, KB, MB, GB, TB)."""
+    size = float(num_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.2f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
+    return f"{size:.2f} TB"
+
+
+def iter_directory(directory, exclusions=None, incremental=False, policy=None):
+    """Recorre el directorio sin modificarlo y genera un ``ScanEntry`` por cada archivo.
+
+    Usa ``os.scandir`` para aprovechar la información de tipo y ``stat`` que ya devuelve el
+    sistema y una pila explícita en lugar de construir listas, por lo que la memoria no crece
+    con el tamaño del árbol. Con ``incremental`` se omiten los directorios que no cambiaron
+    desde la última limpieza (ver ``core.snapshot``) y con ``policy`` solo se generan los
+    archivos que la política permite eliminar.
+    """
+    matcher = compile_exclusions(exclusions)
+    policy = RetentionPolicy.from_config(policy)
+    directory = expand_environment_variables(str(directory))
+    snapshot = open_snapshot(directory, incremental,
+                             exclusions_fingerprint(matcher.source, policy.fingerprint() if policy else None))
+    stack = [(directory, matcher.node(directory))]
+    while stack:
+        current, node = stack.pop()
+        if snapshot is not None:
+            unchanged = snapshot.unchanged_subdirs(current)
+            if unchanged is not None:
+                stack.extend((os.path.join(current, name), matcher.child(node, name)) for name in unchanged)
+                continue
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    if matcher.matches(node, entry.name, entry.path):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, matcher.child(node, entry.name)))
+                            continue
+                        stat = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if policy is not None and not policy.allows(entry.name, stat.st_size, stat.st_mtime):
+                        continue
+                    yield ScanEntry(entry.path, stat.st_size, stat.st_mtime)
+        except OSError:
+            # Directorio inaccesible o eliminado durante el escaneo
+            continue
+
+
+def iter_cleanup_targets(plan):
+    """Genera ``(objetivo, ruta, política, exclusiones)`` para cada directorio del plan y caché de navegador seleccionada."""
+    for target in plan.targets:
+        yield target.name, target.path, target.policy, target.matcher
+
+    if plan.browsers:
+        for browser, cache_path in get_browser_cache_paths(plan.browsers):
+            yield f"Caché de {browser}", str(cache_path), None, plan.matcher
+
+
+def scan_cleanup(config):
+    """Genera ``(objetivo, ScanEntry)`` para todo lo que eliminaría una limpieza con ``config``, sin tocar nada.
+
+    ``config`` puede ser un ``CleanupPlan`` o una configuración, que se compila (``core.plan``).
+    """
+    plan = compile_plan(config)
+    incremental = plan.get("incremental", False)
+    for target, path, policy, matcher in iter_cleanup_targets(plan):
+        for entry in iter_directory(path, matcher, incremental, policy):
+            yield target, entry
+
+
+def estimate_cleanup(config):
+    """Calcula por objetivo el número de archivos y los bytes recuperables.
+
+    ``config`` puede ser un ``CleanupPlan`` o una configuración. Devuelve una lista de
+    ``TargetEstimate`` en el orden en el que se limpiarían los objetivos.
+    """
+    plan = compile_plan(config)
+    incremental = plan.get("incremental", False)
+    estimates = []
+    for target, path, policy, matcher in iter_cleanup_targets(plan):
+        estimate = TargetEstimate(target, path)
+        for entry in iter_directory(path, matcher, incremental, policy):
+            estimate.add(entry)
+        estimates.append(estimate)
+    return estimates
+
+
+def format_estimate(estimates):
+    """Devuelve las líneas de texto que describen una estimación para la GUI y los reportes."""
+    lines = [f"{e.target}: {e.files} archivos, {format_size(e.bytes)} recuperables ({e.path})" for e in estimates]
+    total_files = sum(e.files for e in estimates)
+    total_bytes = sum(e.bytes for e in estimates)
+    lines.append(f"Total estimado: {total_files} archivos, {format_size(total_bytes)} recuperables")
+    return lines
@@ -0,0 +1,352 @@
+import os
+import sys
+import json
+import time
+import ctypes
+import platform
+import threading
+import contextlib
+import subprocess
+from core.config import app_directory
+from core.cleanup import log_message
+from core.control import RunControl
+
+# Valores por defecto de ``config["schedule"]``
+SCHEDULE_DEFAULTS = {
+    "enabled": False,
+    "interval_days": 7,
+    "max_load": 0.5,            # Carga media de CPU (por núcleo) por debajo de la que el sistema está tranquilo
+    "max_disk_util": 0.2,       # Fracción de tiempo ocupado del disco más cargado para empezar o reanudar
+    "backoff_disk_util": 0.6,   # Por encima de esta fracción la limpieza se pausa hasta que baje
+    "idle_minutes": 10,         # Inactividad del usuario requerida (solo donde se puede medir)
+    "max_delay_hours": 12,      # Tras esta espera se ejecuta aunque no haya llegado una ventana tranquila
+    "check_interval": 60,
+}
+
+# Muestreo de la carga durante la limpieza para ceder el disco a otros procesos
+BACKOFF_INTERVAL = 5.0
+# Ventana de medida de la ocupación del disco
+SAMPLE_SECONDS = 5.0
+
+NICE_LEVEL = 19
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_WHO_PROCESS = 1
+# Número de la llamada ioprio_set según la arquitectura; en las demás se usa el comando ionice
+_IOPRIO_SET = {"x86_64": 251, "aarch64": 30, "i386": 289, "i686": 289, "armv7l": 314}
+
+PROCESS_MODE_BACKGROUND_BEGIN = 0x00100000
+PROCESS_MODE_BACKGROUND_END = 0x00200000
+
+
+def schedule_settings(config):
+    """Ajustes del programador: los de ``config["schedule"]`` sobre ``SCHEDULE_DEFAULTS``."""
+    return dict(SCHEDULE_DEFAULTS, **(config.get("schedule") or {}))
+
+
+def default_state_path():
+    return os.path.join(app_directory(), "data", "schedule.json")
+
+
+def _set_idle_io_priority(tid):
+    """Pasa el hilo ``tid`` a la clase de E/S ``idle``: solo usa el disco cuando nadie más lo hace."""
+    number = _IOPRIO_SET.get(platform.machine())
+    if number is not None:
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.syscall(number, IOPRIO_WHO_PROCESS, tid, IOPRIO_CLASS_IDLE << IOPRIO_CLASS_SHIFT) == 0:
+            return True
+    try:
+        return subprocess.run(["ionice", "-c", str(IOPRIO_CLASS_IDLE), "-p", str(tid)],
+                              capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+
+@contextlib.contextmanager
+def low_priority(gui_output=None):
+    """Ejecuta el bloque con prioridad baja de CPU y de E/S.
+
+    En Linux la prioridad (``nice`` e ``ioprio`` de clase ``idle``) es por hilo: se baja la del
+    hilo actual y la heredan los hilos que cree, como los del borrado en paralelo, sin afectar
+    a la interfaz. No se restaura al salir porque subirla requiere privilegios; el hilo debe
+    dedicarse a las limpiezas en segundo plano. En Windows se usa el modo de fondo del proceso
+    (CPU, E/S y memoria) mientras dura el bloque.
+    """
+    if os.name == 'nt':
+        kernel32 = ctypes.windll.kernel32
+        process = kernel32.GetCurrentProcess()
+        background = bool(kernel32.SetPriorityClass(process, PROCESS_MODE_BACKGROUND_BEGIN))
+        try:
+            yield
+        finally:
+            if background:
+                kernel32.SetPriorityClass(process, PROCESS_MODE_BACKGROUND_END)
+        return
+
+    if sys.platform.startswith("linux"):
+        tid = threading.get_native_id()
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, NICE_LEVEL)
+        except OSError as e:
+            log_message(f"No se pudo bajar la prioridad de CPU: {e}", "WARNING", gui_output)
+        if not _set_idle_io_priority(tid):
+            log_message("No se pudo bajar la prioridad de E/S.", "WARNING", gui_output)
+    else:
+        try:
+            os.nice(NICE_LEVEL)
+        except OSError as e:
+            log_message(f"No se pudo bajar la prioridad de CPU: {e}", "WARNING", gui_output)
+    yield
+
+
+def _physical_disks():
+    """Nombres de los discos físicos (sin particiones, loop, RAM ni dispositivos lógicos)."""
+    try:
+        return {name for name in os.listdir("/sys/block") if os.path.exists(f"/sys/block/{name}/device")}
+    except OSError:
+        return set()
+
+
+def _disk_io_ticks(disks):
+    """Milisegundos que cada disco ha pasado atendiendo E/S, según ``/proc/diskstats``."""
+    ticks = {}
+    try:
+        with open("/proc/diskstats", "r") as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) > 12 and fields[2] in disks:
+                    ticks[fields[2]] = int(fields[12])
+    except OSError:
+        pass
+    return ticks
+
+
+class _FileTime(ctypes.Structure):
+    _fields_ = [("low", ctypes.c_uint32), ("high", ctypes.c_uint32)]
+
+    @property
+    def value(self):
+        return (self.high << 32) | self.low
+
+
+class _LastInputInfo(ctypes.Structure):
+    _fields_ = [("cbSize", ctypes.c_uint), ("dwTime", ctypes.c_uint32)]
+
+
+def _windows_cpu_times():
+    idle, kernel, user = _FileTime(), _FileTime(), _FileTime()
+    ctypes.windll.kernel32.GetSystemTimes(ctypes.byref(idle), ctypes.byref(kernel), ctypes.byref(user))
+    # El tiempo de núcleo incluye el de inactividad
+    return idle.value, kernel.value + user.value
+
+
+def user_idle_seconds():
+    """Segundos desde la última entrada de teclado o ratón, o ``None`` si no se puede saber."""
+    if os.name != 'nt':
+        return None
+    info = _LastInputInfo(ctypes.sizeof(_LastInputInfo), 0)
+    if not ctypes.windll.user32.GetLastInputInfo(ctypes.byref(info)):
+        return None
+    return ((ctypes.windll.kernel32.GetTickCount() - info.dwTime) & 0xFFFFFFFF) / 1000
+
+
+class SystemLoad:
+    """Mide la carga del sistema entre dos lecturas: CPU, ocupación del disco más cargado e inactividad.
+
+    Cada valor es ``None`` si no se puede medir en este sistema; en ese caso no se tiene en
+    cuenta. La ocupación del disco se lee de ``/proc/diskstats`` (Linux).
+    """
+
+    def __init__(self):
+        self._disks = _physical_disks() if os.path.exists("/proc/diskstats") else set()
+        self._last = None
+
+    def _read(self):
+        cpu = _windows_cpu_times() if os.name == 'nt' else None
+        return time.monotonic(), _disk_io_ticks(self._disks), cpu
+
+    def sample(self, wait=SAMPLE_SECONDS, stop=None):
+        """Devuelve ``{"cpu", "disk", "idle"}`` medidos durante los últimos ``wait`` segundos."""
+        if self._last is None:
+            self._last = self._read()
+            if stop is not None:
+                stop.wait(wait)
+            else:
+                time.sleep(wait)
+        (then, ticks_then, cpu_then), (now, ticks_now, cpu_now) = self._last, self._read()
+        self._last = (now, ticks_now, cpu_now)
+        elapsed_ms = max((now - then) * 1000, 1)
+
+        disk = None
+        busy = [ticks_now[name] - ticks_then[name] for name in ticks_now if name in ticks_then]
+        if busy:
+            disk = min(1.0, max(busy) / elapsed_ms)
+        if cpu_now is not None:
+            total = cpu_now[1] - cpu_then[1]
+            cpu = 1 - (cpu_now[0] - cpu_then[0]) / total if total > 0 else None
+        else:
+            try:
+                cpu = os.getloadavg()[0] / (os.cpu_count() or 1)
+            except (OSError, AttributeError):
+                cpu = None
+        return {"cpu": cpu, "disk": disk, "idle": user_idle_seconds()}
+
+
+def is_quiet(load, settings):
+    """Indica si la carga medida permite empezar una limpieza en segundo plano."""
+    if load["cpu"] is not None and load["cpu"] > settings["max_load"]:
+        return False
+    if load["disk"] is not None and load["disk"] > settings["max_disk_util"]:
+        return False
+    return load["idle"] is None or load["idle"] >= settings["idle_minutes"] * 60
+
+
+class BackoffMonitor:
+    """Pausa la limpieza mientras el disco está ocupado por otros procesos.
+
+    Con la limpieza en marcha la ocupación incluye la suya, por eso se pausa por encima de
+    ``backoff_disk_util`` y solo se reanuda cuando, ya en pausa, baja de ``max_disk_util``.
+    No reanuda las pausas que no hizo él (por ejemplo, las del usuario).
+    """
+
+    def __init__(self, control, settings, gui_output=None, load=None):
+        self.control = control
+        self.settings = settings
+        self.gui_output = gui_output
+        self.load = load or SystemLoad()
+        self.backoffs = 0
+        self._paused = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if self._paused:
+            self.control.resume()
+
+    def _run(self):
+        while not self._stop.wait(BACKOFF_INTERVAL):
+            disk = self.load.sample(stop=self._stop)["disk"]
+            if disk is None:
+                return  # No se puede medir: no hay nada que vigilar
+            if not self._paused and not self.control.paused and disk > self.settings["backoff_disk_util"]:
+                self._paused = True
+                self.backoffs += 1
+                self.control.pause()
+                log_message(f"Disco ocupado al {disk:.0%}: limpieza en pausa hasta que baje la carga.",
+                            "INFO", self.gui_output)
+            elif self._paused and disk <= self.settings["max_disk_util"]:
+                self._paused = False
+                self.control.resume()
+                log_message("Carga de disco baja: se reanuda la limpieza.", "INFO", self.gui_output)
+
+
+def wait_for_quiet(settings, stop=None, gui_output=None, load=None):
+    """Espera una ventana de poca carga, como mucho ``max_delay_hours``; devuelve si llegó a tiempo."""
+    stop = stop or threading.Event()
+    load = load or SystemLoad()
+    deadline = time.monotonic() + settings["max_delay_hours"] * 3600
+    while not stop.is_set():
+        sample = load.sample(stop=stop)
+        if is_quiet(sample, settings):
+            return True
+        if time.monotonic() >= deadline:
+            log_message("No hubo una ventana de poca carga; la limpieza se ejecuta igualmente en segundo plano.",
+                        "WARNING", gui_output)
+            return False
+        stop.wait(settings["check_interval"])
+    return False
+
+
+def run_in_background(run, settings, stop=None, gui_output=None):
+    """Ejecuta ``run(control)`` con prioridad baja, tras esperar poca carga y cediendo el disco si sube.
+
+    ``run`` recibe el ``RunControl`` de la ejecución, con el que ``BackoffMonitor`` la pausa.
+    Devuelve lo que devuelva ``run``, o ``None`` si ``stop`` se activó antes de empezar.
+    """
+    stop = stop or threading.Event()
+    wait_for_quiet(settings, stop, gui_output)
+    if stop.is_set():
+        return None
+    control = RunControl()
+    with low_priority(gui_output), BackoffMonitor(control, settings, gui_output) as monitor:
+        result = run(control)
+    if monitor.backoffs:
+        log_message(f"La limpieza cedió el disco {monitor.backoffs} veces por carga de otros procesos.",
+                    "INFO", gui_output)
+    return result
+
+
+class Scheduler:
+    """Limpiezas periódicas en segundo plano que sobreviven a los reinicios.
+
+    La fecha de la próxima ejecución se guarda en ``data/schedule.json``; al arrancar se
+    retoma la que hubiera. Cuando llega, se espera una ventana de poca carga y la limpieza se
+    ejecuta con ``run_in_background`` en un hilo dedicado.
+    """
+
+    def __init__(self, run, settings, state_path=None, gui_output=None):
+        self.run = run
+        self.settings = settings
+        self.state_path = state_path or default_state_path()
+        self.gui_output = gui_output
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def interval(self):
+        return self.settings["interval_days"] * 24 * 3600
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state):
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            temp_path = f"{self.state_path}.tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+        except OSError as e:
+            log_message(f"No se pudo guardar la programación: {e}", "ERROR", self.gui_output)
+
+    def next_run(self):
+        """Marca de tiempo de la próxima limpieza; la primera vez se programa dentro de un intervalo."""
+        state = self._load_state()
+        if "next_run" not in state:
+            state["next_run"] = time.time() + self.interval
+            self._save_state(state)
+        return state["next_run"]
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+            next_run = time.strftime('%Y-%m-%d %H:%M', time.localtime(self.next_run()))
+            log_message(f"Próxima limpieza programada: {next_run}.", "INFO", self.gui_output)
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            remaining = self.next_run() - time.time()
+            if remaining > 0:
+                self._stop.wait(min(remaining, self.settings["check_interval"]))
+                continue
+            try:
+                run_in_background(self.run, self.settings, self._stop, self.gui_output)
+            except Exception as e:
+                log_message(f"Error en la limpieza programada: {e}", "ERROR", self.gui_output)
+            if not self._stop.is_set():
+                self._save_state({"last_run": time.time(), "next_run": time.time() + self.interval})
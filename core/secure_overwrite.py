@@ -0,0 +1,89 @@
+import os
+import time
+import uuid
+
+# Tamaño del bloque que se reutiliza en cada escritura
+CHUNK_SIZE = 1024 * 1024
+
+# Valor de relleno de cada pasada; ``None`` significa datos aleatorios
+PASS_PATTERNS = {
+    "zeros": (0x00,),
+    "ones": (0xFF,),
+    "random": (None,),
+    # DoD 5220.22-M: ceros, unos y una pasada final aleatoria
+    "dod": (0x00, 0xFF, None),
+}
+
+
+def build_passes(pattern="random", passes=3):
+    """Devuelve la secuencia de rellenos de las pasadas para el patrón indicado.
+
+    Los patrones de un solo valor se repiten ``passes`` veces; ``dod`` usa su propia secuencia.
+    """
+    if pattern not in PASS_PATTERNS:
+        raise ValueError(f"Patrón de sobrescritura desconocido: {pattern}")
+    fills = PASS_PATTERNS[pattern]
+    if len(fills) > 1:
+        return list(fills)
+    return list(fills) * max(1, passes)
+
+
+def _write_all(fd, data):
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def overwrite_file(file_path, fills, chunk_size=CHUNK_SIZE, throttle=None):
+    """Sobrescribe el archivo por bloques con cada relleno, sincronizando con disco entre pasadas.
+
+    La memoria usada es un único bloque de ``chunk_size`` bytes independientemente del tamaño
+    del archivo. Al terminar el archivo se trunca a cero bytes. ``throttle(bytes)`` se llama
+    antes de cada escritura para limitar el ritmo de E/S. Devuelve ``(bytes_escritos, segundos)``.
+    """
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    written = 0
+    started = time.perf_counter()
+    fd = os.open(file_path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        length = os.fstat(fd).st_size
+        for fill in fills:
+            if fill is not None:
+                buffer[:] = bytes((fill,)) * chunk_size
+            os.lseek(fd, 0, os.SEEK_SET)
+            remaining = length
+            while remaining > 0:
+                size = min(chunk_size, remaining)
+                if throttle is not None:
+                    throttle(size)
+                if fill is None:
+                    view[:size] = os.urandom(size)  # Se rellena el bloque reservado, sin otro búfer
+                _write_all(fd, view[:size])
+                remaining -= size
+            written += length
+            # Forzar cada pasada a disco para que la caché no las combine
+            os.fsync(fd)
+        os.ftruncate(fd, 0)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    return written, time.perf_counter() - started
+
+
+def shred_file(file_path, pattern="random", passes=3, chunk_size=CHUNK_SIZE, throttle=None):
+    """Sobrescribe, trunca, renombra con un nombre aleatorio y elimina el archivo.
+
+    Devuelve ``(tamaño_original, bytes_escritos, segundos)``.
+    """
+    file_path = os.fspath(file_path)
+    size = os.path.getsize(file_path)
+    written, elapsed = overwrite_file(file_path, build_passes(pattern, passes), chunk_size, throttle)
+    if throttle is not None:
+        throttle(0)
+    # Renombrar antes de eliminar para no dejar el nombre original en la entrada del directorio
+    anonymous_path = os.path.join(os.path.dirname(file_path), uuid.uuid4().hex)
+    os.replace(file_path, anonymous_path)
+    os.remove(anonymous_path)
+    return size, written, elapsed
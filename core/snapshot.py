@@ -0,0 +1,102 @@
+import os
+import json
+import time
+import hashlib
+from pathlib import Path
+from core.config import app_directory
+
+SNAPSHOT_VERSION = 2
+# Margen para relojes y sistemas de archivos de poca resolución (FAT guarda ``mtime`` cada 2 s)
+RACY_MARGIN_NS = 2 * 10 ** 9
+
+
+def default_snapshot_directory():
+    """Directorio de instantáneas junto al ejecutable de la aplicación."""
+    return os.path.join(app_directory(), "data", "snapshots")
+
+
+def exclusions_fingerprint(*parts):
+    """Huella de la configuración que decide qué se elimina; si cambia la instantánea deja de valer."""
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class DirectorySnapshot:
+    """Estado de los directorios que quedaron tras la última limpieza de una raíz.
+
+    Por cada directorio que sobrevivió a la limpieza sin errores se guarda su ``mtime_ns``,
+    su inodo y los subdirectorios que conserva. Si en la siguiente ejecución el directorio
+    tiene el mismo ``mtime_ns`` e inodo, sus entradas directas no han cambiado: no hay
+    archivos nuevos que eliminar y basta con bajar a los subdirectorios guardados, sin
+    volver a listarlo.
+
+    El estado se toma al final, después del listado: un archivo creado entre el listado y
+    ese momento quedaría dentro del ``mtime`` guardado. Por eso, como hace git con las
+    entradas "racily clean", no se confía en un directorio cuyo ``mtime`` no es anterior
+    al inicio de la limpieza que lo guardó (``started``), y se vuelve a listar.
+    """
+
+    def __init__(self, root, snapshot_directory=None, fingerprint=""):
+        self.root = os.path.normpath(str(root))
+        self.fingerprint = fingerprint
+        snapshot_directory = Path(snapshot_directory or default_snapshot_directory())
+        name = hashlib.sha1(os.path.normcase(self.root).encode("utf-8")).hexdigest()
+        self.path = snapshot_directory / f"{name}.json"
+        self.previous_started = 0
+        self.previous = self._load()
+        self.current = {}
+        self.started = time.time_ns()  # Antes de listar ningún directorio
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != SNAPSHOT_VERSION or data.get("fingerprint") != self.fingerprint:
+            return {}
+        self.previous_started = data.get("started", 0)
+        return data.get("directories", {})
+
+    def unchanged_subdirs(self, directory, stat=None):
+        """Devuelve los subdirectorios guardados si ``directory`` no cambió desde la última limpieza, o ``None``."""
+        recorded = self.previous.get(os.path.normpath(str(directory)))
+        if recorded is None:
+            return None
+        try:
+            stat = stat or os.stat(directory)
+        except OSError:
+            return None
+        mtime_ns, inode, subdirs = recorded
+        if stat.st_mtime_ns != mtime_ns or stat.st_ino != inode:
+            return None
+        if mtime_ns >= self.previous_started - RACY_MARGIN_NS:
+            return None  # Cambió durante la limpieza anterior: pudo hacerlo después del listado
+        return subdirs
+
+    def record(self, directory, subdirs):
+        """Anota el estado final de un directorio que quedó limpio (solo conserva lo excluido)."""
+        try:
+            stat = os.stat(directory)
+        except OSError:
+            return
+        self.current[os.path.normpath(str(directory))] = [stat.st_mtime_ns, stat.st_ino, sorted(subdirs)]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": SNAPSHOT_VERSION, "fingerprint": self.fingerprint, "started": self.started,
+                       "directories": self.current}, f, separators=(",", ":"))
+        os.replace(temp_path, self.path)
+
+
+def open_snapshot(root, incremental, fingerprint=""):
+    """Devuelve la instantánea de ``root`` si el modo incremental está activo.
+
+    ``incremental`` puede ser ``True`` (ubicación predeterminada) o el directorio donde
+    guardar las instantáneas.
+    """
+    if not incremental:
+        return None
+    snapshot_directory = None if incremental is True else incremental
+    return DirectorySnapshot(root, snapshot_directory, fingerprint)
@@ -0,0 +1,170 @@
+import os
+import json
+import time
+import threading
+import subprocess
+from core.config import app_directory
+
+# Tipos de medio que se distinguen
+SSD = "ssd"
+HDD = "hdd"
+UNKNOWN = "unknown"
+
+# Vigencia de la caché en disco, que solo se usa en Windows: allí cuesta lanzar PowerShell. En Linux
+# la consulta a sysfs es barata y los números de dispositivo (dm-, nvme, loop) cambian entre arranques
+CACHE_TTL = 7 * 24 * 3600
+
+# Hilos de borrado según el medio: el acceso aleatorio es barato en SSD/NVMe y caro en discos giratorios
+STRATEGY_WORKERS = {SSD: 16, HDD: 1, UNKNOWN: 4}
+
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+_lock = threading.Lock()
+_memory_cache = {}
+_disk_cache = None
+
+
+def default_cache_path():
+    return os.path.join(app_directory(), "data", "storage.json")
+
+
+def _load_disk_cache():
+    global _disk_cache
+    if _disk_cache is None:
+        try:
+            with open(default_cache_path(), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = {}
+        now = time.time()
+        _disk_cache = {key: value for key, value in entries.items()
+                       if isinstance(value, list) and now - value[1] < CACHE_TTL}
+    return _disk_cache
+
+
+def _save_disk_cache():
+    path = default_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(_disk_cache, f)
+        os.replace(temp_path, path)
+    except OSError:
+        pass  # La caché en disco es opcional
+
+
+def _linux_device_key(path):
+    st_dev = os.stat(path).st_dev
+    return f"dev:{os.major(st_dev)}:{os.minor(st_dev)}"
+
+
+def _linux_media_type(key):
+    """Lee ``queue/rotational`` del disco que contiene el dispositivo (o de los que lo forman)."""
+    device = os.path.realpath(f"/sys/dev/block/{key[4:]}")
+    if not os.path.isdir(device):
+        return UNKNOWN  # Sistemas de archivos virtuales, overlay, red...
+    if os.path.exists(os.path.join(device, "partition")):
+        device = os.path.dirname(device)
+    slaves = os.path.join(device, "slaves")
+    if os.path.isdir(slaves) and os.listdir(slaves):
+        # LVM, RAID o cifrado: es giratorio si lo es alguno de los discos que lo forman
+        kinds = {_linux_media_type("dev:" + _read(os.path.join(slaves, name, "dev")))
+                 for name in os.listdir(slaves)}
+        return HDD if HDD in kinds else SSD if kinds == {SSD} else UNKNOWN
+    rotational = _read(os.path.join(device, "queue", "rotational"))
+    return {"0": SSD, "1": HDD}.get(rotational, UNKNOWN)
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def _windows_media_types():
+    """Tipo de medio de cada letra de unidad, con una sola llamada a PowerShell para todos los volúmenes."""
+    command = ("Get-Partition | Where-Object DriveLetter | ForEach-Object { "
+               "$d = Get-PhysicalDisk | Where-Object DeviceId -eq $_.DiskNumber; "
+               "\"$($_.DriveLetter)=$($d.MediaType)\" }")
+    try:
+        result = subprocess.run(["powershell", "-NoProfile", "-Command", command], capture_output=True, text=True,
+                                creationflags=_NO_WINDOW, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return {}
+    kinds = {}
+    for line in result.stdout.splitlines():
+        letter, _, media = line.strip().partition("=")
+        if letter:
+            kinds[f"drive:{letter.upper()}"] = {"SSD": SSD, "SCM": SSD, "HDD": HDD}.get(media.strip(), UNKNOWN)
+    return kinds
+
+
+def device_key(path):
+    """Identificador del volumen que contiene ``path`` (letra de unidad o ``st_dev``), o ``None``."""
+    if os.name == 'nt':
+        drive = os.path.splitdrive(os.path.abspath(path))[0]
+        return f"drive:{drive.rstrip(':').upper()}" if drive and not drive.startswith("\\\\") else None
+    try:
+        return _linux_device_key(path)
+    except (OSError, AttributeError):
+        return None
+
+
+def media_type(path):
+    """Devuelve ``ssd``, ``hdd`` o ``unknown`` para el volumen que contiene ``path``.
+
+    El resultado se guarda en memoria durante la vida del proceso. En Windows la primera
+    consulta obtiene de una vez todas las unidades y se guarda también en disco durante
+    ``CACHE_TTL``; en Linux se lee de nuevo de sysfs en cada proceso.
+    """
+    key = device_key(path)
+    if key is None:
+        return UNKNOWN
+    with _lock:
+        if key in _memory_cache:
+            return _memory_cache[key]
+        if os.name != 'nt':
+            kind = _linux_media_type(key) if os.path.isdir("/sys/dev/block") else UNKNOWN
+            _memory_cache[key] = kind
+            return kind
+
+        disk_cache = _load_disk_cache()
+        if key in disk_cache:
+            _memory_cache[key] = disk_cache[key][0]
+            return disk_cache[key][0]
+        now = time.time()
+        found = _windows_media_types()
+        for drive_key, kind in found.items():
+            disk_cache[drive_key] = [kind, now]
+            _memory_cache[drive_key] = kind
+        kind = found.get(key, UNKNOWN)
+        _memory_cache[key] = kind
+        disk_cache[key] = [kind, now]
+        _save_disk_cache()
+        return kind
+
+
+def is_rotational(path):
+    """``True`` en discos giratorios, ``False`` en SSD/NVMe y ``None`` si no se sabe."""
+    kind = media_type(path)
+    return None if kind == UNKNOWN else kind == HDD
+
+
+def media_types(paths):
+    """Tipo de medio de cada ruta de ``paths`` (los objetivos de una limpieza)."""
+    return {str(path): media_type(path) for path in paths}
+
+
+def deletion_strategy(path, workers="auto"):
+    """Devuelve ``(hilos, orden_por_inodo, medio)`` para borrar en ``path``.
+
+    Con ``workers="auto"`` se usan muchos hilos en SSD/NVMe y un recorrido secuencial
+    ordenado por inodo (que sigue la ubicación en disco) en discos giratorios. Un número
+    explícito se respeta tal cual.
+    """
+    if workers != "auto":
+        return max(1, int(workers or 1)), False, None
+    kind = media_type(path)
+    return STRATEGY_WORKERS[kind], kind == HDD, kind
@@ -8,14 +8,22 @@ import customtkinter as ctk
 import tkinter as tk
 from tkinter import messagebox
 from pathlib import Path
-from gui.utils import load_png_image, setup_logging, resource_path, setup_backup_directory
+from gui.utils import load_png_image, setup_logging, resource_path
+from gui.log_view import LogView
 from gui.config import load_default_config, load_user_config, save_user_config
-from core.cleanup import delete_files_in_directory, backup_and_delete, log_message
-from core.browser_utils import clean_browser_cache, close_browser_processes
-from core.disk_utils import optimize_disk
+from core.cleanup import configure_logging, log_message, stop_logging
+from core.runner import run_cleanup
+from core.control import RunControl
+from core.scheduler import Scheduler, schedule_settings
+from core.plan import compile_plan
+from core.scan import estimate_cleanup, format_estimate, format_size
+from core.history import RunHistory
+from core.backup_store import default_backup_directory
+from core.restore import restore_run
 from datetime import datetime
-from plyer import notification
-from PIL import Image
+
+# Ejecuciones por página en el visor del historial
+REPORT_PAGE_SIZE = 20
 
 # Variables globales
 status_icons = {}
@@ -31,9 +39,14 @@ backup = False
 exclusions = []
 selected_directories = []
 selected_browsers = []
-operations_log = []
 progress_bar = []
 gui_output = []
+run_control = None
+pause_button = None
+scheduler = None
+# Una sola limpieza a la vez (botón o programador), que comparten el diario de data/journal.jsonl;
+# tampoco se restaura un respaldo mientras se limpia
+cleanup_lock = threading.Lock()
 
 
 # Funciones Utilitarias
@@ -126,6 +139,32 @@ def update_browser_list(selected_browsers):
         browser_check.pack(anchor=tk.W, pady=2, padx=20)
 
 
+def apply_gui_selection(config):
+    """Devuelve una copia del config con los directorios y navegadores marcados en la GUI."""
+    directories = []
+    for item in config.get("directories", []):
+        var = directory_vars.get(item.get("path"))
+        directories.append(dict(item, enabled=var.get()) if var is not None else item)
+    browsers = config.get("browsers", {})
+    if browser_vars:
+        browsers = {browser: var.get() for browser, var in browser_vars.items()}
+    return dict(config, directories=directories, browsers=browsers)
+
+
+def show_estimate():
+    """Estima en segundo plano el espacio recuperable y lo muestra en la salida de la GUI."""
+    config = apply_gui_selection(load_user_config())
+
+    def worker():
+        try:
+            lines = format_estimate(estimate_cleanup(compile_plan(config)))
+        except Exception as e:
+            lines = [f"Error al estimar el espacio recuperable: {e}"]
+        root.after(0, gui_output.insert, ctk.END, "Estimación (sin eliminar nada):\n" + "\n".join(lines) + "\n")
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
 def get_log_file_path():
     """Obtén la ruta del archivo de log en el directorio de la aplicación."""
     return Path(os.getcwd()) / "cleaning_log.txt"
@@ -134,6 +173,7 @@ def get_log_file_path():
 def clean_up_traces():
     """Limpia los rastros y cierra la aplicación de manera segura."""
     log_file_path = get_log_file_path()
+    stop_logging()  # Vacía la cola y cierra el archivo de log antes de eliminarlo
     for handler in logging.root.handlers[:]:
         handler.close()
         logging.root.removeHandler(handler)
@@ -157,16 +197,22 @@ def clean_up_traces():
 def load_status_icons():
     """Cargar los iconos de estado."""
     global status_icons
+    from PIL import Image
+
     try:
         process_image = Image.open(resource_path("gui/assets/process.png"))
         completed_image = Image.open(resource_path("gui/assets/completed.png"))
         error_image = Image.open(resource_path("gui/assets/error.png"))
+        paused_image = Image.open(resource_path("gui/assets/paused.png"))
+        cancelled_image = Image.open(resource_path("gui/assets/cancelled.png"))
 
         # Convertir imágenes PIL a CTkImage
         status_icons = {
             'En proceso': ctk.CTkImage(light_image=process_image, dark_image=process_image),
             'Completado': ctk.CTkImage(light_image=completed_image, dark_image=completed_image),
-            'Error': ctk.CTkImage(light_image=error_image, dark_image=error_image)
+            'Error': ctk.CTkImage(light_image=error_image, dark_image=error_image),
+            'En pausa': ctk.CTkImage(light_image=paused_image, dark_image=paused_image),
+            'Cancelado': ctk.CTkImage(light_image=cancelled_image, dark_image=cancelled_image)
         }
         print("Iconos cargados exitosamente.")
     except FileNotFoundError as e:
@@ -175,7 +221,7 @@ def load_status_icons():
 
 def create_gui():
     global root, status_icon_label, status_text_label, directory_frame, directory_vars, secure_delete, backup, \
-        exclusions, selected_directories, selected_browsers, gui_output, progress_bar
+        exclusions, selected_directories, selected_browsers, gui_output, progress_bar, pause_button
 
     # Cargar configuraciones
     default_config = load_default_config()
@@ -217,6 +263,7 @@ def create_gui():
     reports_menu = tk.Menu(menu_bar, tearoff=0)
     menu_bar.add_cascade(label="Reportes", menu=reports_menu)
     reports_menu.add_command(label="Ver Reporte Detallado", command=show_report)
+    reports_menu.add_command(label="Estimar Espacio Recuperable", command=show_estimate)
 
     settings_menu = tk.Menu(menu_bar, tearoff=0)
     menu_bar.add_cascade(label="Configuración", menu=settings_menu)
@@ -231,7 +278,8 @@ def create_gui():
     status_text_label = ctk.CTkLabel(status_frame, text="Estado: Preparado", font=ctk.CTkFont(size=14))
     status_text_label.pack(side=tk.LEFT)
 
-    gui_output = ctk.CTkTextbox(root, width=700, height=250, wrap="word", border_width=2)
+    # Log acotado y seguro entre hilos: los hilos de limpieza solo encolan, la GUI dibuja lo visible
+    gui_output = LogView(root, width=700, height=250)
     gui_output.pack(pady=10)
 
     progress_bar = ctk.CTkProgressBar(root, width=550, mode="determinate")
@@ -249,11 +297,24 @@ def create_gui():
                                     command=lambda: schedule_cleanup(7, gui_output))
     schedule_button.grid(row=0, column=1, padx=15)
 
+    pause_button = ctk.CTkButton(button_frame, text="Pausar", command=toggle_pause)
+    pause_button.grid(row=0, column=2, padx=15)
+
+    cancel_button = ctk.CTkButton(button_frame, text="Cancelar", command=cancel_cleanup)
+    cancel_button.grid(row=0, column=3, padx=15)
+
     quit_button = ctk.CTkButton(button_frame, text="Salir", command=clean_up_traces)
-    quit_button.grid(row=0, column=2, padx=15)
+    quit_button.grid(row=0, column=4, padx=15)
 
     load_status_icons()
 
+    # Retomar la limpieza programada, si la hay; la próxima fecha se conserva entre reinicios
+    if schedule_settings(load_user_config())["enabled"]:
+        start_scheduler()
+
+    # Estimar el espacio recuperable sin bloquear la ventana
+    root.after(0, show_estimate)
+
     # Mostrar instrucciones al inicio
     root.after(1000, show_instructions)  # Muestra las instrucciones después de 1000 ms (1 segundo)
 
@@ -261,121 +322,215 @@ def create_gui():
 
 
 def log_operation(message):
+    # run_cleanup guarda estas líneas, con su hora, en el historial de ejecuciones
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    operations_log.append(f"{timestamp} - {message}")
     log_message(f"{timestamp} - {message}")
 
 
-def generate_detailed_report(operations_log, post_report=None):
-    report_path = Path("cleaning_report.txt")
-    with report_path.open("a") as report_file:
-        report_file.write("\n--- INFORMACION DE LA LIMPIEZA ---\n")
-        for entry in operations_log:
-            report_file.write(f"{entry}\n")
-
-        report_file.write("\nInforme de Desfragmentación:\n")
-        if post_report:
-            report_file.write("Informe Después de la Desfragmentación:\n")
-            report_file.write(post_report + "\n")
-        else:
-            report_file.write("Informe Después de la Desfragmentación: No disponible\n")
-
-
-def run_cleanup_with_progress(config, gui_output, progress_bar):
-    exclusions = config.get("exclusions", [])
-    secure = config.get("secure_delete", False)
-    if config.get("backup", False):
-        backup_directory = setup_backup_directory() if config.get("backup",
-                                                                  False) else None  # Crear el directorio de respaldo
-    else:
-        backup_directory = None
-
-    total_steps = 6
-    step_size = 100 / total_steps
-
-    def update_progress(step):
-        progress_bar.set(step * step_size / 100)
-        root.update_idletasks()
+def run_cleanup_with_progress(plan, gui_output, progress_bar, control=None):
+    # Se ejecuta en el hilo de limpieza: todo lo que toca Tk pasa por root.after (gui_output ya encola el texto)
+    def update_progress(fraction):
+        # Llega desde el hilo de limpieza a una frecuencia limitada; la barra se actualiza en el hilo de la GUI
+        root.after(0, progress_bar.set, fraction)
 
     def safe_update_status(status):
         root.after(0, update_status, status)
 
+    def show_info(message):
+        root.after(0, messagebox.showinfo, "Información", message)
+
     try:
+        root.after(0, progress_bar.set, 0)
         gui_output.insert(ctk.END, "Iniciando limpieza...\n")
-        root.update_idletasks()
         safe_update_status('En proceso')
-        update_progress(1)
-
-        # Realizar la limpieza basada en la configuración del usuario
-        directories = config.get("directories", [])
-        for directory in directories:
-            path = directory.get("path")
-            if directory_vars.get(path) and directory_vars[path].get():  # Verificar si el directorio está habilitado
-                path = expand_environment_variables(path)
-                log_operation(f"Limpieza de {path} iniciada.")
-                delete_files_in_directory(path, exclusions, secure, backup_directory, gui_output)
-                log_operation(f"Limpieza de {path} completada.")
-                gui_output.insert(ctk.END, f"Limpieza de {path} completada.\n")
-                root.update_idletasks()
-        update_progress(2)
-
-        # Verificar si hay navegadores seleccionados antes de ejecutar cualquier acción de limpieza
-        if any(browser_vars[browser].get() for browser in browser_vars):
-            for browser in ["Edge", "Chrome", "Firefox", "Safari"]:
-                if browser_vars.get(browser, False):
-                    close_browser_processes(browser)
-            clean_browser_cache(gui_output)
-        update_progress(3)
-
-        post_report = optimize_disk(gui_output)
-        update_progress(4)
 
-        gui_output.insert(ctk.END, "Optimización de disco completada.\n")
-        root.update_idletasks()
-        update_progress(5)
+        summary = run_cleanup(plan, gui_output, report=log_operation,
+                              on_progress=update_progress, control=control)
+        if summary["status"] == "cancelled":
+            gui_output.insert(ctk.END, "Limpieza cancelada; la próxima ejecución continuará donde se quedó.\n")
+            notify_user("Estado: Cancelado")
+            safe_update_status('Cancelado')
+            return
 
+        gui_output.insert(ctk.END, "Optimización de disco completada.\n")
         gui_output.insert(ctk.END, "Limpieza finalizada con éxito\n")
-        log_operation("Proceso de optimización finalizado.")
-        update_progress(6)
-
-        generate_detailed_report(operations_log, post_report)
 
-        messagebox.showinfo("Información", "El proceso de limpieza ha finalizado correctamente.")
+        show_info("El proceso de limpieza ha finalizado correctamente.")
         notify_user("Estado: Completado")
         safe_update_status('Completado')
 
     except Exception as e:
         log_operation(f"Error durante el proceso de limpieza: {e}")
-        messagebox.showinfo("Información", "Se ha producido un error durante el proceso de limpieza.")
+        show_info("Se ha producido un error durante el proceso de limpieza.")
         notify_user("Estado: Error")
         gui_output.insert(ctk.END, f"Error: {e}\n")
-        root.update_idletasks()
         safe_update_status('Error')
 
 
+def run_exclusive(plan, control):
+    """Ejecuta la limpieza y libera ``cleanup_lock``, que el llamador ya tomó.
+
+    Al terminar se olvida ``run_control`` (antes de liberar el cerrojo, para no borrar el de
+    la siguiente limpieza), así que pausar o cancelar después ya no hace nada.
+    """
+    global run_control
+    try:
+        run_cleanup_with_progress(plan, gui_output, progress_bar, control)
+    finally:
+        if run_control is control:
+            run_control = None
+        root.after(0, lambda: pause_button.configure(text="Pausar"))
+        cleanup_lock.release()
+
+
 def start_cleanup():
-    config = load_user_config()
-    cleanup_thread = threading.Thread(target=run_cleanup_with_progress,
-                                      args=(load_user_config(), gui_output, progress_bar))
+    global run_control
+    if not cleanup_lock.acquire(blocking=False):
+        messagebox.showinfo("Información", "Ya hay una limpieza en curso.")
+        return
+    try:
+        # Una sola lectura de la configuración; el plan compilado se reutiliza mientras no cambie
+        plan = compile_plan(apply_gui_selection(load_user_config()))
+    except BaseException:
+        cleanup_lock.release()
+        raise
+    run_control = RunControl()
+    pause_button.configure(text="Pausar")
+    cleanup_thread = threading.Thread(target=run_exclusive, args=(plan, run_control))
     cleanup_thread.start()
 
 
+def toggle_pause():
+    """Pausa la limpieza en curso entre archivo y archivo, o la reanuda."""
+    control = run_control
+    if control is None:
+        return  # No hay ninguna limpieza en curso
+    if control.paused:
+        control.resume()
+        pause_button.configure(text="Pausar")
+        update_status('En proceso')
+    else:
+        control.pause()
+        pause_button.configure(text="Reanudar")
+        update_status('En pausa')
+
+
+def cancel_cleanup():
+    """Cancela la limpieza en curso; lo ya procesado queda en el diario para retomarla."""
+    control = run_control
+    if control is None:
+        return  # No hay ninguna limpieza en curso
+    control.cancel()
+    pause_button.configure(text="Pausar")
+
+
+def format_run_summary(run):
+    """Una línea con los totales de una ejecución del historial."""
+    return (f"{datetime.fromtimestamp(run.started):%Y-%m-%d %H:%M} · {run.status} · {run.files} archivos · "
+            f"{format_size(run.bytes or 0)} · {run.errors} errores")
+
+
+def format_run_details(run, details):
+    """Texto del detalle de una ejecución: totales por objetivo, líneas del informe e informe de disco."""
+    lines = [format_run_summary(run), f"Duración: {run.elapsed or 0:.1f} s", ""]
+    for target in details.summary.get("directories", []):
+        lines.append(f"{target.get('target')}: {target.get('files', 0)} archivos, "
+                     f"{format_size(target.get('bytes', 0))}, {target.get('errors', 0)} errores")
+    if details.summary.get("browsers"):
+        lines.append(f"Navegadores: {', '.join(details.summary['browsers'])}")
+    lines += ["", "--- INFORMACION DE LA LIMPIEZA ---"] + details.log
+    lines += ["", "Informe de optimización del disco:", details.disk_report or "No disponible"]
+    return "\n".join(lines)
+
+
 def show_report():
+    """Muestra el historial de ejecuciones por páginas; el detalle se carga solo al elegir una ejecución."""
     try:
-        with open("cleaning_report.txt", "r") as report_file:
-            report_text = report_file.read()
-
-        report_window = ctk.CTkToplevel(root)
-        report_window.title("Reporte Detallado")
-        report_window.geometry("600x500")
-
-        report_textbox = ctk.CTkTextbox(report_window, width=580, height=450, wrap="word", border_width=2)
-        report_textbox.pack(pady=20)
-        report_textbox.insert(ctk.END, report_text)
-    except FileNotFoundError:
-        messagebox.showerror("Error", "No se encontró el reporte detallado.")
+        history = RunHistory()
     except Exception as e:
-        messagebox.showerror("Error inesperado", f"Error al intentar mostrar el reporte: {e}")
+        messagebox.showerror("Error inesperado", f"Error al abrir el historial de ejecuciones: {e}")
+        return
+
+    report_window = ctk.CTkToplevel(root)
+    report_window.title("Reporte Detallado")
+    report_window.geometry("700x600")
+
+    runs_frame = ctk.CTkScrollableFrame(report_window, width=660, height=200)
+    runs_frame.pack(pady=(15, 5))
+
+    nav_frame = ctk.CTkFrame(report_window, fg_color='transparent')
+    nav_frame.pack(pady=5)
+    page_label = ctk.CTkLabel(nav_frame, text="")
+
+    details_textbox = ctk.CTkTextbox(report_window, width=660, height=240, wrap="word", border_width=2)
+    details_textbox.pack(pady=10)
+
+    state = {"page": 0, "backup": None}
+    restore_button = ctk.CTkButton(report_window, text="Restaurar respaldo", state="disabled",
+                                   command=lambda: restore_backup(state["backup"]))
+    restore_button.pack(pady=(0, 10))
+
+    def show_details(run):
+        details = history.details(run.id)
+        details_textbox.delete("1.0", ctk.END)
+        details_textbox.insert(ctk.END, format_run_details(run, details) if details else
+                               "La ejecución ya no está en el historial.")
+        # Solo las ejecuciones con respaldo se pueden restaurar
+        backup_info = details.summary.get("backup") if details else None
+        state["backup"] = backup_info.get("run_id") if backup_info else None
+        restore_button.configure(state="normal" if state["backup"] else "disabled")
+
+    def show_page(page):
+        pages = max(1, -(-history.count() // REPORT_PAGE_SIZE))
+        state["page"] = min(max(page, 0), pages - 1)
+        for widget in runs_frame.winfo_children():
+            widget.destroy()
+        runs = history.page(state["page"] * REPORT_PAGE_SIZE, REPORT_PAGE_SIZE)
+        if not runs:
+            ctk.CTkLabel(runs_frame, text="Todavía no hay ejecuciones en el historial.").pack(anchor=tk.W)
+        for run in runs:
+            ctk.CTkButton(runs_frame, text=format_run_summary(run), anchor="w", fg_color="transparent",
+                          command=lambda run=run: show_details(run)).pack(fill="x", pady=1)
+        page_label.configure(text=f"Página {state['page'] + 1} de {pages}")
+
+    def close():
+        history.close()
+        report_window.destroy()
+
+    ctk.CTkButton(nav_frame, text="Más recientes", command=lambda: show_page(state["page"] - 1)).grid(
+        row=0, column=0, padx=10)
+    page_label.grid(row=0, column=1, padx=10)
+    ctk.CTkButton(nav_frame, text="Más antiguas", command=lambda: show_page(state["page"] + 1)).grid(
+        row=0, column=2, padx=10)
+    report_window.protocol("WM_DELETE_WINDOW", close)
+    show_page(0)
+
+
+def restore_backup(run_id):
+    """Restaura a su ruta original los archivos respaldados en ``run_id``; los que ya existen se conservan."""
+    if not run_id or not messagebox.askyesno(
+            "Restaurar respaldo", "Los archivos eliminados en esa ejecución volverán a su ubicación original; "
+                                  "los que ya existan no se modifican. ¿Continuar?"):
+        return
+    if not cleanup_lock.acquire(blocking=False):
+        messagebox.showinfo("Información", "Ya hay una limpieza en curso.")
+        return
+
+    def worker():
+        try:
+            gui_output.insert(ctk.END, f"Restaurando el respaldo {run_id}...\n")
+            stats = restore_run(default_backup_directory(), run_id)
+            for error in stats.errors:
+                log_message(f"No se pudo restaurar {error}", "ERROR", gui_output)
+            gui_output.insert(ctk.END, f"Respaldo {run_id}: {stats.summary()}\n")
+            root.after(0, messagebox.showinfo, "Información", f"Restauración terminada: {stats.summary()}.")
+        except Exception as e:
+            log_message(f"Error al restaurar el respaldo {run_id}: {e}", "ERROR", gui_output)
+            root.after(0, messagebox.showerror, "Error", f"No se pudo restaurar el respaldo: {e}")
+        finally:
+            cleanup_lock.release()
+
+    threading.Thread(target=worker).start()
 
 
 def show_config_window():
@@ -427,8 +582,10 @@ def show_config_window():
 
     # Guardar configuración
     def save_changes():
-        config["directories"] = [{"path": path, "description": "Descripción", "enabled": var.get()} for path, var in
-                                 directory_vars.items()]
+        # Conservar la descripción y la política de cada directorio
+        items = {item.get("path"): item for item in config.get("directories", [])}
+        config["directories"] = [dict(items.get(path, {"description": "Descripción"}), path=path, enabled=var.get())
+                                 for path, var in directory_vars.items()]
         config["browsers"] = {browser: var.get() for browser, var in browser_vars.items()}
         config["secure_delete"] = secure_delete
         config["backup"] = backup_var.get()
@@ -439,15 +596,35 @@ def show_config_window():
     save_button.pack(pady=20)
 
 
-def schedule_cleanup(interval_days, gui_output):
-    def scheduled_cleanup():
-        while True:
-            time.sleep(interval_days * 24 * 60 * 60)
-            run_cleanup_with_progress(load_user_config(), gui_output, None)
+def run_scheduled_cleanup(control):
+    """Limpieza lanzada por el programador; los botones de pausa y cancelación también la controlan."""
+    global run_control
+    if not cleanup_lock.acquire(blocking=False):
+        log_message("Limpieza programada omitida: ya hay una limpieza en curso.", "WARNING", gui_output)
+        return
+    try:
+        plan = compile_plan(apply_gui_selection(load_user_config()))
+    except BaseException:
+        cleanup_lock.release()
+        raise
+    run_control = control
+    run_exclusive(plan, control)
 
-    thread = threading.Thread(target=scheduled_cleanup)
-    thread.daemon = True
-    thread.start()
+
+def start_scheduler():
+    global scheduler
+    if scheduler is not None:
+        scheduler.stop()
+    scheduler = Scheduler(run_scheduled_cleanup, schedule_settings(load_user_config()), gui_output=gui_output)
+    scheduler.start()
+
+
+def schedule_cleanup(interval_days, gui_output):
+    """Activa la limpieza periódica en segundo plano y la guarda en la configuración del usuario."""
+    config = load_user_config()
+    config["schedule"] = dict(config.get("schedule") or {}, enabled=True, interval_days=interval_days)
+    save_user_config(config)
+    start_scheduler()
 
 
 def expand_environment_variables(path):
@@ -455,6 +632,8 @@ def expand_environment_variables(path):
 
 
 def notify_user(message):
+    from plyer import notification  # Importación diferida: solo se usa al terminar una limpieza
+
     notification.notify(
         title='Optimización de Windows',
         message=message,
@@ -465,5 +644,6 @@ def notify_user(message):
 
 if __name__ == "__main__":
     run_as_admin()
+    configure_logging()
     setup_logging()
     create_gui()
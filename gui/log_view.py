@@ -0,0 +1,149 @@
+import queue
+import customtkinter as ctk
+
+# Líneas que se conservan; las más antiguas se descartan al llegar otras nuevas
+LOG_CAPACITY = 10000
+# Cada cuánto se vacía la cola de mensajes en el hilo de la interfaz
+DRAIN_INTERVAL_MS = 100
+WHEEL_LINES = 3
+
+
+class RingBuffer:
+    """Lista circular de tamaño fijo: añadir y acceder por índice cuestan O(1)."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._start = 0
+        self._length = 0
+
+    def append(self, item):
+        end = (self._start + self._length) % self.capacity
+        self._items[end] = item
+        if self._length < self.capacity:
+            self._length += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def extend(self, items):
+        # De una lista más larga que el búfer solo quedarían las últimas ``capacity``
+        for item in items[-self.capacity:]:
+            self.append(item)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return self._items[(self._start + index) % self.capacity]
+
+    def window(self, start, count):
+        """Elementos de ``start`` a ``start + count`` (sin salirse del búfer)."""
+        return [self[index] for index in range(max(0, start), min(self._length, start + count))]
+
+
+class LogView(ctk.CTkFrame):
+    """Salida de log de la GUI con memoria y coste de dibujo constantes.
+
+    Sustituye al ``CTkTextbox`` en ``log_message``: ``insert`` y ``see`` se pueden llamar
+    desde cualquier hilo porque solo encolan el texto. Cada ``DRAIN_INTERVAL_MS`` el hilo de la
+    interfaz vacía la cola entera, guarda las líneas en un ``RingBuffer`` de ``capacity`` líneas y
+    dibuja solo las que caben en pantalla. Mientras la vista está al final sigue las líneas
+    nuevas; si el usuario sube, se queda en su sitio.
+    """
+
+    def __init__(self, master, width=700, height=250, capacity=LOG_CAPACITY, **kwargs):
+        super().__init__(master, width=width, height=height, fg_color="transparent", **kwargs)
+        self.lines = RingBuffer(capacity)
+        self._queue = queue.SimpleQueue()
+        self._partial = ""
+        self._appended = 0  # Líneas recibidas desde el principio; las posiciones son absolutas
+        self._top = 0
+        self._follow = True
+        self.font = ctk.CTkFont()
+        self._visible = max(1, height // self.font.metrics("linespace"))
+
+        self.textbox = ctk.CTkTextbox(self, width=width - 16, height=height, wrap="none", border_width=2,
+                                      font=self.font, activate_scrollbars=False)
+        self.textbox.grid(row=0, column=0, sticky="nsew")
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scroll)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.textbox.configure(state="disabled")
+
+        self.textbox.bind("<Configure>", self._on_resize)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.textbox.bind(sequence, self._on_wheel)
+        self.after(DRAIN_INTERVAL_MS, self._drain)
+
+    # Interfaz de CTkTextbox que usa log_message; se puede llamar desde cualquier hilo
+
+    def insert(self, index, text):
+        """Añade ``text`` al final del log (``index`` se ignora: el log solo crece por el final)."""
+        self._queue.put(text)
+
+    def see(self, index):
+        """La vista ya sigue el final del log mientras el usuario no se desplace hacia arriba."""
+
+    # Hilo de la interfaz
+
+    @property
+    def _first(self):
+        return self._appended - len(self.lines)
+
+    def _drain(self):
+        # Se vacía todo lo encolado hasta ahora, por rápido que escriban los demás hilos: la cola no
+        # acumula más de un intervalo de mensajes y el búfer descarta los que no caben
+        chunks = []
+        try:
+            for _ in range(self._queue.qsize()):
+                chunks.append(self._queue.get_nowait())
+        except queue.Empty:
+            pass
+        if chunks:
+            *complete, self._partial = (self._partial + "".join(chunks)).split("\n")
+            if complete:
+                self.lines.extend(complete)
+                self._appended += len(complete)
+                self._render()
+        self.after(DRAIN_INTERVAL_MS, self._drain)
+
+    def _render(self):
+        first = self._first
+        bottom = max(first, self._appended - self._visible)
+        self._top = bottom if self._follow else min(max(self._top, first), bottom)
+        start = self._top - first
+
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        self.textbox.insert("1.0", "\n".join(self.lines.window(start, self._visible)))
+        self.textbox.configure(state="disabled")
+        if self._follow:
+            self.textbox.see("end")
+
+        total = len(self.lines)
+        if total:
+            self.scrollbar.set(start / total, min(1.0, (start + self._visible) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self._top = self._first + int(float(amount) * len(self.lines))
+        else:
+            self._top += int(amount) * (self._visible if unit == "pages" else 1)
+        self._follow = self._top >= self._appended - self._visible
+        self._render()
+
+    def _on_wheel(self, event):
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self._on_scroll("scroll", -WHEEL_LINES if up else WHEEL_LINES, "units")
+        return "break"
+
+    def _on_resize(self, event):
+        visible = max(1, event.height // self.font.metrics("linespace"))
+        if visible != self._visible:
+            self._visible = visible
+            self._render()
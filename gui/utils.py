@@ -1,16 +1,14 @@
 import logging
 import os
 import sys
-from PIL import Image
 from pathlib import Path
+from core.backup_store import default_backup_directory
 
 
 def setup_backup_directory():
     """Crea el directorio de respaldo en la misma carpeta que el script de la aplicación."""
-    # Obtener el directorio donde se ejecuta el programa
-    main_directory = os.path.dirname(os.path.abspath(sys.argv[0]))
     # Define la ruta completa para la carpeta de respaldo
-    backup_directory = os.path.join(main_directory, "backup")
+    backup_directory = default_backup_directory()
 
     # Crear el directorio de respaldo si no existe
     if not os.path.exists(backup_directory):
@@ -30,6 +28,8 @@ def setup_logging():
 
 def load_png_image(image_path):
     """Carga una imagen PNG y la convierte en un objeto CTkImage."""
+    from PIL import Image  # Importación diferida: solo la necesita la interfaz gráfica
+
     try:
         image = Image.open(image_path)
         return image
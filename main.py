@@ -1,7 +1,5 @@
 import os
 import sys
-from gui.gui import run_as_admin, create_gui
-from gui.utils import setup_logging
 
 # Obtener el directorio de ejecución
 if getattr(sys, 'frozen', False):
@@ -13,10 +11,20 @@ else:
 
 # Configuración del directorio temporal seguro
 temp_dir = os.path.abspath(os.path.join(current_dir, 'data'))
-print(f"Temporary directory: {temp_dir}")
 os.makedirs(temp_dir, exist_ok=True)
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Modo sin interfaz: solo se importan los módulos de core
+        from core.cli import main
+        sys.exit(main())
+
+    from gui.gui import run_as_admin, create_gui
+    from gui.utils import setup_logging
+    from core.cleanup import configure_logging
+
+    print(f"Temporary directory: {temp_dir}")
     run_as_admin()
+    configure_logging()
     setup_logging()
     create_gui()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Las pruebas importan ``core`` desde la raíz del proyecto, también al lanzar ``pytest`` desde otro directorio
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
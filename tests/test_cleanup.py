@@ -0,0 +1,320 @@
+import os
+import json
+import time
+import threading
+import pytest
+from core import cleanup
+from core.cleanup import delete_files_in_directory
+from core.control import RunControl
+from core.journal import RESUME_MAX_AGE, RunJournal
+from core.snapshot import DirectorySnapshot
+
+
+class CancelAfter(RunControl):
+    """Cancela la limpieza al llegar al punto de control número ``count``."""
+
+    def __init__(self, count):
+        super().__init__()
+        self.count = count
+        self._lock = threading.Lock()
+
+    def checkpoint(self):
+        with self._lock:
+            self.count -= 1
+            if self.count == 0:
+                self.cancel()
+        super().checkpoint()
+
+
+def make_tree(root, width=6, depth=3, files=5):
+    """Árbol de ``width`` subdirectorios por nivel con ``files`` archivos cada uno.
+
+    La raíz y los directorios ``d0`` tienen además un directorio ``keep`` con un archivo.
+    """
+    def fill(directory, level):
+        directory.mkdir(parents=True, exist_ok=True)
+        for index in range(files):
+            (directory / f"f{index}.tmp").write_text("x" * 100)
+        if directory == root or directory.name == "d0":
+            (directory / "keep").mkdir(exist_ok=True)
+            (directory / "keep" / "k.txt").write_text("k")
+        if level < depth:
+            for index in range(width):
+                fill(directory / f"d{index}", level + 1)
+    fill(root, 1)
+
+
+def kept_entries(root):
+    """Entradas que deben quedar tras excluir ``keep``: su contenido y los directorios que lo contienen."""
+    kept = set()
+    for entry in remaining(root):
+        parts = entry.split(os.sep)
+        if "keep" in parts:
+            kept.update(os.path.join(*parts[:index]) for index in range(1, len(parts) + 1))
+    return sorted(kept)
+
+
+def remaining(root):
+    return sorted(os.path.relpath(os.path.join(path, name), root)
+                  for path, dirs, files in os.walk(root) for name in dirs + files)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_resume_after_cancel_finishes_without_errors(tmp_path, workers):
+    root = tmp_path / "tree"
+    make_tree(root)
+    protected = kept_entries(root)
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    journal = RunJournal("prueba", path=journal_path, resume=False)
+    stats = delete_files_in_directory(str(root), ["keep"], workers=workers, control=CancelAfter(60), journal=journal)
+    journal.close(completed=False)
+    assert stats.cancelled
+
+    journal = RunJournal("prueba", path=journal_path, resume=True)
+    assert journal.resumed
+    stats = delete_files_in_directory(str(root), ["keep"], workers=workers, journal=journal)
+    journal.close(completed=True)
+    assert not stats.cancelled
+    assert stats.errors == 0
+
+    # Solo quedan los archivos de ``keep`` y los directorios que los contienen
+    assert remaining(root) == protected
+
+
+class Interrupted(Exception):
+    pass
+
+
+class CrashingJournal(RunJournal):
+    """Diario de una ejecución que se interrumpe justo antes de marcar el objetivo como completado."""
+
+    def complete_target(self, target):
+        self.flush()
+        raise Interrupted()
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_resume_does_not_revisit_deleted_directories(tmp_path, monkeypatch, workers):
+    root = tmp_path / "tree"
+    make_tree(root)
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    journal = CrashingJournal("prueba", path=journal_path, resume=False)
+    with pytest.raises(Interrupted):
+        delete_files_in_directory(str(root), ["keep"], workers=workers, journal=journal)
+    journal.close(completed=False)
+    left = remaining(root)
+
+    visited = []
+    list_directory = cleanup._list_directory
+
+    def spy(job, directory, *args, **kwargs):
+        visited.append(directory)
+        return list_directory(job, directory, *args, **kwargs)
+
+    monkeypatch.setattr(cleanup, "_list_directory", spy)
+    journal = RunJournal("prueba", path=journal_path, resume=True)
+    stats = delete_files_in_directory(str(root), ["keep"], workers=workers, journal=journal)
+    journal.close(completed=True)
+    assert stats.errors == 0
+    assert remaining(root) == left
+    assert visited and all(os.path.isdir(directory) for directory in visited)
+
+
+def test_stale_journal_is_not_resumed(tmp_path):
+    journal_path = tmp_path / "journal.jsonl"
+    journal = RunJournal("prueba", path=str(journal_path), resume=False)
+    journal.complete_target(str(tmp_path / "objetivo"))
+    journal.close(completed=False)
+    lines = journal_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    start = json.loads(lines[0])
+    start["time"] -= RESUME_MAX_AGE + 60
+    journal_path.write_text(json.dumps(start) + "\n" + "".join(lines[1:]), encoding="utf-8")
+
+    journal = RunJournal("prueba", path=str(journal_path), resume=True)
+    assert not journal.resumed
+    assert not journal.target_done(str(tmp_path / "objetivo"))
+    journal.close(completed=True)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_resume_relists_changed_directories(tmp_path, workers):
+    root = tmp_path / "tree"
+    make_tree(root)
+    journal_path = str(tmp_path / "journal.jsonl")
+
+    journal = CrashingJournal("prueba", path=journal_path, resume=False)
+    with pytest.raises(Interrupted):
+        delete_files_in_directory(str(root), ["keep"], workers=workers, journal=journal)
+    journal.close(completed=False)
+    # Archivos creados después de la interrupción en directorios ya procesados
+    (root / "nuevo.tmp").write_text("x")
+    (root / "d0" / "nuevo.tmp").write_text("x")
+
+    journal = RunJournal("prueba", path=journal_path, resume=True)
+    assert journal.resumed
+    stats = delete_files_in_directory(str(root), ["keep"], workers=workers, journal=journal)
+    journal.close(completed=True)
+    assert stats.files == 2
+    assert not (root / "nuevo.tmp").exists() and not (root / "d0" / "nuevo.tmp").exists()
+
+
+def after_listing(monkeypatch, callback):
+    """Llama a ``callback(directory)`` justo después de listar cada directorio."""
+    list_directory = cleanup._list_directory
+
+    def spy(job, directory, *args, **kwargs):
+        result = list_directory(job, directory, *args, **kwargs)
+        callback(directory)
+        return result
+
+    monkeypatch.setattr(cleanup, "_list_directory", spy)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_incremental_relists_file_created_after_listing(tmp_path, monkeypatch, workers):
+    root = tmp_path / "tree"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "k.txt").write_text("k")
+    (root / "sub" / "f.tmp").write_text("x")
+    snapshots = str(tmp_path / "snapshots")
+
+    def create_late_file(directory):
+        if directory == str(root / "sub") and not (root / "sub" / "tarde.tmp").exists():
+            (root / "sub" / "tarde.tmp").write_text("x")
+
+    after_listing(monkeypatch, create_late_file)
+    delete_files_in_directory(str(root), ["k.txt"], workers=workers, incremental=snapshots)
+    assert (root / "sub" / "tarde.tmp").exists()
+
+    stats = delete_files_in_directory(str(root), ["k.txt"], workers=workers, incremental=snapshots)
+    assert stats.files == 1
+    assert remaining(root) == ["sub", os.path.join("sub", "k.txt")]
+
+
+def test_incremental_skips_directories_unchanged_before_the_run(tmp_path, monkeypatch):
+    root = tmp_path / "tree"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "k.txt").write_text("k")
+    past = time.time() - 3600
+    for directory in (root / "sub", root):
+        os.utime(directory, (past, past))
+    snapshots = str(tmp_path / "snapshots")
+    delete_files_in_directory(str(root), ["k.txt"], incremental=snapshots)
+
+    relisted = []
+    unchanged_subdirs = DirectorySnapshot.unchanged_subdirs
+
+    def spy(self, directory, *args, **kwargs):
+        subdirs = unchanged_subdirs(self, directory, *args, **kwargs)
+        if subdirs is None:
+            relisted.append(directory)
+        return subdirs
+
+    monkeypatch.setattr(DirectorySnapshot, "unchanged_subdirs", spy)
+    delete_files_in_directory(str(root), ["k.txt"], incremental=snapshots)
+    assert relisted == []
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="sin enlaces simbólicos")
+@pytest.mark.parametrize("mode", ["plain", "secure", "backup"])
+@pytest.mark.parametrize("workers", [1, 4])
+def test_symlinks_are_unlinked_not_followed(tmp_path, monkeypatch, mode, workers):
+    outside = tmp_path / "outside"
+    (outside / "sub").mkdir(parents=True)
+    (outside / "sub" / "data.txt").write_text("no tocar")
+    (outside / "file.txt").write_text("no tocar")
+    root = tmp_path / "tree"
+    (root / "a" / "b").mkdir(parents=True)
+    os.symlink(outside / "sub", root / "a" / "dir_link", target_is_directory=True)
+    os.symlink(outside / "file.txt", root / "a" / "b" / "file_link")
+    (root / "a" / "b" / "f.tmp").write_text("x")
+
+    # El listado ya sabe qué entradas son enlaces: no hace falta otro lstat por archivo
+    monkeypatch.setattr(cleanup.os.path, "islink", lambda path: pytest.fail(f"lstat extra de {path}"))
+    options = {"secure": mode == "secure", "backup_directory": str(tmp_path / "store") if mode == "backup" else None}
+    stats = delete_files_in_directory(str(root), workers=workers, **options)
+    monkeypatch.undo()
+
+    assert stats.errors == 0
+    assert remaining(root) == []
+    assert (outside / "sub" / "data.txt").read_text() == "no tocar"
+    assert (outside / "file.txt").read_text() == "no tocar"
+
+
+def build(root, entries):
+    for entry in entries:
+        path = root / entry
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(entry)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_nested_exclusions_at_several_depths(tmp_path, workers):
+    root = tmp_path / "tree"
+    build(root, [
+        "top.tmp", "top.keep",
+        os.path.join("a", "x.tmp"), os.path.join("a", "deep.keep"),
+        os.path.join("a", "b", "c", "d", "x.tmp"), os.path.join("a", "b", "c", "d", "deepest.keep"),
+        os.path.join("a", "b", "c", "gone.tmp"),
+        os.path.join("a", "saved", "x.tmp"), os.path.join("a", "saved", "sub", "y.tmp"),
+        os.path.join("e", "cache", "data", "z.tmp"), os.path.join("e", "other", "z.tmp"),
+        os.path.join("f", "g", "h", "z.tmp"),
+    ])
+    exclusions = ["*.keep", str(root / "a" / "saved"), os.path.join("e", "cache")]
+    stats = delete_files_in_directory(str(root), exclusions, workers=workers)
+
+    assert stats.errors == 0
+    assert remaining(root) == sorted([
+        "top.keep", "a", os.path.join("a", "deep.keep"),
+        os.path.join("a", "b"), os.path.join("a", "b", "c"), os.path.join("a", "b", "c", "d"),
+        os.path.join("a", "b", "c", "d", "deepest.keep"),
+        os.path.join("a", "saved"), os.path.join("a", "saved", "x.tmp"), os.path.join("a", "saved", "sub"),
+        os.path.join("a", "saved", "sub", "y.tmp"),
+        "e", os.path.join("e", "cache"), os.path.join("e", "cache", "data"),
+        os.path.join("e", "cache", "data", "z.tmp"),
+    ])
+    # Se eliminan los directorios que quedaron vacíos, también los de varios niveles: e/other, f/g/h, f/g y f
+    assert stats.directories == 4
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_policy_applies_to_nested_files(tmp_path, workers):
+    root = tmp_path / "tree"
+    build(root, [os.path.join("a", "b", "old.log"), os.path.join("a", "b", "new.txt"), "top.log"])
+    stats = delete_files_in_directory(str(root), workers=workers, policy={"extensions": [".log"]})
+    assert stats.skipped == 1
+    assert remaining(root) == ["a", os.path.join("a", "b"), os.path.join("a", "b", "new.txt")]
+
+
+@pytest.mark.skipif(not cleanup._USE_DIR_FD or not os.path.isdir("/proc/self/fd"), reason="sin descriptores de directorio")
+@pytest.mark.parametrize("workers", [1, 4])
+def test_directories_are_removed_relative_to_their_parent(tmp_path, monkeypatch, workers):
+    root = tmp_path / "tree"
+    make_tree(root, width=3, depth=3, files=2)
+    rmdir = os.rmdir
+    calls = []
+
+    def spy(path, *, dir_fd=None):
+        calls.append((path, dir_fd))
+        return rmdir(path, dir_fd=dir_fd)
+
+    monkeypatch.setattr(cleanup.os, "rmdir", spy)
+    descriptors = len(os.listdir("/proc/self/fd"))
+    delete_files_in_directory(str(root), ["keep"], workers=workers)
+    monkeypatch.undo()
+
+    assert calls and all(dir_fd is not None and os.sep not in path for path, dir_fd in calls)
+    assert len(os.listdir("/proc/self/fd")) == descriptors
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="sin /proc/self/fd")
+@pytest.mark.parametrize("workers", [1, 4])
+def test_cancel_closes_directory_descriptors(tmp_path, workers):
+    root = tmp_path / "tree"
+    make_tree(root)
+    descriptors = len(os.listdir("/proc/self/fd"))
+    stats = delete_files_in_directory(str(root), ["keep"], workers=workers, control=CancelAfter(40))
+    assert stats.cancelled
+    assert len(os.listdir("/proc/self/fd")) == descriptors
@@ -0,0 +1,37 @@
+import json
+from core import backup_store
+from core.backup_store import BackupStore
+from core.cli import EXIT_OK, main
+
+
+def run_cli(capsys, *argv):
+    code = main(list(argv))
+    return code, json.loads(capsys.readouterr().out)
+
+
+def test_restore_latest_backup_to_original_path(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(backup_store, "default_backup_directory", lambda: str(tmp_path / "store"))
+    source = tmp_path / "src" / "a.txt"
+    source.parent.mkdir()
+    source.write_text("contenido")
+    with BackupStore(tmp_path / "store").begin_run() as run:
+        run.add(source)
+    source.unlink()
+
+    code, summary = run_cli(capsys, "--list-backups")
+    assert code == EXIT_OK
+    assert summary["runs"] == [{"run_id": run.run_id, "files": 1, "bytes": len("contenido")}]
+
+    code, summary = run_cli(capsys, "--restore", "latest")
+    assert code == EXIT_OK
+    assert (summary["run_id"], summary["restored"], summary["errors"]) == (run.run_id, 1, 0)
+    assert source.read_text() == "contenido"
+
+    code, summary = run_cli(capsys, "--restore", run.run_id)
+    assert (summary["restored"], summary["skipped"]) == (0, 1)
+
+
+def test_restore_unknown_run_is_an_error(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(backup_store, "default_backup_directory", lambda: str(tmp_path / "store"))
+    code, summary = run_cli(capsys, "--restore", "no-existe")
+    assert code != EXIT_OK and summary["status"] == "error"
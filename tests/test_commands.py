@@ -0,0 +1,31 @@
+import sys
+from core.commands import READ_SIZE, run_command
+
+
+def test_multibyte_characters_split_across_reads():
+    # Cada "ñ" ocupa dos bytes en UTF-8; con un byte de relleno, una cae justo en el límite de lectura
+    text = "x" + "ñ" * READ_SIZE
+    script = f"import sys; sys.stdout.buffer.write({text.encode('utf-8')!r}); sys.stdout.flush()"
+    result = run_command([sys.executable, "-c", script], timeout=30, encoding="utf-8")
+    assert result.ok
+    assert result.lines == [text]
+
+
+def test_lines_are_streamed_and_timeout_stops_the_command():
+    seen = []
+    script = "import time; print('uno', flush=True); print('dos', flush=True); time.sleep(30)"
+    result = run_command([sys.executable, "-c", script], timeout=2, on_line=seen.append, encoding="utf-8")
+    assert result.timed_out and not result.ok
+    assert seen == ["uno", "dos"]
+
+
+def test_maintenance_logs_failure_instead_of_completion(monkeypatch):
+    from core import disk_utils
+    messages = []
+    monkeypatch.setattr(disk_utils, "log_message", lambda message, level="INFO", gui_output=None:
+                        messages.append((level, message)))
+    disk_utils._run_maintenance([sys.executable, "-c", "import time; time.sleep(30)"], "de prueba", None, 1, None)
+    disk_utils._run_maintenance([sys.executable, "-c", "raise SystemExit(3)"], "de prueba", None, 30, None)
+    disk_utils._run_maintenance([sys.executable, "-c", "pass"], "de prueba", None, 30, None)
+    assert [level for level, _ in messages] == ["WARNING", "ERROR", "INFO"]
+    assert "completada" in messages[-1][1] and not any("completada" in m for _, m in messages[:-1])
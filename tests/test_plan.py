@@ -0,0 +1,31 @@
+import os
+import pytest
+from core.cleanup import delete_files_in_directory
+from core.plan import compile_plan
+
+
+def _config(directory, exclusions):
+    return {"directories": [{"path": str(directory), "enabled": True}], "exclusions": exclusions, "browsers": {}}
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="sin enlaces simbólicos")
+def test_exclusion_through_symlink_matches_canonical_target(tmp_path):
+    real = tmp_path / "real"
+    (real / "keep").mkdir(parents=True)
+    (real / "keep" / "x").write_text("x")
+    (real / "tmp.log").write_text("y")
+    link = tmp_path / "link"
+    os.symlink(real, link, target_is_directory=True)
+
+    plan = compile_plan(_config(link, [str(link / "keep")]))
+    target, = plan.targets
+    assert target.path == os.path.realpath(real)
+    delete_files_in_directory(target.path, target.matcher, workers=1)
+
+    assert (real / "keep" / "x").exists()
+    assert not (real / "tmp.log").exists()
+
+
+def test_relative_and_glob_exclusions_are_not_canonicalized(tmp_path):
+    plan = compile_plan(_config(tmp_path, ["*.log", os.path.join("cache", "keep"), str(tmp_path / "*.tmp")]))
+    assert plan.targets[0].matcher.source == ["*.log", os.path.join("cache", "keep"), str(tmp_path / "*.tmp")]
@@ -0,0 +1,104 @@
+import json
+from pathlib import Path
+import pytest
+from benchmarks.treegen import make_browser_profiles
+from core import profiles
+from core.browser_utils import clean_browser_cache, get_browser_cache_paths
+from core.profiles import CACHE_SUBPATHS, read_chromium_profiles, read_firefox_profiles
+
+PARAMS = {"profiles": 3, "profile_files": 8}
+
+
+@pytest.fixture
+def profile_tree(tmp_path, monkeypatch):
+    """Perfiles falsos de Firefox, Chrome y Edge con ``APPDATA`` y ``LOCALAPPDATA`` apuntando a ellos."""
+    extra = make_browser_profiles(tmp_path, PARAMS)
+    for variable, value in extra["env"].items():
+        monkeypatch.setenv(variable, value)
+    monkeypatch.setattr(profiles, "registry", profiles.ProfileRegistry())
+    monkeypatch.setattr("core.browser_utils.registry", profiles.registry)
+    return {variable: Path(value) for variable, value in extra["env"].items()}
+
+
+def test_firefox_relative_profiles(profile_tree):
+    root = profile_tree["APPDATA"] / "Mozilla" / "Firefox"
+    local_root = profile_tree["LOCALAPPDATA"] / "Mozilla" / "Firefox"
+
+    found = read_firefox_profiles(root)
+
+    assert [profile.name for profile in found] == ["p0", "p1", "p2"]
+    for i, profile in enumerate(found):
+        assert profile.path == root / "Profiles" / f"p{i}.default"
+        # cache2 vive en el perfil y startupCache en su copia local
+        assert profile.cache_paths == [profile.path / "cache2",
+                                       local_root / "Profiles" / f"p{i}.default" / "startupCache"]
+        assert profile.cache_size > 0
+
+
+def test_firefox_absolute_profile(profile_tree, tmp_path):
+    root = profile_tree["APPDATA"] / "Mozilla" / "Firefox"
+    elsewhere = tmp_path / "otro disco" / "perfil"
+    (elsewhere / "cache2").mkdir(parents=True)
+    with open(root / "profiles.ini", "a", encoding="utf-8") as f:
+        f.write(f"\n[Profile9]\nIsRelative=0\nPath={elsewhere}\n\n[General]\nStartWithLastProfile=1\n")
+
+    found = {profile.name: profile for profile in read_firefox_profiles(root)}
+
+    # Sin ``Name`` se usa la sección; la ruta absoluta no tiene copia local bajo LOCALAPPDATA
+    assert set(found) == {"p0", "p1", "p2", "Profile9"}
+    assert found["Profile9"].path == elsewhere
+    assert found["Profile9"].cache_paths == [elsewhere / "cache2"]
+
+
+def test_chromium_profiles_without_local_state(profile_tree):
+    root = profile_tree["LOCALAPPDATA"] / "Google" / "Chrome" / "User Data"
+    (root / "System Profile").mkdir()
+
+    found = read_chromium_profiles("Chrome", root)
+
+    assert [profile.name for profile in found] == ["Default", "Profile 1", "Profile 2"]
+    for profile in found:
+        assert profile.cache_paths == [profile.path / subpath for subpath in CACHE_SUBPATHS["Chrome"]]
+
+
+def test_chromium_profiles_from_local_state(profile_tree):
+    root = profile_tree["LOCALAPPDATA"] / "Microsoft" / "Edge" / "User Data"
+    info_cache = {"Profile 2": {"name": "Trabajo"}, "Default": {"name": "Personal"}, "Profile 7": {"name": "Borrado"}}
+    (root / "Local State").write_text(json.dumps({"profile": {"info_cache": info_cache}}), encoding="utf-8")
+
+    found = read_chromium_profiles("Edge", root)
+
+    # Solo los perfiles de Local State que existen en disco, con Default primero
+    assert [(profile.name, profile.path.name) for profile in found] == [("Personal", "Default"),
+                                                                        ("Trabajo", "Profile 2")]
+
+
+def test_invalid_local_state_falls_back_to_directories(profile_tree):
+    root = profile_tree["LOCALAPPDATA"] / "Google" / "Chrome" / "User Data"
+    (root / "Local State").write_text("{no es json", encoding="utf-8")
+
+    assert [profile.name for profile in read_chromium_profiles("Chrome", root)] == ["Default", "Profile 1",
+                                                                                    "Profile 2"]
+
+
+def test_registry_rereads_changed_local_state(profile_tree):
+    root = profile_tree["LOCALAPPDATA"] / "Google" / "Chrome" / "User Data"
+    assert len(profiles.registry.profiles("Chrome")) == 3
+
+    (root / "Local State").write_text(json.dumps({"profile": {"info_cache": {"Default": {"name": "Yo"}}}}),
+                                      encoding="utf-8")
+
+    assert [profile.name for profile in profiles.registry.profiles("Chrome")] == ["Yo"]
+
+
+def test_cache_paths_and_cleaning(profile_tree):
+    browsers = ("Firefox", "Chrome", "Edge")
+    paths = get_browser_cache_paths(browsers)
+    # Firefox: cache2 y startupCache; Chromium: los cuatro subdirectorios de caché de cada perfil
+    assert len(paths) == PARAMS["profiles"] * (2 + 2 * len(CACHE_SUBPATHS["Chrome"]))
+
+    cleaned = clean_browser_cache(browsers=browsers, close=False)
+
+    assert [(browser, path) for browser, path, _ in cleaned] == paths
+    assert all(size == 0 for _, size in profiles.registry.cache_sizes(browsers))
+    assert (profile_tree["APPDATA"] / "Mozilla" / "Firefox" / "profiles.ini").is_file()
@@ -0,0 +1,58 @@
+import time
+from core.backup_store import BackupStore
+from core.cleanup import delete_files_in_directory
+from core.ratelimit import RateLimiter, TokenBucket
+
+
+def test_no_limits_means_no_limiter():
+    assert RateLimiter.from_settings({}) is None
+    assert RateLimiter.from_settings({"mb_per_sec": None, "ops_per_sec": 0}) is None
+    assert RateLimiter.from_settings({"ops_per_sec": 100}) is not None
+    assert not RateLimiter.from_settings({}, optional=False).active
+
+
+def test_configure_activates_limits():
+    limiter = RateLimiter()
+    assert not limiter.active
+    limiter.configure(ops_per_sec=50)
+    assert limiter.active
+
+
+def test_device_is_resolved_once_per_target(tmp_path, monkeypatch):
+    for index in range(20):
+        (tmp_path / f"d{index}").mkdir()
+        (tmp_path / f"d{index}" / "f.tmp").write_text("x")
+    limiter = RateLimiter(ops_per_sec=100000)
+    calls = []
+    device = limiter.device
+    monkeypatch.setattr(limiter, "device", lambda directory: calls.append(directory) or device(directory))
+    stats = delete_files_in_directory(str(tmp_path), workers=1, limiter=limiter)
+    assert stats.files == 20
+    assert calls == [str(tmp_path)]
+
+
+def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, burst=1)
+    started = time.monotonic()
+    for _ in range(11):
+        bucket.consume(1)
+    assert time.monotonic() - started >= 0.09
+
+
+def test_backup_charges_real_bytes(tmp_path):
+    source = tmp_path / "tmp"
+    source.mkdir()
+    for index in range(5):
+        (source / f"f{index}.tmp").write_bytes(b"ab%d" % index)
+    charged = []
+    run = BackupStore(tmp_path / "store").begin_run()
+    with run:
+        run.add(source / "f0.tmp", charged.append)
+    assert charged == [3, 3]  # Hash y compresión, sin la lectura vacía del final
+
+    limiter = RateLimiter(mb_per_sec=1)
+    started = time.monotonic()
+    stats = delete_files_in_directory(str(source), backup_directory=str(tmp_path / "store"), limiter=limiter)
+    assert stats.files == 5
+    # 30 bytes leídos: con un cobro por bloque de 1 MiB tardaría unos 20 segundos
+    assert time.monotonic() - started < 1
@@ -0,0 +1,59 @@
+import os
+import sqlite3
+from core.backup_store import BackupStore
+from core.restore import find_files, list_runs, restore_run
+
+
+def backup_tree(tmp_path, files):
+    """Respalda ``files`` (rutas relativas a ``tmp_path / "src"``) en un almacén nuevo; devuelve ``(almacén, run_id)``."""
+    store_path = tmp_path / "store"
+    with BackupStore(store_path).begin_run() as run:
+        for name in files:
+            path = tmp_path / "src" / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(name)
+            run.add(path)
+    return store_path, run.run_id
+
+
+def test_prefix_stops_at_path_separator(tmp_path):
+    names = [os.path.join("foo", "x"), os.path.join("foo", "sub", "y"), os.path.join("foobar", "z"), "foo.txt"]
+    store_path, run_id = backup_tree(tmp_path, names)
+    prefix = tmp_path / "src" / "foo"
+
+    found = sorted(os.path.relpath(row["path"], tmp_path / "src") for row in find_files(store_path, run_id, prefix))
+    assert found == sorted([os.path.join("foo", "x"), os.path.join("foo", "sub", "y")])
+
+    target = tmp_path / "restored"
+    stats = restore_run(store_path, run_id, prefix=prefix, target_root=target)
+    assert stats.restored == 2 and not stats.errors
+    restored_src = target / (tmp_path / "src").relative_to((tmp_path / "src").anchor)
+    assert (restored_src / "foo" / "sub" / "y").read_text() == os.path.join("foo", "sub", "y")
+    assert not (restored_src / "foobar").exists()
+
+
+def test_prefix_matches_a_single_file(tmp_path):
+    store_path, run_id = backup_tree(tmp_path, ["foo.txt", "foo.txt.bak"])
+    found = [row["path"] for row in find_files(store_path, run_id, tmp_path / "src" / "foo.txt")]
+    assert found == [str(tmp_path / "src" / "foo.txt")]
+
+
+def test_list_runs_reads_stored_totals(tmp_path):
+    store_path, run_id = backup_tree(tmp_path, ["a.txt", "bb.txt"])
+    # Sin filas en el manifiesto los totales solo pueden salir de la tabla ``totals``
+    connection = sqlite3.connect(BackupStore(store_path).manifest_path(run_id))
+    with connection:
+        connection.execute("DELETE FROM files")
+    connection.close()
+    assert list_runs(store_path) == [(run_id, 2, len("a.txt") + len("bb.txt"))]
+
+
+def test_list_runs_counts_unclosed_runs(tmp_path):
+    store = BackupStore(tmp_path / "store")
+    source = tmp_path / "a.txt"
+    source.write_text("abc")
+    run = store.begin_run()
+    run.add(source)
+    run._flush()  # Proceso interrumpido antes de cerrar la ejecución
+    assert list_runs(tmp_path / "store") == [(run.run_id, 1, 3)]
+    run.close()
@@ -0,0 +1,33 @@
+import os
+from core import secure_overwrite
+
+
+def test_random_pass_reuses_the_block(tmp_path, monkeypatch):
+    path = tmp_path / "secreto.bin"
+    path.write_bytes(b"x" * 10000)
+    writes = []
+    real_write = os.write
+
+    def spy(fd, data):
+        writes.append(data)
+        return real_write(fd, data)
+
+    monkeypatch.setattr(secure_overwrite.os, "write", spy)
+
+    written, _ = secure_overwrite.overwrite_file(str(path), [None], chunk_size=4096)
+
+    assert written == 10000
+    assert [len(data) for data in writes] == [4096, 4096, 1808]
+    # Todas las escrituras salen del mismo búfer preasignado
+    assert all(isinstance(data, memoryview) and data.obj is writes[0].obj for data in writes)
+    assert path.stat().st_size == 0
+
+
+def test_shred_removes_file(tmp_path):
+    path = tmp_path / "secreto.bin"
+    path.write_bytes(os.urandom(5000))
+
+    size, written, _ = secure_overwrite.shred_file(path, pattern="dod", chunk_size=1024)
+
+    assert (size, written) == (5000, 15000)
+    assert list(tmp_path.iterdir()) == []
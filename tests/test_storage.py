@@ -0,0 +1,24 @@
+import json
+import os
+import time
+import pytest
+from core import storage
+
+
+@pytest.mark.skipif(os.name == "nt", reason="la caché en disco solo se usa en Windows")
+def test_linux_ignores_disk_cache(tmp_path, monkeypatch):
+    cache_path = tmp_path / "storage.json"
+    key = storage.device_key(str(tmp_path))
+    cached = json.dumps({key: ["obsoleto", time.time()]})
+    cache_path.write_text(cached)
+    monkeypatch.setattr(storage, "default_cache_path", lambda: str(cache_path))
+    monkeypatch.setattr(storage, "_memory_cache", {})
+    monkeypatch.setattr(storage, "_disk_cache", None)
+
+    assert storage.media_type(str(tmp_path)) in (storage.SSD, storage.HDD, storage.UNKNOWN)
+    assert cache_path.read_text() == cached
+
+
+def test_explicit_workers_are_respected():
+    assert storage.deletion_strategy("/", 3) == (3, False, None)
+    assert storage.deletion_strategy("/", 0) == (1, False, None)